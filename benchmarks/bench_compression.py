@@ -0,0 +1,176 @@
+"""
+Benchmark: stored item size and capacity units with text compression.
+
+Builds a synthetic corpus of call-centre voice transcripts, stores each as a
+ticket issue_description plus a few comments through the ticket store record
+helpers, and reports average item size, write units (1 KB), eventually
+consistent read units (4 KB) and encode/decode cost per codec and threshold.
+
+Usage: python benchmarks/bench_compression.py [--tickets 500] [--seed 7] [--output results.json]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import compression
+import ticket_store
+from stub_table import item_size
+
+CONFIGS = (
+    ('none', 0),
+    ('zlib', 1024),
+    ('zlib', 512),
+    ('bz2', 1024),
+    ('lzma', 1024),
+)
+
+CALLER_LINES = (
+    "Hi, my laptop won't turn on after I pressed the power button this morning.",
+    "I already tried holding the power button for thirty seconds like the article said.",
+    "Outlook keeps asking for my password and then says it cannot connect to the server.",
+    "The VPN client shows error 809 when I try to connect from home.",
+    "I'm on the fourth floor, desk 4B-17, and the printer there shows a paper jam but there's no paper stuck.",
+    "Yes, I can hear you fine now. Sorry, I was on speaker.",
+    "It started right after the update that installed last night.",
+    "No, nobody else in my team seems to have the problem.",
+    "My employee number? I'd rather not give that, can you use my session instead?",
+    "The screen flickers and then goes completely black, but the fan is still running.",
+)
+AGENT_LINES = (
+    "Thanks for calling the IT service desk, I'm the virtual assistant. How can I help?",
+    "I'm sorry to hear that. Let me create a ticket for you so a technician can follow up.",
+    "Could you tell me when the problem started and whether anything changed recently?",
+    "Please try restarting the device once more while I check for known incidents.",
+    "I can see a known issue with the latest update affecting some models.",
+    "I've added that detail to your ticket. Is there anything else you noticed?",
+    "Your ticket number has been sent to you. A technician will contact you within four hours.",
+    "Could you confirm whether the charging light comes on when the cable is connected?",
+)
+
+
+def transcript(rng, turns):
+    lines = []
+    seconds = 0
+    for turn in range(turns):
+        seconds += rng.randint(3, 25)
+        speaker, bank = ('Agent', AGENT_LINES) if turn % 2 == 0 else ('Caller', CALLER_LINES)
+        lines.append(f"[{seconds // 60:02d}:{seconds % 60:02d}] {speaker}: {rng.choice(bank)}")
+    return '\n'.join(lines)
+
+
+def build_corpus(count, seed):
+    """
+    Tickets whose descriptions are voice transcripts of 2-80 turns, each with
+    up to three comments (short notes or transcript follow-ups).
+    """
+    rng = random.Random(seed)
+    corpus = []
+    for number in range(count):
+        ticket = {
+            'ticket_id': f'00000000-0000-4000-8000-{number:012d}',
+            'caller_id': f'poc-user-{number % 50:03d}',
+            'issue_description': transcript(rng, rng.choice((2, 4, 8, 16, 30, 50, 80))),
+            'status': 'open',
+            'created_at': '2026-02-09T12:20:25.343883Z',
+            'updated_at': '2026-02-09T12:20:25.343883Z',
+            'comment_count': 0
+        }
+        comments = []
+        for index in range(rng.randint(0, 3)):
+            text = rng.choice(CALLER_LINES) if rng.random() < 0.6 else transcript(rng, rng.randint(6, 30))
+            comments.append({'comment_text': text, 'added_at': f'2026-02-09T12:3{index}:00.000000Z'})
+        corpus.append((ticket, comments))
+    return corpus
+
+
+def measure(corpus, codec, min_bytes):
+    compression.compressor = compression.TextCompressor(codec, min_bytes)
+    tickets = comments = 0
+    ticket_bytes = comment_bytes = 0
+    write_units = read_units = 0.0
+    encode_seconds = decode_seconds = 0.0
+
+    for ticket, ticket_comments in corpus:
+        started = time.perf_counter()
+        records = [ticket_store._ticket_record(ticket)]
+        records += [ticket_store._comment_record(ticket['ticket_id'], c) for c in ticket_comments]
+        encode_seconds += time.perf_counter() - started
+
+        for index, record in enumerate(records):
+            size = item_size(record)
+            write_units += max(1, math.ceil(size / 1024))
+            read_units += max(1, math.ceil(size / 4096)) * 0.5
+            if index == 0:
+                tickets += 1
+                ticket_bytes += size
+            else:
+                comments += 1
+                comment_bytes += size
+
+        started = time.perf_counter()
+        ticket_store._decode_ticket(dict(records[0]))
+        for record in records[1:]:
+            ticket_store._public_comment(record)
+        decode_seconds += time.perf_counter() - started
+
+    return {
+        'codec': codec,
+        'min_bytes': min_bytes,
+        'avg_ticket_bytes': round(ticket_bytes / tickets, 1),
+        'avg_comment_bytes': round(comment_bytes / comments, 1) if comments else 0,
+        'write_units': write_units,
+        'read_units': read_units,
+        'encode_us_per_ticket': round(encode_seconds / tickets * 1e6, 1),
+        'decode_us_per_ticket': round(decode_seconds / tickets * 1e6, 1)
+    }
+
+
+def run(tickets, seed):
+    corpus = build_corpus(tickets, seed)
+    original = compression.compressor
+    try:
+        results = [measure(corpus, codec, min_bytes) for codec, min_bytes in CONFIGS]
+    finally:
+        compression.compressor = original
+    baseline = results[0]
+    for row in results:
+        row['write_unit_reduction_pct'] = round(100 * (1 - row['write_units'] / baseline['write_units']), 1)
+        row['read_unit_reduction_pct'] = round(100 * (1 - row['read_units'] / baseline['read_units']), 1)
+    return {
+        'benchmark': 'compression',
+        'tickets': tickets,
+        'seed': seed,
+        'avg_transcript_chars': round(sum(len(t['issue_description']) for t, _ in corpus) / len(corpus), 1),
+        'results': results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickets', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    report = run(args.tickets, args.seed)
+    print(f"{report['tickets']} tickets, average transcript {report['avg_transcript_chars']} chars")
+    print(f"{'codec':<6} {'min':>5} {'ticket B':>9} {'comment B':>9} {'WCU':>8} {'RCU':>8} "
+          f"{'WCU -%':>7} {'RCU -%':>7} {'enc us':>7} {'dec us':>7}")
+    for row in report['results']:
+        print(f"{row['codec']:<6} {row['min_bytes']:>5} {row['avg_ticket_bytes']:>9} {row['avg_comment_bytes']:>9} "
+              f"{row['write_units']:>8} {row['read_units']:>8} {row['write_unit_reduction_pct']:>7} "
+              f"{row['read_unit_reduction_pct']:>7} {row['encode_us_per_ticket']:>7} {row['decode_us_per_ticket']:>7}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
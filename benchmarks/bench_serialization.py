@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: per-response encode cost for tickets with 0, 50 and 500 comments.
+"+ numbers converted first" rows turn comment_count and version into ints
+before encoding, so the encoder never calls back into serialization._default.
+
+Usage: python benchmarks/bench_serialization.py [--iterations N] [--output results.json]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import serialization
+
+COMMENT_COUNTS = (0, 50, 500)
+
+
+def make_ticket(comment_count):
+    """Ticket shaped like a DynamoDB read, Decimal numbers included"""
+    return {
+        'ticket_id': '33567ee8-f182-4f8a-b03e-2f1515915471',
+        'caller_id': 'poc-user-001',
+        'issue_description': "My laptop won't turn on after pressing the power button",
+        'status': 'open',
+        'created_at': '2026-02-09T12:20:25.343883Z',
+        'updated_at': '2026-02-09T12:35:00.123456Z',
+        'comment_count': Decimal(comment_count),
+        'version': Decimal(1),
+        'comments': [
+            {
+                'comment_text': f'Caller update {i}: tried restarting, checked the power cable, still not working',
+                'added_at': f'2026-02-09T12:{i % 60:02d}:00.000000Z'
+            }
+            for i in range(comment_count)
+        ]
+    }
+
+
+def converted_numbers(ticket):
+    """ticket with its Decimal numbers converted up front instead of in _default"""
+    plain = dict(ticket)
+    for name in ('comment_count', 'version'):
+        if isinstance(plain.get(name), Decimal):
+            plain[name] = serialization._default(plain[name])
+    return plain
+
+
+def legacy_response(ticket):
+    """Encoding path before the serialization layer"""
+    return {
+        'statusCode': 200,
+        'headers': {'Content-Type': 'application/json'},
+        'body': json.dumps(ticket, default=str)
+    }
+
+
+def encoders():
+    yield 'legacy json.dumps(default=str)', legacy_response
+    names = ['stdlib'] + (['orjson'] if serialization.orjson is not None else [])
+    for name in names:
+        encode = serialization.select_encoder(name)
+        label = 'stdlib prebuilt encoder' if name == 'stdlib' else name
+        yield label, lambda ticket, encode=encode: {
+            'statusCode': 200, 'headers': serialization.JSON_HEADERS, 'body': encode(ticket)
+        }
+        yield f'{label} + numbers converted first', lambda ticket, encode=encode: {
+            'statusCode': 200, 'headers': serialization.JSON_HEADERS, 'body': encode(converted_numbers(ticket))
+        }
+
+
+def run(iterations):
+    results = []
+    for comment_count in COMMENT_COUNTS:
+        ticket = make_ticket(comment_count)
+        # Scale iterations down for large tickets so each case takes similar time
+        count = max(iterations // max(comment_count // 10, 1), 100)
+        for name, build in encoders():
+            seconds = min(timeit.repeat(lambda: build(ticket), number=count, repeat=3))
+            results.append({
+                'comments': comment_count,
+                'encoder': name,
+                'us_per_response': round(seconds / count * 1e6, 2),
+                'body_bytes': len(build(ticket)['body'])
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    print(f"{'comments':>8}  {'encoder':<40}  {'us/response':>11}  {'bytes':>8}")
+    for row in results:
+        print(f"{row['comments']:>8}  {row['encoder']:<40}  {row['us_per_response']:>11}  {row['body_bytes']:>8}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'benchmark': 'serialization', 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Replay call-centre traffic through lambda_handler against stubbed DynamoDB.
+
+Each simulated call creates a ticket, polls its status, adds comments and
+lists the caller's tickets. Requests run through the real handler, ticket
+store and ClientTable; only the DynamoDB service is replaced by StubTable.
+
+Usage: python benchmarks/load_test.py [--calls 200] [--workers 4] [--latency-ms 5]
+           [--throttle-rate 0.01] [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+import metrics
+import mock_itsm_handler
+import retry
+from object_store import MemoryObjectStore
+from rate_limit import create_rate_limiter
+from stub_table import StubClient, StubTable
+from ticket_archive import MemoryArchiveIndex, TicketArchive
+from ticket_cache import TicketCache
+from caller_summary import DynamoDBCallerSummaries
+from search_index import DynamoDBSearchIndex
+from ticket_store import ClientTable, DynamoDBTicketStore
+
+TABLE_NAME = 'poc-itsm-tickets'
+COMMENTS_TABLE_NAME = 'poc-itsm-ticket-comments'
+SEARCH_TABLE_NAME = 'poc-itsm-ticket-search'
+SUMMARY_TABLE_NAME = 'poc-itsm-caller-summaries'
+PERCENTILES = (50, 95, 99)
+
+
+def build_store(latency, throttle_rate, seed):
+    """
+    DynamoDBTicketStore over stub tables shaped like the deployed ones
+    (the search and summary tables are included for build_search_index
+    and build_caller_summaries).
+    Returns (store, tables).
+    """
+    tables = {
+        TABLE_NAME: StubTable(
+            'ticket_id', indexes={'CallerIdIndex': ('caller_id', 'created_at')},
+            latency=latency, throttle_rate=throttle_rate, seed=seed
+        ),
+        COMMENTS_TABLE_NAME: StubTable(
+            'ticket_id', 'comment_key',
+            latency=latency, throttle_rate=throttle_rate, seed=None if seed is None else seed + 1
+        ),
+        SEARCH_TABLE_NAME: StubTable(
+            'term', 'posting_key', indexes={'CallerTermIndex': ('caller_term', 'posting_key')},
+            latency=latency, throttle_rate=throttle_rate, seed=None if seed is None else seed + 2
+        ),
+        SUMMARY_TABLE_NAME: StubTable(
+            'caller_id',
+            latency=latency, throttle_rate=throttle_rate, seed=None if seed is None else seed + 3
+        )
+    }
+    client = StubClient(tables)
+    store = DynamoDBTicketStore(
+        table=ClientTable(client, TABLE_NAME),
+        comments_table=ClientTable(client, COMMENTS_TABLE_NAME)
+    )
+    return store, tables
+
+
+def build_search_index(tables):
+    """
+    DynamoDBSearchIndex over the stub search table from build_store.
+    """
+    return DynamoDBSearchIndex(table=ClientTable(StubClient(tables), SEARCH_TABLE_NAME))
+
+
+def build_caller_summaries(tables):
+    """
+    DynamoDBCallerSummaries over the stub summary table. No stream runs in
+    the load test, so GET /tickets pays the summary miss and the GSI query.
+    """
+    return DynamoDBCallerSummaries(table=ClientTable(StubClient(tables), SUMMARY_TABLE_NAME))
+
+
+def api_event(method, resource, path=None, path_parameters=None, query=None, body=None):
+    return {
+        'httpMethod': method,
+        'resource': resource,
+        'path': path or resource,
+        'pathParameters': path_parameters,
+        'queryStringParameters': query,
+        'body': json.dumps(body) if body is not None else None
+    }
+
+
+def simulate_call(index, args):
+    """
+    One caller interaction: create, poll status, comment, list.
+    """
+    caller_id = f'load-caller-{index % args.callers:04d}'
+    response = mock_itsm_handler.lambda_handler(api_event('POST', '/tickets', body={
+        'caller_id': caller_id,
+        'issue_description': ('Laptop will not boot after update. ' * 64)[:args.description_bytes]
+    }), {})
+    if response['statusCode'] != 201:
+        return
+    ticket_id = json.loads(response['body'])['ticket_id']
+    ticket_path = f'/tickets/{ticket_id}'
+
+    for _ in range(args.polls):
+        mock_itsm_handler.lambda_handler(
+            api_event('GET', '/tickets/{id}', ticket_path, {'id': ticket_id}), {})
+    for number in range(args.comments):
+        mock_itsm_handler.lambda_handler(api_event(
+            'POST', '/tickets/{id}/comments', f'{ticket_path}/comments', {'id': ticket_id},
+            body={'comment': (f'Update {number}: still failing. ' * 32)[:args.comment_bytes]}
+        ), {})
+    mock_itsm_handler.lambda_handler(api_event('GET', '/tickets', query={'caller': caller_id}), {})
+
+
+def percentile(sorted_values, pct):
+    """
+    Nearest-rank percentile of an ascending list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(documents, duration):
+    """
+    Per-route latency percentiles and throughput from EMF documents.
+    """
+    routes = {}
+    for document in documents:
+        routes.setdefault(document['Route'], []).append(document)
+    summary = {}
+    for route, entries in sorted(routes.items()):
+        latencies = sorted(entry['Latency'] for entry in entries)
+        summary[route] = {
+            'requests': len(entries),
+            'throughput_rps': round(len(entries) / duration, 2),
+            'errors': sum(1 for entry in entries if entry.get('StatusCode', 500) >= 500),
+            'mean_ms': round(sum(latencies) / len(latencies), 3),
+            **{f'p{pct}_ms': round(percentile(latencies, pct), 3) for pct in PERCENTILES},
+            'max_ms': round(latencies[-1], 3),
+            'retries': sum(entry.get('Retries', 0) for entry in entries),
+            'read_capacity_units': sum(entry.get('ReadCapacityUnits', 0) for entry in entries),
+            'write_capacity_units': sum(entry.get('WriteCapacityUnits', 0) for entry in entries)
+        }
+    return summary
+
+
+def run(args):
+    latency = args.latency_ms / 1000
+    if args.latency_jitter_ms:
+        latency = (max(0.0, latency - args.latency_jitter_ms / 1000), latency + args.latency_jitter_ms / 1000)
+    store, tables = build_store(latency, args.throttle_rate, args.seed)
+    sink = metrics.MemorySink()
+
+    # Fresh per-run state: a drained retry budget or warm cache from a
+    # previous run would skew the comparison
+    mock_itsm_handler.store = store
+    mock_itsm_handler.search_index = build_search_index(tables)
+    mock_itsm_handler.caller_summaries = build_caller_summaries(tables)
+    mock_itsm_handler.ticket_cache = TicketCache(enabled=not args.no_cache)
+    mock_itsm_handler.ticket_archive = TicketArchive(MemoryObjectStore(), MemoryArchiveIndex())
+    mock_itsm_handler.archive_cache = TicketCache()
+    mock_itsm_handler.retry_policy = retry.create_retry_policy()
+    mock_itsm_handler.rate_limiter = create_rate_limiter()
+    metrics.sink = sink
+    retry.start_deadline({})
+
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            list(pool.map(lambda index: simulate_call(index, args), range(args.calls)))
+        duration = time.perf_counter() - started
+
+    documents = sink.documents
+    return {
+        'benchmark': 'load_test',
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'config': {name: value for name, value in vars(args).items() if name not in ('output', 'baseline')},
+        'duration_seconds': round(duration, 3),
+        'requests': len(documents),
+        'throughput_rps': round(len(documents) / duration, 2),
+        'dynamodb': {
+            'calls': sum(table.calls for table in tables.values()),
+            'throttles': sum(table.throttles for table in tables.values())
+        },
+        'routes': summarize(documents, duration)
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    Routes whose p95 or p99 grew by more than tolerance (a fraction) over
+    the baseline run.
+    """
+    regressions = []
+    for route, current in results['routes'].items():
+        previous = baseline.get('routes', {}).get(route)
+        if not previous:
+            continue
+        for key in ('p95_ms', 'p99_ms'):
+            if previous[key] and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{route} {key}: {previous[key]} -> {current[key]}")
+    return regressions
+
+
+def print_report(results):
+    print(f"{results['requests']} requests in {results['duration_seconds']}s "
+          f"({results['throughput_rps']} req/s), "
+          f"{results['dynamodb']['calls']} DynamoDB calls, {results['dynamodb']['throttles']} throttled")
+    print(f"{'route':<28} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>6} {'retries':>7}")
+    for route, row in results['routes'].items():
+        print(f"{route:<28} {row['requests']:>6} {row['throughput_rps']:>8} {row['p50_ms']:>8} "
+              f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['errors']:>6} {row['retries']:>7}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=200, help='Simulated caller interactions')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent handler threads')
+    parser.add_argument('--callers', type=int, default=20, help='Distinct caller_ids')
+    parser.add_argument('--polls', type=int, default=3, help='Status polls per call')
+    parser.add_argument('--comments', type=int, default=2, help='Comments per call')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='Stub DynamoDB latency per call')
+    parser.add_argument('--latency-jitter-ms', type=float, default=0.0, help='Uniform +/- latency jitter')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Probability a DynamoDB call is throttled')
+    parser.add_argument('--description-bytes', type=int, default=200, help='issue_description size')
+    parser.add_argument('--comment-bytes', type=int, default=120, help='Comment size')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the ticket cache')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for throttling and jitter')
+    parser.add_argument('--verbose', action='store_true', help='Show handler log output')
+    parser.add_argument('--output', help='Write results as JSON to this path')
+    parser.add_argument('--baseline', help='Previous results JSON to check for p95/p99 regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed p95/p99 growth over baseline')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run(args)
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""
+In-memory DynamoDB stand-in for load tests: StubTable holds the items and
+injects latency and throttling; StubClient exposes the low-level client API
+so DynamoDBTicketStore runs unchanged on top of ClientTable.
+
+Supports the subset of DynamoDB the ticket store uses: single-equality key
+conditions, SET/ADD update expressions, attribute_exists /
+attribute_not_exists conditions and Put/Update transactions. Responses carry ConsumedCapacity sized like
+DynamoDB's (4 KB read units, 1 KB write units).
+"""
+import bisect
+import contextlib
+import math
+import random
+import re
+import threading
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+
+_KEY_CONDITION = re.compile(r'^\s*(#?\w+)\s*=\s*(:\w+)\s*$')
+_CONDITION = re.compile(r'^\s*(attribute_exists|attribute_not_exists)\((#?\w+)\)\s*$')
+_CLAUSE = re.compile(r'\b(SET|ADD|REMOVE)\b')
+
+
+class StubTable:
+    """
+    Thread-safe table keyed by hash_key (and range_key), with optional
+    secondary indexes given as {name: (hash_key, range_key)}.
+    latency: seconds per call, or a (low, high) range drawn uniformly.
+    throttle_rate: probability that a call raises a throttling error.
+    """
+
+    def __init__(self, hash_key, range_key=None, indexes=None, latency=0.0, throttle_rate=0.0, seed=None):
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self.indexes = dict(indexes or {})
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.calls = 0
+        self.throttles = 0
+        self._items = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    # Table API
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self._simulate('PutItem')
+        with self._lock:
+            key = self._key(Item)
+            self._check(ConditionExpression, ExpressionAttributeNames, self._items.get(key), 'PutItem')
+            self._items[key] = _copy(Item)
+        return {'ConsumedCapacity': _write_capacity(Item)}
+
+    def get_item(self, Key, ConsistentRead=False, **kwargs):
+        self._simulate('GetItem')
+        with self._lock:
+            item = self._items.get(self._key(Key))
+        response = {'ConsumedCapacity': _read_capacity([item] if item else [], ConsistentRead)}
+        if item is not None:
+            response['Item'] = _copy(item)
+        return response
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None,
+                    ConditionExpression=None, ExpressionAttributeNames=None, ReturnValues=None, **kwargs):
+        self._simulate('UpdateItem')
+        with self._lock:
+            key, item = self._updated(Key, UpdateExpression, ExpressionAttributeValues,
+                                      ConditionExpression, ExpressionAttributeNames)
+            self._items[key] = item
+        response = {'ConsumedCapacity': _write_capacity(item)}
+        if ReturnValues == 'ALL_NEW':
+            response['Attributes'] = _copy(item)
+        return response
+
+    def delete_item(self, Key, **kwargs):
+        self._simulate('DeleteItem')
+        with self._lock:
+            item = self._items.pop(self._key(Key), None)
+        return {'ConsumedCapacity': _write_capacity(item or Key)}
+
+    def query(self, KeyConditionExpression, ExpressionAttributeValues, IndexName=None, ScanIndexForward=True,
+              Limit=None, ExclusiveStartKey=None, ProjectionExpression=None, ExpressionAttributeNames=None,
+              ConsistentRead=False, **kwargs):
+        self._simulate('Query')
+        hash_key, range_key = self.indexes[IndexName] if IndexName else (self.hash_key, self.range_key)
+        match = _KEY_CONDITION.match(KeyConditionExpression)
+        if not match:
+            raise ValueError(f"Unsupported key condition: {KeyConditionExpression}")
+        value = ExpressionAttributeValues[match.group(2)]
+        with self._lock:
+            matches = [item for item in self._items.values() if item.get(hash_key) == value]
+        order = lambda item: (item.get(range_key, ''), self._key(item))
+        matches.sort(key=order, reverse=not ScanIndexForward)
+        start = 0
+        if ExclusiveStartKey:
+            marker = order(ExclusiveStartKey)
+            positions = [order(item) for item in matches]
+            if ScanIndexForward:
+                start = bisect.bisect_right(positions, marker)
+            else:
+                start = next((i for i, p in enumerate(positions) if p < marker), len(positions))
+        page = matches[start:start + Limit] if Limit else matches[start:]
+        response = {
+            'Items': [_project(item, ProjectionExpression, ExpressionAttributeNames) for item in page],
+            'ConsumedCapacity': _read_capacity(page, ConsistentRead, single=False)
+        }
+        if Limit and start + Limit < len(matches):
+            last = page[-1]
+            key_names = {self.hash_key, self.range_key, hash_key, range_key} - {None}
+            response['LastEvaluatedKey'] = {name: last[name] for name in key_names if name in last}
+        return response
+
+    def batch_write_item(self, Items):
+        self._simulate('BatchWriteItem')
+        with self._lock:
+            for item in Items:
+                self._items[self._key(item)] = _copy(item)
+        units = sum(_write_capacity(item)['CapacityUnits'] for item in Items)
+        return {'UnprocessedItems': [], 'ConsumedCapacity': [{'CapacityUnits': units}]}
+
+    def batch_get_item(self, Keys, ConsistentRead=False):
+        self._simulate('BatchGetItem')
+        with self._lock:
+            items = [self._items[self._key(key)] for key in Keys if self._key(key) in self._items]
+        return {
+            'Items': [_copy(item) for item in items],
+            'UnprocessedKeys': [],
+            'ConsumedCapacity': [_read_capacity(items, ConsistentRead)]
+        }
+
+    def transact_write(self, actions):
+        """
+        Apply [(kind, params)] Put and Update actions all or nothing.
+        Returns the items written. A failed condition raises
+        ConditionalCheckFailedException naming the failing action's position
+        as 'Index'. Holds the lock throughout, so callers writing several
+        tables take each table's lock_transaction() first.
+        """
+        writes = []
+        for index, (kind, params) in enumerate(actions):
+            try:
+                if kind == 'Put':
+                    key = self._key(params['Item'])
+                    self._check(params.get('ConditionExpression'), params.get('ExpressionAttributeNames'),
+                                self._items.get(key), 'PutItem')
+                    writes.append((key, _copy(params['Item'])))
+                elif kind == 'Update':
+                    writes.append(self._updated(params['Key'], params['UpdateExpression'],
+                                                params.get('ExpressionAttributeValues'),
+                                                params.get('ConditionExpression'),
+                                                params.get('ExpressionAttributeNames')))
+                else:
+                    raise ValueError(f"Unsupported transaction action: {kind}")
+            except ClientError as e:
+                e.response['Index'] = index
+                raise
+        for key, item in writes:
+            self._items[key] = item
+        return [item for _, item in writes]
+
+    def lock_transaction(self):
+        """
+        Simulate a transaction call on this table, then hold its lock for
+        transact_write.
+        """
+        self._simulate('TransactWriteItems')
+        return self._lock
+
+    def _updated(self, Key, UpdateExpression, ExpressionAttributeValues, ConditionExpression,
+                 ExpressionAttributeNames):
+        """
+        (key, item) after an update, checked but not stored. Call with the lock held.
+        """
+        values = ExpressionAttributeValues or {}
+        names = ExpressionAttributeNames or {}
+        key = self._key(Key)
+        current = self._items.get(key)
+        self._check(ConditionExpression, names, current, 'UpdateItem', values)
+        item = _copy(current) if current is not None else dict(Key)
+        _apply_update(item, UpdateExpression, names, values)
+        return key, item
+
+    # Simulation
+
+    def _simulate(self, operation):
+        with self._lock:
+            self.calls += 1
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+            if throttled:
+                self.throttles += 1
+            latency = self.latency
+            if isinstance(latency, (tuple, list)):
+                latency = self._random.uniform(*latency)
+        if latency:
+            time.sleep(latency)
+        if throttled:
+            raise ClientError(
+                {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Rate exceeded'}},
+                operation
+            )
+
+    def _key(self, item):
+        if self.range_key:
+            return (item[self.hash_key], item.get(self.range_key))
+        return item[self.hash_key]
+
+    def _check(self, expression, names, current, operation, values=None):
+        if not expression:
+            return
+        match = _CONDITION.match(expression)
+        if not match:
+            raise ValueError(f"Unsupported condition: {expression}")
+        function, name = match.groups()
+        name = (names or {}).get(name, name)
+        exists = current is not None and name in current
+        if exists != (function == 'attribute_exists'):
+            raise ClientError(
+                {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'}},
+                operation
+            )
+
+
+def _apply_update(item, expression, names, values):
+    """
+    Apply SET a = :v, b = if_not_exists(b, :v) / ADD c :n / REMOVE d clauses.
+    """
+    parts = _CLAUSE.split(expression)
+    for action, body in zip(parts[1::2], parts[2::2]):
+        for clause in filter(None, (c.strip() for c in body.split(','))):
+            if action == 'SET':
+                name, value = (p.strip() for p in clause.split('=', 1))
+                name = names.get(name, name)
+                fallback = re.match(r'if_not_exists\((#?\w+),\s*(:\w+)\)', value)
+                if fallback:
+                    item.setdefault(name, values[fallback.group(2)])
+                else:
+                    item[name] = values[value]
+            elif action == 'ADD':
+                name, value = clause.split()
+                name = names.get(name, name)
+                item[name] = item.get(name, 0) + values[value]
+            else:
+                item.pop(names.get(clause, clause), None)
+
+
+def _project(item, expression, names):
+    item = _copy(item)
+    if not expression:
+        return item
+    wanted = [(names or {}).get(name.strip(), name.strip()) for name in expression.split(',')]
+    return {name: item[name] for name in wanted if name in item}
+
+
+def item_size(item):
+    """
+    Approximate DynamoDB item size: attribute names plus UTF-8 strings,
+    binary lengths and ~1 byte per 2 significant digits for numbers.
+    """
+    return sum(len(name.encode('utf-8')) + _value_size(value) for name, value in item.items())
+
+
+def _value_size(value):
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if hasattr(value, 'value') and isinstance(value.value, (bytes, bytearray)):
+        return len(value.value)
+    if value is None or isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float, Decimal)):
+        return len(str(value).lstrip('-').replace('.', '')) // 2 + 1
+    if isinstance(value, dict):
+        return 3 + item_size(value) + len(value)
+    if isinstance(value, (list, tuple, set)):
+        return 3 + sum(1 + _value_size(v) for v in value)
+    return len(str(value))
+
+
+def _size(item):
+    return item_size(item) if item else 1
+
+
+def _read_capacity(items, consistent, single=True):
+    size = _size(items[0]) if single and items else sum(_size(item) for item in items)
+    units = max(1, math.ceil(size / 4096)) * (1.0 if consistent else 0.5)
+    return {'CapacityUnits': units}
+
+
+def _write_capacity(item):
+    return {'CapacityUnits': float(max(1, math.ceil(_size(item) / 1024)))}
+
+
+def _copy(item):
+    """
+    Deep-copy via DynamoDB semantics: numbers come back as Decimal.
+    """
+    copied = {}
+    for name, value in item.items():
+        if isinstance(value, bool):
+            copied[name] = value
+        elif isinstance(value, (int, float)):
+            copied[name] = Decimal(str(value))
+        elif isinstance(value, list):
+            copied[name] = [dict(v) if isinstance(v, dict) else v for v in value]
+        elif isinstance(value, dict):
+            copied[name] = dict(value)
+        else:
+            copied[name] = value
+    return copied
+
+
+class StubClient:
+    """
+    Low-level client facade over StubTables keyed by table name, so load
+    tests run the real ClientTable serialization and batch code paths.
+    """
+
+    _REQUEST_MAPS = ('Item', 'Key', 'ExpressionAttributeValues', 'ExclusiveStartKey')
+    _RESPONSE_MAPS = ('Item', 'Attributes', 'LastEvaluatedKey')
+
+    def __init__(self, tables):
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+        self.tables = tables
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+        # ClientRequestTokens of committed transactions (DynamoDB keeps them ten minutes)
+        self._transaction_tokens = set()
+        self._transaction_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name not in ('put_item', 'get_item', 'update_item', 'delete_item', 'query'):
+            raise AttributeError(name)
+
+        def call(TableName, ReturnConsumedCapacity=None, **request):
+            for key in self._REQUEST_MAPS:
+                if key in request:
+                    request[key] = self._plain(request[key])
+            response = getattr(self.tables[TableName], name)(**request)
+            return self._wire(response, TableName, ReturnConsumedCapacity)
+        return call
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity=None):
+        (table_name, requests), = RequestItems.items()
+        items = [self._plain(request['PutRequest']['Item']) for request in requests]
+        response = self.tables[table_name].batch_write_item(Items=items)
+        return self._wire({'ConsumedCapacity': response['ConsumedCapacity']}, table_name, ReturnConsumedCapacity)
+
+    def batch_get_item(self, RequestItems, ReturnConsumedCapacity=None):
+        (table_name, request), = RequestItems.items()
+        response = self.tables[table_name].batch_get_item(
+            Keys=[self._plain(key) for key in request['Keys']],
+            ConsistentRead=request.get('ConsistentRead', False)
+        )
+        wire = self._wire({'ConsumedCapacity': response['ConsumedCapacity']}, table_name, ReturnConsumedCapacity)
+        wire['Responses'] = {table_name: [self._dynamo(item) for item in response['Items']]}
+        return wire
+
+    def transact_write_items(self, TransactItems, ClientRequestToken=None, ReturnConsumedCapacity=None):
+        """
+        Put and Update actions over several tables, all or nothing. A failed
+        condition cancels the transaction with CancellationReasons; a token
+        already committed returns without writing again.
+        """
+        by_table = {}
+        for index, action in enumerate(TransactItems):
+            (kind, params), = action.items()
+            params = dict(params)
+            for key in self._REQUEST_MAPS:
+                if key in params:
+                    params[key] = self._plain(params[key])
+            by_table.setdefault(params.pop('TableName'), []).append((index, kind, params))
+        with self._transaction_lock, contextlib.ExitStack() as locks:
+            if ClientRequestToken and ClientRequestToken in self._transaction_tokens:
+                written = {}
+            else:
+                for table_name in sorted(by_table):
+                    locks.enter_context(self.tables[table_name].lock_transaction())
+                written = {}
+                for table_name, actions in by_table.items():
+                    try:
+                        self.tables[table_name].transact_write([(kind, params) for _, kind, params in actions])
+                    except ClientError as e:
+                        if 'Index' not in e.response:
+                            raise
+                        reasons = [{'Code': 'None'} for _ in TransactItems]
+                        reasons[actions[e.response['Index']][0]] = {'Code': 'ConditionalCheckFailed'}
+                        raise ClientError({
+                            'Error': {'Code': 'TransactionCanceledException',
+                                      'Message': 'Transaction cancelled, please refer cancellation reasons for specific reasons'},
+                            'CancellationReasons': reasons
+                        }, 'TransactWriteItems')
+                    written[table_name] = [params.get('Item') or params['Key'] for _, _, params in actions]
+                if ClientRequestToken:
+                    self._transaction_tokens.add(ClientRequestToken)
+        wire = {}
+        if ReturnConsumedCapacity:
+            # Transactional writes cost two write units per 1 KB
+            wire['ConsumedCapacity'] = [
+                {'TableName': table_name,
+                 'CapacityUnits': 2 * sum(_write_capacity(item)['CapacityUnits'] for item in items)}
+                for table_name, items in written.items()
+            ]
+        return wire
+
+    def _wire(self, response, table_name, return_capacity):
+        wire = {}
+        for key in self._RESPONSE_MAPS:
+            if key in response:
+                wire[key] = self._dynamo(response[key])
+        if 'Items' in response:
+            wire['Items'] = [self._dynamo(item) for item in response['Items']]
+        if return_capacity:
+            consumed = response['ConsumedCapacity']
+            if isinstance(consumed, list):
+                wire['ConsumedCapacity'] = [dict(c, TableName=table_name) for c in consumed]
+            else:
+                wire['ConsumedCapacity'] = dict(consumed, TableName=table_name)
+        return wire
+
+    def _plain(self, values):
+        return {name: self._deserializer.deserialize(value) for name, value in values.items()}
+
+    def _dynamo(self, values):
+        return {name: self._serializer.serialize(value) for name, value in values.items()}
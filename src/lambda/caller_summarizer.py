@@ -0,0 +1,47 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from caller_summary import create_caller_summaries, update_summary
+from ticket_store import create_store
+
+store = create_store()
+summaries = create_caller_summaries()
+
+_deserializer = TypeDeserializer()
+
+
+def lambda_handler(event, context):
+    """
+    DynamoDB Streams consumer for the tickets table (NEW_AND_OLD_IMAGES)
+    that maintains one summary item per caller for GET /tickets.
+
+    Records are grouped by caller so each caller costs one read and one
+    conditional write per batch. Callers whose update fails are reported
+    through batchItemFailures (enable ReportBatchItemFailures on the event
+    source mapping), so Lambda retries from their first record.
+    """
+    changes = {}
+    for record in event.get('Records', []):
+        images = record.get('dynamodb', {})
+        old = _image(images.get('OldImage'))
+        new = _image(images.get('NewImage'))
+        ticket = new or old
+        if not ticket or 'caller_id' not in ticket:
+            continue
+        changes.setdefault(ticket['caller_id'], []).append((images.get('SequenceNumber'), old, new))
+
+    failures = []
+    for caller_id, caller_changes in changes.items():
+        try:
+            update_summary(summaries, store, caller_id, caller_changes)
+        except Exception as e:
+            print(f"Error updating summary for caller {caller_id}: {str(e)}")
+            failures.append({'itemIdentifier': caller_changes[0][0]})
+
+    print(f"Updated {len(changes) - len(failures)} caller summaries from {len(event.get('Records', []))} records")
+    return {'batchItemFailures': failures}
+
+
+def _image(image):
+    if not image:
+        return None
+    return {name: _deserializer.deserialize(value) for name, value in image.items()}
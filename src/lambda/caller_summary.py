@@ -0,0 +1,303 @@
+import copy
+import os
+import threading
+
+from botocore.exceptions import ClientError
+
+from ticket_store import ClientTable, get_dynamodb_client
+
+# Newest tickets listed in a caller summary; GET /tickets?view=summary pages
+# up to this size are served from the summary
+RECENT_TICKETS = int(os.environ.get('CALLER_SUMMARY_RECENT', '20'))
+
+# Ticket attributes kept per recent entry: the GET /tickets?view=summary
+# projection
+RECENT_ATTRIBUTES = ('ticket_id', 'status', 'created_at', 'updated_at')
+
+# Approximate byte budget for the recent list, so every summary write stays
+# at a few WCU; the oldest entries are dropped first
+MAX_RECENT_BYTES = 4 * 1024
+
+# Changes to tickets older than the recent list whose stream sequence
+# numbers are remembered, so redelivered records are not counted twice
+APPLIED_CHANGES = 32
+
+# Attempts at the read-modify-write of one summary before giving up
+MAX_UPDATE_ATTEMPTS = 5
+
+# Page size used when a summary is first built from CallerIdIndex
+SEED_PAGE_SIZE = 500
+
+
+def create_caller_summaries(backend=None):
+    """
+    Create the caller summary store selected by CALLER_SUMMARY_STORE
+    (default: the TICKET_STORE backend). Supported backends: dynamodb, memory.
+    """
+    backend = (backend or os.environ.get('CALLER_SUMMARY_STORE') or os.environ.get('TICKET_STORE', 'dynamodb')).lower()
+    if backend == 'dynamodb':
+        return DynamoDBCallerSummaries()
+    if backend == 'memory':
+        return MemoryCallerSummaries()
+    raise ValueError(f"Unknown caller summary backend: {backend}")
+
+
+class CallerSummaries:
+    """
+    One summary item per caller, maintained from the tickets table stream:
+    {'caller_id', 'recent', 'status_counts', 'ticket_count',
+     'last_activity_at', 'applied', 'version'}. recent holds the
+    RECENT_ATTRIBUTES of the newest tickets, newest first; applied holds
+    [ticket_id, sequence_number] of the latest changes to older tickets.
+    """
+
+    def get(self, caller_id, consistent=False):
+        """
+        Return the caller's summary, or None if there is none yet.
+        """
+        raise NotImplementedError
+
+    def put(self, summary, expected_version=None):
+        """
+        Store summary if the stored version is still expected_version (None:
+        no summary yet). Returns False when another writer got there first.
+        """
+        raise NotImplementedError
+
+
+class DynamoDBCallerSummaries(CallerSummaries):
+    """
+    Caller summaries in the poc-itsm-caller-summaries table (partition key
+    caller_id).
+    """
+
+    def __init__(self, table=None, table_name=None, region=None):
+        self.table_name = table_name or os.environ.get('CALLER_SUMMARY_TABLE_NAME', 'poc-itsm-caller-summaries')
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = ClientTable(get_dynamodb_client(self.region), self.table_name)
+        return self._table
+
+    def get(self, caller_id, consistent=False):
+        response = self.table.get_item(Key={'caller_id': caller_id}, ConsistentRead=consistent)
+        return response.get('Item')
+
+    def put(self, summary, expected_version=None):
+        if expected_version is None:
+            condition = {'ConditionExpression': 'attribute_not_exists(caller_id)'}
+        else:
+            condition = {
+                'ConditionExpression': 'version = :version',
+                'ExpressionAttributeValues': {':version': expected_version}
+            }
+        try:
+            self.table.put_item(Item=summary, **condition)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+
+class MemoryCallerSummaries(CallerSummaries):
+    """
+    In-process caller summaries for local runs and load tests.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, caller_id, consistent=False):
+        with self._lock:
+            return copy.deepcopy(self._items.get(caller_id))
+
+    def put(self, summary, expected_version=None):
+        with self._lock:
+            current = self._items.get(summary['caller_id'])
+            if (current['version'] if current else None) != expected_version:
+                return False
+            self._items[summary['caller_id']] = copy.deepcopy(summary)
+        return True
+
+
+def new_summary(caller_id):
+    return {
+        'caller_id': caller_id,
+        'recent': [],
+        'status_counts': {},
+        'ticket_count': 0,
+        'last_activity_at': None,
+        'applied': [],
+        'version': 0
+    }
+
+
+def apply_change(summary, old, new, sequence=None):
+    """
+    Fold one ticket change into summary. old and new are the stream images
+    (None for an insert or a removal respectively), sequence the record's
+    SequenceNumber.
+
+    Changes to tickets inside the recent list are idempotent, so redelivered
+    stream records do not double count. Older tickets are counted from the
+    old image; their records are skipped when the ticket already has a
+    change at or after sequence in applied.
+    """
+    ticket = new or old
+    recent = summary['recent']
+    position = next((index for index, entry in enumerate(recent) if entry['ticket_id'] == ticket['ticket_id']), None)
+
+    if position is not None:
+        previous_status = recent[position]['status']
+    elif _covered(summary, ticket):
+        previous_status = None
+    else:
+        if not _first_delivery(summary, ticket['ticket_id'], sequence):
+            return summary
+        previous_status = old['status'] if old else None
+    next_status = new['status'] if new else None
+
+    if previous_status != next_status:
+        counts = summary['status_counts']
+        if previous_status is not None:
+            counts[previous_status] = max(0, counts.get(previous_status, 0) - 1)
+            summary['ticket_count'] = max(0, summary['ticket_count'] - 1)
+        if next_status is not None:
+            counts[next_status] = counts.get(next_status, 0) + 1
+            summary['ticket_count'] += 1
+
+    if position is not None:
+        recent.pop(position)
+    if new is not None:
+        entry = _entry(new)
+        key = _order(entry)
+        index = next((i for i, other in enumerate(recent) if _order(other) < key), len(recent))
+        recent.insert(index, entry)
+        _trim(recent)
+        updated_at = new.get('updated_at')
+        if updated_at and (summary['last_activity_at'] is None or updated_at > summary['last_activity_at']):
+            summary['last_activity_at'] = updated_at
+    return summary
+
+
+def recent_page(summary, limit):
+    """
+    First page of the caller's tickets from summary as (tickets, last_key),
+    shaped like TicketStore.query_by_caller with RECENT_ATTRIBUTES. Returns
+    None when the summary holds fewer than limit tickets but the caller has
+    more.
+    """
+    recent = summary['recent']
+    if len(recent) < limit and summary['ticket_count'] > len(recent):
+        return None
+    tickets = [dict(entry) for entry in recent[:limit]]
+    last_key = None
+    if tickets and summary['ticket_count'] > len(tickets):
+        last = tickets[-1]
+        last_key = {'ticket_id': last['ticket_id'], 'caller_id': summary['caller_id'], 'created_at': last['created_at']}
+    return tickets, last_key
+
+
+def seed_summary(store, caller_id):
+    """
+    Build a caller's first summary from CallerIdIndex, so callers with tickets
+    from before the stream was enabled get complete counts.
+    """
+    summary = new_summary(caller_id)
+    tickets, last_key = store.query_by_caller(caller_id, limit=RECENT_TICKETS, attributes=RECENT_ATTRIBUTES)
+    for ticket in tickets:
+        summary['recent'].append(_entry(ticket))
+        _count(summary, ticket)
+    _trim(summary['recent'])
+    while last_key:
+        tickets, last_key = store.query_by_caller(
+            caller_id, limit=SEED_PAGE_SIZE, start_key=last_key, attributes=('ticket_id', 'status', 'updated_at')
+        )
+        for ticket in tickets:
+            _count(summary, ticket)
+    return summary
+
+
+def update_summary(summaries, store, caller_id, changes):
+    """
+    Apply (sequence, old, new) ticket changes to the caller's summary with
+    an optimistic read-modify-write, seeding the summary on first use.
+    sequence is the stream record's SequenceNumber, or None if unknown.
+    """
+    for _ in range(MAX_UPDATE_ATTEMPTS):
+        summary = summaries.get(caller_id, consistent=True)
+        expected_version = summary['version'] if summary else None
+        if summary is None:
+            summary = seed_summary(store, caller_id)
+        for sequence, old, new in changes:
+            apply_change(summary, old, new, sequence)
+        summary['version'] = (expected_version or 0) + 1
+        if summaries.put(summary, expected_version=expected_version):
+            return summary
+    raise RuntimeError(f"Caller summary for {caller_id} kept changing; giving up")
+
+
+def _count(summary, ticket):
+    counts = summary['status_counts']
+    counts[ticket['status']] = counts.get(ticket['status'], 0) + 1
+    summary['ticket_count'] += 1
+    updated_at = ticket.get('updated_at')
+    if updated_at and (summary['last_activity_at'] is None or updated_at > summary['last_activity_at']):
+        summary['last_activity_at'] = updated_at
+
+
+def _covered(summary, ticket):
+    """
+    True when the recent list is authoritative for ticket: it holds every
+    ticket of the caller, or ticket is at least as new as its oldest entry.
+    """
+    recent = summary['recent']
+    return summary['ticket_count'] <= len(recent) or (recent and _order(ticket) >= _order(recent[-1]))
+
+
+def _first_delivery(summary, ticket_id, sequence):
+    """
+    Record sequence as the latest change to ticket_id in applied. False when
+    a change at or after it was already applied (a redelivered record).
+    Sequence numbers of one ticket come from one stream shard, so they only
+    grow.
+    """
+    if sequence is None:
+        return True
+    applied = summary.setdefault('applied', [])
+    for index, (applied_id, applied_sequence) in enumerate(applied):
+        if applied_id == ticket_id:
+            if int(sequence) <= int(applied_sequence):
+                return False
+            applied.pop(index)
+            break
+    applied.append([ticket_id, str(sequence)])
+    del applied[:-APPLIED_CHANGES]
+    return True
+
+
+def _entry(ticket):
+    return {name: ticket[name] for name in RECENT_ATTRIBUTES if name in ticket}
+
+
+def _order(ticket):
+    return ticket['created_at'], ticket['ticket_id']
+
+
+def _trim(recent):
+    del recent[RECENT_TICKETS:]
+    size = sum(_size(entry) for entry in recent)
+    while len(recent) > 1 and size > MAX_RECENT_BYTES:
+        size -= _size(recent.pop())
+
+
+def _size(entry):
+    total = 0
+    for name, value in entry.items():
+        total += len(name) + (len(value) if isinstance(value, (str, bytes)) else 8)
+    return total
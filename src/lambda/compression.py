@@ -0,0 +1,66 @@
+import importlib
+import os
+
+# One-byte header identifying the codec of a compressed value, so values
+# written under an older setting still decode after TEXT_COMPRESSION changes.
+# Codec modules are imported on first use to keep them off the cold start.
+_HEADERS = {
+    'zlib': b'\x01',
+    'bz2': b'\x02',
+    'lzma': b'\x03',
+}
+_CODECS_BY_HEADER = {header: codec for codec, header in _HEADERS.items()}
+
+
+def create_compressor(codec=None, min_bytes=None):
+    """
+    Create the text compressor configured by environment variables:
+    TEXT_COMPRESSION (zlib (default), bz2, lzma or none) and
+    TEXT_COMPRESSION_MIN_BYTES (default 1024).
+    """
+    codec = (codec or os.environ.get('TEXT_COMPRESSION', 'zlib')).lower()
+    if min_bytes is None:
+        min_bytes = int(os.environ.get('TEXT_COMPRESSION_MIN_BYTES', '1024'))
+    if codec != 'none' and codec not in _HEADERS:
+        raise ValueError(f"Unknown text compression codec: {codec}")
+    return TextCompressor(codec, min_bytes)
+
+
+class TextCompressor:
+    """
+    Stores long text as compressed bytes (a DynamoDB Binary attribute) and
+    short text unchanged. decode() accepts either form.
+    """
+
+    def __init__(self, codec='zlib', min_bytes=1024):
+        self.codec = codec
+        self.min_bytes = min_bytes
+
+    def encode(self, text):
+        """
+        Return compressed bytes for text of at least min_bytes UTF-8 bytes
+        when that is smaller, otherwise text itself.
+        """
+        if self.codec == 'none' or not isinstance(text, str):
+            return text
+        data = text.encode('utf-8')
+        if len(data) < self.min_bytes:
+            return text
+        compressed = _HEADERS[self.codec] + importlib.import_module(self.codec).compress(data)
+        return compressed if len(compressed) < len(data) else text
+
+    def decode(self, value):
+        """
+        Return the text for a stored value: str as-is, bytes or boto3
+        Binary decompressed by their codec header.
+        """
+        if isinstance(value, str) or value is None:
+            return value
+        data = bytes(getattr(value, 'value', value))
+        codec = _CODECS_BY_HEADER.get(data[:1])
+        if codec is None:
+            raise ValueError("Unknown compressed text header")
+        return importlib.import_module(codec).decompress(data[1:]).decode('utf-8')
+
+
+compressor = create_compressor()
@@ -0,0 +1,43 @@
+import hashlib
+
+# Ticket attributes ETags are derived from. Every write that changes a
+# ticket (status change, new comment) also sets updated_at.
+VALIDATOR_ATTRIBUTES = ('ticket_id', 'updated_at')
+
+
+def ticket_etag(ticket, attributes=None):
+    """
+    Weak ETag for GET /tickets/{id}. attributes (a fields= selection) is
+    part of the tag, so each selection of a ticket has its own.
+    """
+    return _etag('ticket', ticket['ticket_id'], ticket.get('updated_at'), *(attributes or ()))
+
+
+def page_etag(tickets, view=None):
+    """
+    Weak ETag for a GET /tickets page, from the ids and updated_at of the
+    tickets on it.
+    """
+    return _etag('page', view or 'full', *(f"{ticket['ticket_id']}@{ticket.get('updated_at')}" for ticket in tickets))
+
+
+def matches(if_none_match, etag):
+    """
+    Weak comparison of an If-None-Match header value with etag; "*"
+    matches any current representation.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = _opaque(etag)
+    return any(_opaque(tag.strip()) == opaque for tag in if_none_match.split(','))
+
+
+def _etag(*parts):
+    digest = hashlib.blake2b('\x1f'.join(str(part) for part in parts).encode('utf-8'), digest_size=12)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _opaque(tag):
+    return tag[2:] if tag.startswith('W/') else tag
@@ -0,0 +1,196 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# CloudWatch namespace for Embedded Metric Format documents
+NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'PocItsmApi')
+
+# Metrics for the current invocation. A ContextVar so worker threads started
+# with copy_context() record into the same invocation.
+_current = contextvars.ContextVar('metrics_invocation', default=None)
+
+# True until the first invocation in this container has started
+_cold_start = True
+_cold_start_lock = threading.Lock()
+
+# DynamoDB operations whose consumed capacity is reported as write units
+WRITE_OPERATIONS = frozenset(['put_item', 'update_item', 'delete_item', 'batch_write_item', 'transact_write_items'])
+
+
+def create_sink(name=None):
+    """
+    Create the metrics sink selected by the METRICS_SINK environment variable.
+    Supported sinks: emf (default, CloudWatch EMF on stdout), memory, none.
+    """
+    name = (name or os.environ.get('METRICS_SINK', 'emf')).lower()
+    if name == 'emf':
+        return StdoutSink()
+    if name == 'memory':
+        return MemorySink()
+    if name == 'none':
+        return NullSink()
+    raise ValueError(f"Unknown metrics sink: {name}")
+
+
+class StdoutSink:
+    """
+    Prints one EMF document per line; the Lambda log agent turns them into
+    CloudWatch metrics without any API calls from the function.
+    """
+
+    def emit(self, document):
+        print(json.dumps(document, separators=(',', ':')))
+
+
+class MemorySink:
+    """
+    Collects EMF documents in memory for tests and local runs.
+    """
+
+    def __init__(self):
+        self.documents = []
+        self._lock = threading.Lock()
+
+    def emit(self, document):
+        with self._lock:
+            self.documents.append(document)
+
+    def clear(self):
+        with self._lock:
+            self.documents.clear()
+
+
+class NullSink:
+    def emit(self, document):
+        pass
+
+
+sink = create_sink()
+
+
+class Invocation:
+    """
+    Metric values and properties recorded during one request.
+    Values recorded more than once under the same name are summed.
+    """
+
+    def __init__(self, route, request_id=None):
+        self.route = route
+        self.started = time.perf_counter()
+        self.values = {}
+        self.properties = {}
+        if request_id:
+            self.properties['RequestId'] = request_id
+        self._lock = threading.Lock()
+
+    def add(self, name, value=1, unit='Count'):
+        with self._lock:
+            previous = self.values.get(name)
+            self.values[name] = (value + (previous[0] if previous else 0), unit)
+
+    def set_property(self, name, value):
+        with self._lock:
+            self.properties[name] = value
+
+    def to_emf(self, timestamp_ms=None):
+        """
+        Build the Embedded Metric Format document, with Route as the only
+        dimension so per-route percentiles stay cheap to query.
+        """
+        with self._lock:
+            values = dict(self.values)
+            properties = dict(self.properties)
+        document = {
+            '_aws': {
+                'Timestamp': int(timestamp_ms if timestamp_ms is not None else time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': NAMESPACE,
+                    'Dimensions': [['Route']],
+                    'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in values.items()]
+                }]
+            },
+            'Route': self.route
+        }
+        document.update(properties)
+        document.update({name: value for name, (value, _) in values.items()})
+        return document
+
+
+def start_invocation(route, context=None):
+    """
+    Begin recording metrics for a request. The first invocation in a
+    container is flagged as a cold start.
+    """
+    global _cold_start
+    with _cold_start_lock:
+        cold_start, _cold_start = _cold_start, False
+    invocation = Invocation(route, request_id=getattr(context, 'aws_request_id', None))
+    invocation.add('ColdStart', 1 if cold_start else 0)
+    _current.set(invocation)
+    return invocation
+
+
+def finish_invocation(status_code=None):
+    """
+    Record total latency and status for the current request and emit it.
+    Returns the emitted document, or None without a current invocation.
+    """
+    invocation = _current.get()
+    if invocation is None:
+        return None
+    _current.set(None)
+    invocation.add('Latency', (time.perf_counter() - invocation.started) * 1000, 'Milliseconds')
+    if status_code is not None:
+        invocation.set_property('StatusCode', status_code)
+        invocation.add('Errors', 1 if status_code >= 500 else 0)
+    document = invocation.to_emf()
+    sink.emit(document)
+    return document
+
+
+def current():
+    return _current.get()
+
+
+def add(name, value=1, unit='Count'):
+    """
+    Record a value on the current request; a no-op outside a request.
+    """
+    invocation = _current.get()
+    if invocation is not None:
+        invocation.add(name, value, unit)
+
+
+def set_property(name, value):
+    invocation = _current.get()
+    if invocation is not None:
+        invocation.set_property(name, value)
+
+
+@contextmanager
+def span(name):
+    """
+    Time the enclosed block and add it to name in milliseconds.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, (time.perf_counter() - started) * 1000, 'Milliseconds')
+
+
+def record_consumed_capacity(operation_name, consumed):
+    """
+    Add DynamoDB ConsumedCapacity (a dict, or a list for batch operations)
+    to ReadCapacityUnits or WriteCapacityUnits.
+    """
+    if not consumed:
+        return
+    if isinstance(consumed, dict):
+        consumed = [consumed]
+    units = sum(entry.get('CapacityUnits', 0) for entry in consumed)
+    name = 'WriteCapacityUnits' if operation_name in WRITE_OPERATIONS else 'ReadCapacityUnits'
+    add(name, units)
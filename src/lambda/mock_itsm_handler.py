@@ -1,130 +1,728 @@
+import contextvars
 import json
+import math
+import os
+import threading
 import uuid
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import parse_qsl, urlsplit
 from botocore.exceptions import ClientError
-import time
-import os
 
-# Initialize DynamoDB client
-dynamodb = boto3.resource('dynamodb', region_name=os.environ.get('REGION', 'us-east-1'))
-table_name = os.environ.get('TABLE_NAME', 'poc-itsm-tickets')
-table = dynamodb.Table(table_name)
+import caller_summary
+import etags
+import metrics
+import retry
+from pagination import decode_cursor, encode_cursor
+from rate_limit import create_rate_limiter
+from serialization import JSON_HEADERS, encode, json_response, not_modified_response
+from routing import Router, decode_body, normalize_event
+from search_index import create_search_index, tokenize
+from ticket_archive import create_ticket_archive, expiry_for
+from ticket_cache import TicketCache, create_ticket_cache
+from ticket_store import create_store
+
+# Initialize ticket store (backend selected by TICKET_STORE, default dynamodb)
+store = create_store()
+
+# Read-through cache for get_ticket_status, shared across warm invocations
+ticket_cache = create_ticket_cache()
+
+# Cold tier for tickets the tickets table expired (see ticket_archiver)
+ticket_archive = create_ticket_archive()
+
+# GET /tickets/{id} falls back to the archive when the ticket is not in the table
+TICKET_ARCHIVE_READS = os.environ.get('TICKET_ARCHIVE_READS', 'true').lower() == 'true'
+
+# Archived tickets never change, so they are cached far longer than live ones
+archive_cache = TicketCache(
+    max_entries=int(os.environ.get('ARCHIVE_CACHE_MAX_ENTRIES', '256')),
+    ttl_seconds=float(os.environ.get('ARCHIVE_CACHE_TTL_SECONDS', '300'))
+)
+
+# Keyword index over descriptions and comments (backend follows TICKET_STORE)
+search_index = create_search_index()
+
+# inline: index on create/comment; stream: left to the search_indexer stream handler
+SEARCH_INDEX_UPDATES = os.environ.get('SEARCH_INDEX_UPDATES', 'inline').lower()
+
+# Per-caller summaries maintained by the caller_summarizer stream handler
+caller_summaries = caller_summary.create_caller_summaries()
+
+# Serve the first GET /tickets?view=summary page and the caller context's
+# ticket ids from the caller summary when it has one
+CALLER_SUMMARY_READS = os.environ.get('CALLER_SUMMARY_READS', 'true').lower() == 'true'
+
+# Retry policy with a container-wide retry budget
+retry_policy = retry.create_retry_policy()
+
+# Per-caller and per-route token buckets (RATE_LIMITS), checked before any store call
+rate_limiter = create_rate_limiter()
+
+# Maximum items accepted by POST /tickets/batch and POST /tickets/lookup
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', '500'))
+# Tickets per store write (one BatchWriteItem), so an error fails only its own chunk
+BATCH_WRITE_CHUNK = 25
+
+# Operations accepted by POST /batch, and how many run at once. Workers
+# share the DynamoDB client, so keep BATCH_CONCURRENCY within its pool
+# (DYNAMODB_MAX_POOL_CONNECTIONS)
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '10'))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '4'))
+
+# Worker threads by use (POST /batch, caller context reads), started on first
+# use and kept per container. Separate pools, so context reads inside a batch
+# operation never wait for a worker the batch itself holds
+_worker_pools = {}
+_worker_pools_lock = threading.Lock()
+
+# Operations by method and resource template, registered with @routes.route
+# below and compiled at import
+routes = Router()
+
+# Metrics label resource for paths that match no route
+UNMATCHED_RESOURCE = '<unmatched>'
+
+# Page sizes for GET /tickets?caller=
+LIST_DEFAULT_LIMIT = 10
+LIST_MAX_LIMIT = 100
+
+# Result limits for GET /tickets/search
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+
+# GET /callers/{caller_id}/context: tickets included (default, max), how many
+# are read at once, and the response size budget in bytes (default, range)
+CONTEXT_DEFAULT_TICKETS = int(os.environ.get('CALLER_CONTEXT_TICKETS', '5'))
+CONTEXT_MAX_TICKETS = 20
+CONTEXT_CONCURRENCY = int(os.environ.get('CALLER_CONTEXT_CONCURRENCY', '5'))
+CONTEXT_MAX_BYTES = int(os.environ.get('CALLER_CONTEXT_MAX_BYTES', '8192'))
+CONTEXT_BYTES_RANGE = (1024, 262144)
+
+# Ticket attributes in a caller context; caller_id is given once for the document
+CONTEXT_ATTRIBUTES = ('ticket_id', 'status', 'issue_description', 'created_at', 'updated_at',
+                      'comment_count', 'comments')
+
+# Ticket attributes a comment's search document needs (see comment_document)
+COMMENT_DOCUMENT_ATTRIBUTES = ('ticket_id', 'caller_id', 'created_at')
+
+# Attributes returned by GET /tickets?caller=...&view=summary
+SUMMARY_ATTRIBUTES = ('ticket_id', 'status', 'created_at', 'updated_at')
+
+# Ticket attributes selectable with GET /tickets/{id}?fields= (the Ticket
+# schema in specs/mock-itsm-api-openapi.yaml) and named field presets
+TICKET_FIELDS = (
+    'ticket_id', 'caller_id', 'issue_description', 'status', 'created_at',
+    'updated_at', 'comment_count', 'version', 'comments', 'archived_at'
+)
+FIELD_PRESETS = {
+    'compact': ('ticket_id', 'status', 'updated_at')
+}
+
+# Allowed status changes for PATCH /tickets/{id}; closed is final
+STATUS_TRANSITIONS = {
+    'open': ('in_progress', 'resolved', 'closed'),
+    'in_progress': ('open', 'resolved', 'closed'),
+    'resolved': ('open', 'closed'),
+    'closed': ()
+}
+
+# Tickets created with an Idempotency-Key get a ticket_id derived from
+# (caller_id, key), so a retried create maps onto the same item
+IDEMPOTENCY_NAMESPACE = uuid.UUID('6f1c2b9e-3d4a-5e8f-9a7b-0c1d2e3f4a5b')
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+REPLAY_HEADERS = dict(JSON_HEADERS, **{'Idempotent-Replayed': 'true'})
+# All a replay reads back: enough to compare the request and rebuild the 201 body
+REPLAY_ATTRIBUTES = ('ticket_id', 'issue_description', 'created_at')
 
 def lambda_handler(event, context):
     """
-    Main Lambda handler for Mock ITSM API operations.
-    Handles: POST /tickets, GET /tickets/{id}, POST /tickets/{id}/comments, GET /tickets
+    Main Lambda handler for Mock ITSM API operations, behind an API Gateway
+    REST API, an HTTP API (payload v2) or a Lambda Function URL.
+    Handles: POST /tickets, GET /tickets/{id}, POST /tickets/{id}/comments, GET /tickets,
+    POST /tickets/batch, POST /tickets/lookup, GET /tickets/{id}/comments,
+    PATCH /tickets/{id}, GET /tickets/search, GET /callers/{caller_id}/context, POST /batch
     """
+    if is_warmup_event(event):
+        return warm_up()
+    
+    event = request_event(event)
+    retry.start_deadline(context)
+    metrics.start_invocation(route_name(event), context)
+    response = None
     try:
-        http_method = event.get('httpMethod', '')
-        path = event.get('path', '')
-        path_parameters = event.get('pathParameters') or {}
-        query_parameters = event.get('queryStringParameters') or {}
-        body = event.get('body', '{}')
+        response = route_request(event)
+        return response
+    finally:
+        metrics.finish_invocation(response['statusCode'] if response else 500)
+
+
+def request_event(event):
+    """
+    REST API proxy (payload v1) view of an API Gateway or Function URL event,
+    with the resource template and pathParameters of the route its path
+    matches. Function URLs and catch-all routes carry neither.
+    """
+    event = normalize_event(event)
+    match = routes.match(event.get('path') or '')
+    if match is None:
+        return event
+    resource, path_parameters = match
+    # pathParameters API Gateway already decoded win over the ones parsed here
+    path_parameters = dict(path_parameters or {}, **(event.get('pathParameters') or {}))
+    return dict(event, resource=resource, pathParameters=path_parameters or None)
+
+
+def route_request(event):
+    """
+    Parse the request body and dispatch to the matching operation.
+    """
+    try:
+        try:
+            body = decode_body(event)
+        except ValueError:
+            return error_response(400, "Invalid base64 request body")
         
         # Parse body if present
         if body:
             try:
-                body_data = json.loads(body)
+                with metrics.span('ParseTime'):
+                    body_data = json.loads(body)
             except json.JSONDecodeError:
                 return error_response(400, "Invalid JSON in request body")
         else:
             body_data = {}
         
-        # Route to appropriate handler
-        if http_method == 'POST' and path == '/tickets':
-            return create_ticket(body_data)
-        elif http_method == 'GET' and path.startswith('/tickets/'):
-            ticket_id = path_parameters.get('id')
-            if not ticket_id:
-                return error_response(400, "Missing ticket ID")
-            return get_ticket_status(ticket_id)
-        elif http_method == 'POST' and path.startswith('/tickets/') and path.endswith('/comments'):
-            ticket_id = path_parameters.get('id')
-            if not ticket_id:
-                return error_response(400, "Missing ticket ID")
-            return add_ticket_comment(ticket_id, body_data)
-        elif http_method == 'GET' and path == '/tickets':
-            caller_id = query_parameters.get('caller')
-            if not caller_id:
-                return error_response(400, "Missing caller query parameter")
-            return list_recent_tickets(caller_id)
-        else:
+        return dispatch(event, body_data)
+    except Exception as e:
+        print(f"Unexpected error: {str(e)}")
+        return error_response(500, "Internal server error")
+
+
+def dispatch(event, body_data):
+    """
+    Apply rate limits, then run the operation registered for the request's
+    method and resource: 404 for unknown resources, 405 with Allow for
+    unknown methods.
+    """
+    try:
+        methods = routes.methods(event.get('resource'))
+        route = methods.get(event.get('httpMethod', ''))
+        if route is None:
+            if methods:
+                return json_response(405, {'error': 'Method not allowed'}, headers=dict(
+                    JSON_HEADERS, Allow=', '.join(sorted(methods))
+                ))
             return error_response(404, "Endpoint not found")
+        
+        if route.rate_limited:
+            retry_after = rate_limiter.check(route_name(event), request_caller(event, body_data))
+            if retry_after is not None:
+                metrics.add('RateLimited')
+                return json_response(429, {'error': 'Rate limit exceeded'}, headers=dict(
+                    JSON_HEADERS, **{'Retry-After': str(max(1, math.ceil(retry_after)))}
+                ))
+        
+        return route.handler(event, body_data)
             
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
         return error_response(500, "Internal server error")
 
 
-def create_ticket(body_data):
+@routes.route('POST', '/tickets')
+def handle_create_ticket(event, body_data):
+    return create_ticket(body_data, idempotency_key=request_header(event, 'Idempotency-Key'))
+
+
+@routes.route('GET', '/tickets')
+def handle_list_recent_tickets(event, body_data):
+    query_parameters = event.get('queryStringParameters') or {}
+    caller_id = query_parameters.get('caller')
+    if not caller_id:
+        return error_response(400, "Missing caller query parameter")
+    return list_recent_tickets(
+        caller_id,
+        limit=query_parameters.get('limit'),
+        cursor=query_parameters.get('cursor'),
+        view=query_parameters.get('view'),
+        if_none_match=request_header(event, 'If-None-Match')
+    )
+
+
+@routes.route('POST', '/tickets/batch')
+def handle_create_tickets_batch(event, body_data):
+    return create_tickets_batch(body_data)
+
+
+@routes.route('POST', '/tickets/lookup')
+def handle_lookup_tickets(event, body_data):
+    return lookup_tickets(body_data)
+
+
+@routes.route('GET', '/tickets/search')
+def handle_search_tickets(event, body_data):
+    query_parameters = event.get('queryStringParameters') or {}
+    return search_tickets(
+        query_parameters.get('q'),
+        caller_id=query_parameters.get('caller'),
+        limit=query_parameters.get('limit')
+    )
+
+
+@routes.route('GET', '/tickets/{id}')
+def handle_get_ticket_status(event, body_data):
+    ticket_id = event['pathParameters']['id']
+    if not ticket_id:
+        return error_response(400, "Missing ticket ID")
+    query_parameters = event.get('queryStringParameters') or {}
+    return get_ticket_status(
+        ticket_id,
+        consistent=query_parameters.get('consistent', '').lower() == 'true',
+        fields=query_parameters.get('fields'),
+        if_none_match=request_header(event, 'If-None-Match')
+    )
+
+
+@routes.route('PATCH', '/tickets/{id}')
+def handle_update_ticket_status(event, body_data):
+    ticket_id = event['pathParameters']['id']
+    if not ticket_id:
+        return error_response(400, "Missing ticket ID")
+    return update_ticket_status(ticket_id, body_data)
+
+
+@routes.route('GET', '/tickets/{id}/comments')
+def handle_list_ticket_comments(event, body_data):
+    ticket_id = event['pathParameters']['id']
+    if not ticket_id:
+        return error_response(400, "Missing ticket ID")
+    query_parameters = event.get('queryStringParameters') or {}
+    return list_ticket_comments(
+        ticket_id,
+        limit=query_parameters.get('limit'),
+        cursor=query_parameters.get('cursor')
+    )
+
+
+@routes.route('POST', '/tickets/{id}/comments')
+def handle_add_ticket_comment(event, body_data):
+    ticket_id = event['pathParameters']['id']
+    if not ticket_id:
+        return error_response(400, "Missing ticket ID")
+    return add_ticket_comment(ticket_id, body_data)
+
+
+@routes.route('GET', '/callers/{caller_id}/context')
+def handle_get_caller_context(event, body_data):
+    caller_id = event['pathParameters']['caller_id']
+    if not caller_id:
+        return error_response(400, "Missing caller ID")
+    query_parameters = event.get('queryStringParameters') or {}
+    return get_caller_context(
+        caller_id,
+        limit=query_parameters.get('limit'),
+        max_bytes=query_parameters.get('max_bytes')
+    )
+
+
+# Each operation is rate limited on its own as it is dispatched
+@routes.route('POST', '/batch', rate_limited=False)
+def execute_operations(event, body_data):
+    """
+    Run several API operations from one request, concurrently.
+    Expected input: {"operations": [{"id": "string" (optional), "method": "GET",
+    "path": "/tickets/{id}", "query": {...} (optional), "headers": {...}
+    (optional), "body": {...} (optional)}, ...]}
+    Operations are independent: they run in no particular order and each
+    gets its own status. The response lists results in request order.
+    """
+    operations = body_data.get('operations') if isinstance(body_data, dict) else None
+    if not isinstance(operations, list) or not 1 <= len(operations) <= BATCH_MAX_OPERATIONS:
+        return error_response(400, f"operations must be a list of 1 to {BATCH_MAX_OPERATIONS} operations")
+    
+    metrics.add('BatchOperations', len(operations))
+    calls = [operation_call(event, operation) for operation in operations]
+    responses = run_concurrently(run_operation, calls, 'batch', BATCH_CONCURRENCY)
+    
+    # Operation bodies are already encoded JSON: splice them in as they are
+    # instead of decoding and encoding them again
+    with metrics.span('SerializeTime'):
+        results = []
+        for index, (operation, response) in enumerate(zip(operations, responses)):
+            result = {
+                'id': operation.get('id', str(index)) if isinstance(operation, dict) else str(index),
+                'status': response['statusCode']
+            }
+            headers = {name: value for name, value in (response.get('headers') or {}).items()
+                       if name != 'Content-Type'}
+            if headers:
+                result['headers'] = headers
+            results.append(f"{encode(result)[:-1]},\"body\":{response['body'] or 'null'}}}")
+        body = '{"results":[' + ','.join(results) + ']}'
+    return {'statusCode': 200, 'headers': JSON_HEADERS, 'body': body}
+
+
+def operation_call(event, operation):
+    """
+    (event, body_data) for one POST /batch operation, or an error response
+    if the operation is malformed. The event carries the batch request's
+    requestContext and X-Caller-Id so rate limits see the same caller.
+    """
+    if not isinstance(operation, dict) or not isinstance(operation.get('method'), str) \
+            or not isinstance(operation.get('path'), str):
+        return error_response(400, "Each operation needs a method and a path")
+    if not isinstance(operation.get('query') or {}, dict) or not isinstance(operation.get('headers') or {}, dict):
+        return error_response(400, "Operation query and headers must be objects")
+    url = urlsplit(operation['path'])
+    if url.path == '/batch':
+        return error_response(400, "POST /batch operations cannot be nested")
+    query = dict(parse_qsl(url.query, keep_blank_values=True))
+    for name, value in (operation.get('query') or {}).items():
+        query[name] = str(value).lower() if isinstance(value, bool) else str(value)
+    headers = {}
+    caller_id = request_header(event, 'X-Caller-Id')
+    if caller_id:
+        headers['X-Caller-Id'] = caller_id
+    headers.update(operation.get('headers') or {})
+    resource, path_parameters = match_resource(url.path)
+    return {
+        'httpMethod': operation['method'].upper(),
+        'path': url.path,
+        'resource': resource,
+        'pathParameters': path_parameters,
+        'queryStringParameters': query or None,
+        'headers': headers,
+        'requestContext': event.get('requestContext') or {}
+    }, operation.get('body') or {}
+
+
+def run_operation(call):
+    """
+    Response for an operation_call result: an (event, body_data) pair is
+    dispatched, an error response is returned as it is.
+    """
+    if isinstance(call, dict):
+        return call
+    return dispatch(*call)
+
+
+def run_concurrently(function, items, pool, max_workers):
+    """
+    [function(item) for item in items], on the named worker pool when there
+    is more than one item. Each call runs in a copy of this request's
+    context, so its DynamoDB calls keep the deadline and land on this
+    request's metrics.
+    """
+    if len(items) <= 1:
+        return [function(item) for item in items]
+    executor = _worker_pools.get(pool)
+    if executor is None:
+        with _worker_pools_lock:
+            executor = _worker_pools.get(pool)
+            if executor is None:
+                executor = _worker_pools[pool] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=pool)
+    futures = [executor.submit(contextvars.copy_context().run, function, item) for item in items]
+    return [future.result() for future in futures]
+
+
+def match_resource(path):
+    """
+    API Gateway resource template and pathParameters for path. Unknown
+    paths are passed through as their own resource with no parameters.
+    """
+    return routes.match(path) or (path, None)
+
+
+def create_ticket(body_data, idempotency_key=None):
     """
-    Create a new ticket in DynamoDB.
+    Create a new ticket in the ticket store.
     Expected input: {"caller_id": "string", "issue_description": "string"}
+    An Idempotency-Key header (or idempotency_key field) makes retries safe:
+    repeating the request returns the original 201 body without a second ticket.
     """
+    idempotency_key = body_data.get('idempotency_key') or idempotency_key
+    if idempotency_key is not None and (
+            not isinstance(idempotency_key, str) or not 1 <= len(idempotency_key) <= IDEMPOTENCY_KEY_MAX_LENGTH):
+        return error_response(400, f"Idempotency-Key must be 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+    
     # Validate input
+    ticket_item = new_ticket_item(body_data, idempotency_key=idempotency_key)
+    
+    if ticket_item is None:
+        return error_response(400, "Missing required fields: caller_id and issue_description")
+    
+    if idempotency_key:
+        # Replays in a warm container are answered without touching DynamoDB
+        existing = ticket_cache.get(ticket_item['ticket_id'])
+        if existing is not None:
+            return replay_created_ticket(ticket_item, existing)
+    
+    # Put item in the ticket store with retry
+    try:
+        retry_dynamodb_operation(lambda: store.put_ticket(ticket_item, only_if_new=bool(idempotency_key)))
+    except ClientError as e:
+        if idempotency_key and e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return replay_created_ticket(ticket_item)
+        print(f"Error creating ticket: {str(e)}")
+        return error_response(500, "Failed to create ticket")
+    except Exception as e:
+        print(f"Error creating ticket: {str(e)}")
+        return error_response(500, "Failed to create ticket")
+    
+    ticket_cache.put(ticket_item)
+    index_for_search([ticket_document(ticket_item)])
+    return json_response(201, created_body(ticket_item))
+
+
+def replay_created_ticket(ticket_item, existing=None):
+    """
+    Answer a repeated idempotent create with the original 201 body.
+    A reused key with a different request is rejected with 422.
+    """
+    if existing is None:
+        try:
+            existing = retry_dynamodb_operation(lambda: store.get_ticket(
+                ticket_item['ticket_id'], consistent=True, attributes=REPLAY_ATTRIBUTES
+            ))
+        except Exception as e:
+            print(f"Error reading idempotent ticket: {str(e)}")
+            return error_response(500, "Failed to create ticket")
+        if existing is None:
+            return error_response(500, "Failed to create ticket")
+    
+    if existing['issue_description'] != ticket_item['issue_description']:
+        return error_response(422, "Idempotency-Key was already used with a different request")
+    
+    metrics.add('IdempotentReplays')
+    return json_response(201, created_body(existing), headers=REPLAY_HEADERS)
+
+
+def created_body(ticket_item):
+    return {
+        'ticket_id': ticket_item['ticket_id'],
+        'status': 'open',
+        'created_at': ticket_item['created_at']
+    }
+
+
+def new_ticket_item(body_data, idempotency_key=None):
+    """
+    Build a new open ticket item from a create request.
+    Returns None if caller_id or issue_description is missing.
+    """
     caller_id = body_data.get('caller_id')
     issue_description = body_data.get('issue_description')
     
     if not caller_id or not issue_description:
-        return error_response(400, "Missing required fields: caller_id and issue_description")
+        return None
     
     # Generate ticket ID and timestamps
-    ticket_id = str(uuid.uuid4())
     timestamp = datetime.utcnow().isoformat() + 'Z'
+    if idempotency_key:
+        ticket_id = str(uuid.uuid5(IDEMPOTENCY_NAMESPACE, f'{caller_id}\n{idempotency_key}'))
+    else:
+        ticket_id = str(uuid.uuid4())
     
-    # Create ticket item
-    ticket_item = {
+    return {
         'ticket_id': ticket_id,
         'caller_id': caller_id,
         'issue_description': issue_description,
         'status': 'open',
         'created_at': timestamp,
         'updated_at': timestamp,
+        'comment_count': 0,
+        'version': 1,
         'comments': []
     }
+
+
+def create_tickets_batch(body_data):
+    """
+    Create many tickets with BatchWriteItem (25 items per request).
+    Expected input: {"tickets": [{"caller_id": "string", "issue_description": "string"}, ...]}
+    Returns one result per input ticket, in input order.
+    """
+    requests = body_data.get('tickets')
     
-    # Put item in DynamoDB with retry
-    try:
-        retry_dynamodb_operation(lambda: table.put_item(Item=ticket_item))
-        
-        return {
-            'statusCode': 201,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'ticket_id': ticket_id,
-                'status': 'open',
-                'created_at': timestamp
+    if not isinstance(requests, list) or not requests:
+        return error_response(400, "Missing required field: tickets")
+    if len(requests) > BATCH_MAX_ITEMS:
+        return error_response(400, f"Too many tickets: maximum is {BATCH_MAX_ITEMS}")
+    
+    results = []
+    ticket_items = []
+    for index, request in enumerate(requests):
+        ticket_item = new_ticket_item(request) if isinstance(request, dict) else None
+        if ticket_item is None:
+            results.append({
+                'index': index,
+                'status': 400,
+                'error': "Missing required fields: caller_id and issue_description"
             })
-        }
-    except Exception as e:
-        print(f"Error creating ticket: {str(e)}")
-        return error_response(500, "Failed to create ticket")
+        else:
+            ticket_items.append(ticket_item)
+            results.append({
+                'index': index,
+                'status': 201,
+                'ticket_id': ticket_item['ticket_id'],
+                'created_at': ticket_item['created_at']
+            })
+    
+    # Chunks written before an error stay reported as 201 with their ids,
+    # so a client retries only the tickets that failed
+    failed_ids = set()
+    for start in range(0, len(ticket_items), BATCH_WRITE_CHUNK):
+        chunk = ticket_items[start:start + BATCH_WRITE_CHUNK]
+        try:
+            unprocessed = retry_dynamodb_operation(lambda: store.put_tickets(chunk))
+        except Exception as e:
+            print(f"Error creating tickets: {str(e)}")
+            unprocessed = chunk
+        failed_ids.update(item['ticket_id'] for item in unprocessed)
+    
+    for ticket_item in ticket_items:
+        if ticket_item['ticket_id'] not in failed_ids:
+            ticket_cache.put(ticket_item)
+    index_for_search([ticket_document(item) for item in ticket_items if item['ticket_id'] not in failed_ids])
+    for result in results:
+        if result.get('ticket_id') in failed_ids:
+            result.update(status=500, error="Failed to create ticket")
+            del result['ticket_id'], result['created_at']
+    
+    return json_response(200, {'results': results})
 
 
-def get_ticket_status(ticket_id):
+def lookup_tickets(body_data):
     """
-    Retrieve ticket by ID from DynamoDB.
+    Retrieve many tickets by ID with BatchGetItem (100 keys per request).
+    Expected input: {"ticket_ids": ["string", ...]}
+    Returns one result per requested ID, in request order.
     """
+    ticket_ids = body_data.get('ticket_ids')
+    
+    if not isinstance(ticket_ids, list) or not ticket_ids or not all(isinstance(i, str) and i for i in ticket_ids):
+        return error_response(400, "Missing required field: ticket_ids")
+    if len(ticket_ids) > BATCH_MAX_ITEMS:
+        return error_response(400, f"Too many ticket_ids: maximum is {BATCH_MAX_ITEMS}")
+    
+    # Lookup results carry comment_count only; comments are paged separately
+    found = {}
+    for ticket_id in ticket_ids:
+        ticket = ticket_cache.get(ticket_id)
+        if ticket is not None:
+            found[ticket_id] = {name: value for name, value in ticket.items() if name != 'comments'}
+    missing = [ticket_id for ticket_id in ticket_ids if ticket_id not in found]
+    
+    unprocessed = []
+    if missing:
+        try:
+            fetched, unprocessed = retry_dynamodb_operation(lambda: store.get_tickets(missing))
+        except Exception as e:
+            print(f"Error looking up tickets: {str(e)}")
+            return error_response(500, "Failed to retrieve tickets")
+        found.update(fetched)
+    
+    unprocessed = set(unprocessed)
+    results = []
+    for ticket_id in ticket_ids:
+        if ticket_id in found:
+            results.append({'ticket_id': ticket_id, 'status': 200, 'ticket': found[ticket_id]})
+        elif ticket_id in unprocessed:
+            results.append({'ticket_id': ticket_id, 'status': 500, 'error': "Failed to retrieve ticket"})
+        else:
+            results.append({'ticket_id': ticket_id, 'status': 404, 'error': f"Ticket {ticket_id} not found"})
+    
+    return json_response(200, {'results': results})
+
+
+def get_ticket_status(ticket_id, consistent=False, fields=None, if_none_match=None):
+    """
+    Retrieve ticket by ID, serving from the ticket cache when possible.
+    consistent bypasses the cache and uses a strongly-consistent read.
+    fields: a preset name (compact) or comma-separated Ticket attributes;
+    only those are read and returned (ticket_id always is). Empty or
+    "full" returns the whole ticket.
+    if_none_match: If-None-Match header; a matching ETag returns 304
+    """
+    attributes = None
+    if fields and fields != 'full':
+        attributes = parse_fields(fields)
+        if attributes is None:
+            return error_response(400, f"fields must be {', '.join(FIELD_PRESETS)}, full or a comma-separated "
+                                       f"list of: {', '.join(TICKET_FIELDS)}")
     try:
-        response = retry_dynamodb_operation(lambda: table.get_item(Key={'ticket_id': ticket_id}))
-        
-        if 'Item' not in response:
-            return error_response(404, f"Ticket {ticket_id} not found")
-        
-        ticket = response['Item']
+        ticket = None if consistent else ticket_cache.get(ticket_id)
+        if ticket is None and if_none_match:
+            # Validator-only read first: an unchanged ticket costs one small
+            # GetItem, with no comments query and nothing to encode
+            current = retry_dynamodb_operation(lambda: store.get_ticket(
+                ticket_id, consistent=consistent, attributes=etags.VALIDATOR_ATTRIBUTES
+            ))
+            if current is None:
+                ticket = archived_ticket(ticket_id)
+                if ticket is None:
+                    return error_response(404, f"Ticket {ticket_id} not found")
+                current = ticket
+            etag = etags.ticket_etag(current, attributes)
+            if etags.matches(if_none_match, etag):
+                return not_modified_response(etag)
+        if ticket is None:
+            read_attributes = attributes and tuple(dict.fromkeys((*attributes, *etags.VALIDATOR_ATTRIBUTES)))
+            ticket = retry_dynamodb_operation(
+                lambda: store.get_ticket(ticket_id, consistent=consistent, attributes=read_attributes)
+            )
+            
+            if ticket is None:
+                ticket = archived_ticket(ticket_id)
+                if ticket is None:
+                    return error_response(404, f"Ticket {ticket_id} not found")
+            # Projected reads are partial tickets and are never cached
+            elif attributes is None:
+                ticket_cache.put(ticket)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps(ticket, default=str)
-        }
+        etag = etags.ticket_etag(ticket, attributes)
+        if etags.matches(if_none_match, etag):
+            return not_modified_response(etag)
+        if attributes:
+            ticket = {name: ticket[name] for name in attributes if name in ticket}
+        return json_response(200, ticket, headers=dict(JSON_HEADERS, ETag=etag))
     except Exception as e:
         print(f"Error retrieving ticket: {str(e)}")
         return error_response(500, "Failed to retrieve ticket")
 
 
+def archived_ticket(ticket_id):
+    """
+    The ticket from the archive (with archived_at), or None when it was
+    never archived or TICKET_ARCHIVE_READS is off.
+    """
+    if not TICKET_ARCHIVE_READS:
+        return None
+    ticket = archive_cache.get(ticket_id)
+    if ticket is None:
+        with metrics.span('ArchiveReadTime'):
+            ticket = retry_dynamodb_operation(lambda: ticket_archive.get_ticket(ticket_id))
+        if ticket is None:
+            return None
+        archive_cache.put(ticket)
+    metrics.add('ArchiveHits')
+    return ticket
+
+
+def parse_fields(fields):
+    """
+    Attribute tuple for a fields= value, with ticket_id first, or None if
+    it names anything outside FIELD_PRESETS and TICKET_FIELDS.
+    """
+    if fields in FIELD_PRESETS:
+        return FIELD_PRESETS[fields]
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    if not names or any(name not in TICKET_FIELDS for name in names):
+        return None
+    return tuple(dict.fromkeys(['ticket_id', *names]))
+
+
 def add_ticket_comment(ticket_id, body_data):
     """
     Add a comment to an existing ticket.
@@ -143,27 +741,21 @@ def add_ticket_comment(ticket_id, body_data):
         'added_at': timestamp
     }
     
+    # One token for every retry of this comment, so it is stored and counted once
+    request_token = uuid.uuid4().hex
+    # Taken before the write invalidates it; its caller_id and created_at never change
+    cached = ticket_cache.get(ticket_id) if SEARCH_INDEX_UPDATES == 'inline' else None
+    
     try:
         # Update ticket with new comment
-        response = retry_dynamodb_operation(lambda: table.update_item(
-            Key={'ticket_id': ticket_id},
-            UpdateExpression='SET comments = list_append(if_not_exists(comments, :empty_list), :comment), updated_at = :timestamp',
-            ExpressionAttributeValues={
-                ':comment': [comment],
-                ':timestamp': timestamp,
-                ':empty_list': []
-            },
-            ReturnValues='UPDATED_NEW'
-        ))
+        retry_dynamodb_operation(lambda: store.append_comment(ticket_id, comment, timestamp, request_token))
+        ticket_cache.invalidate(ticket_id)
+        index_comment(ticket_id, comment, cached)
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({
-                'success': True,
-                'updated_at': timestamp
-            })
-        }
+        return json_response(200, {
+            'success': True,
+            'updated_at': timestamp
+        })
     except ClientError as e:
         if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
             return error_response(404, f"Ticket {ticket_id} not found")
@@ -174,60 +766,473 @@ def add_ticket_comment(ticket_id, body_data):
         return error_response(500, "Failed to add comment")
 
 
-def list_recent_tickets(caller_id):
+def search_tickets(query, caller_id=None, limit=None):
     """
-    List recent tickets for a caller using GSI.
+    Keyword search over ticket descriptions and comments, best match first.
+    query: words to match (any word matches; rarer words weigh more)
+    caller_id: only this caller's tickets
+    limit: number of results (default 10, max 50)
     """
+    if not query or not tokenize(query):
+        return error_response(400, "Missing search query parameter q")
     try:
-        response = retry_dynamodb_operation(lambda: table.query(
-            IndexName='CallerIdIndex',
-            KeyConditionExpression='caller_id = :caller_id',
-            ExpressionAttributeValues={
-                ':caller_id': caller_id
-            },
-            ScanIndexForward=False,  # Sort by created_at descending
-            Limit=10  # Limit to 10 most recent tickets
+        limit = int(limit) if limit is not None else SEARCH_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return error_response(400, f"limit must be an integer between 1 and {SEARCH_MAX_LIMIT}")
+    
+    try:
+        with metrics.span('SearchTime'):
+            matches = retry_dynamodb_operation(lambda: search_index.search(query, caller_id=caller_id, limit=limit))
+        found, unprocessed = {}, []
+        if matches:
+            found, unprocessed = retry_dynamodb_operation(
+                lambda: store.get_tickets([m['ticket_id'] for m in matches])
+            )
+        if unprocessed:
+            # The store has already resent them with backoff; give them one more round
+            pending = unprocessed
+            retried, unprocessed = retry_dynamodb_operation(lambda: store.get_tickets(pending))
+            found.update(retried)
+    except Exception as e:
+        print(f"Error searching tickets: {str(e)}")
+        return error_response(500, "Failed to search tickets")
+    
+    # Postings can outlive archived tickets; only return tickets that exist.
+    # Matches that could not be read are listed as unavailable, not dropped.
+    unprocessed = set(unprocessed)
+    results = []
+    unavailable = []
+    for match in matches:
+        ticket = found.get(match['ticket_id'])
+        if ticket is not None:
+            result = {name: ticket[name] for name in SUMMARY_ATTRIBUTES if name in ticket}
+            result.update(caller_id=ticket['caller_id'], score=match['score'])
+            results.append(result)
+        elif match['ticket_id'] in unprocessed:
+            unavailable.append(match['ticket_id'])
+    
+    body = {'query': query, 'results': results}
+    if unavailable:
+        print(f"Search results incomplete: {len(unavailable)} tickets could not be read")
+        body['unavailable'] = unavailable
+    return json_response(200, body)
+
+
+def ticket_document(ticket):
+    """
+    Search index document for a ticket's description.
+    """
+    return (ticket['ticket_id'], ticket['caller_id'], ticket['created_at'], 'd', ticket['issue_description'])
+
+
+def index_comment(ticket_id, comment, ticket=None):
+    """
+    Index a new comment when SEARCH_INDEX_UPDATES=inline. The comment write
+    returns nothing, so without a (cached) ticket its caller_id and
+    created_at are read back; neither ever changes, so an eventually
+    consistent read is enough.
+    """
+    if SEARCH_INDEX_UPDATES != 'inline':
+        return
+    try:
+        if ticket is None:
+            ticket = retry_dynamodb_operation(
+                lambda: store.get_ticket(ticket_id, attributes=COMMENT_DOCUMENT_ATTRIBUTES))
+    except Exception as e:
+        print(f"Error indexing tickets for search: {str(e)}")
+        metrics.add('SearchIndexErrors')
+        return
+    if ticket:
+        index_for_search([comment_document(ticket, comment)])
+
+
+def comment_document(ticket, comment):
+    return (ticket['ticket_id'], ticket['caller_id'], ticket['created_at'], f"c{comment['added_at']}",
+            comment['comment_text'])
+
+
+def index_for_search(documents):
+    """
+    Add documents to the search index when SEARCH_INDEX_UPDATES=inline.
+    Indexing failures are logged and counted but never fail the request.
+    """
+    if SEARCH_INDEX_UPDATES != 'inline' or not documents:
+        return
+    try:
+        with metrics.span('SearchIndexTime'):
+            unprocessed = retry_dynamodb_operation(lambda: search_index.index_documents(documents))
+        if unprocessed:
+            metrics.add('SearchIndexErrors', len(unprocessed))
+    except Exception as e:
+        print(f"Error indexing tickets for search: {str(e)}")
+        metrics.add('SearchIndexErrors')
+
+
+def update_ticket_status(ticket_id, body_data):
+    """
+    Change a ticket's status in one conditional write.
+    Expected input: {"status": "string", "version": integer (optional)}
+    version, when given, must match the ticket's current version (optimistic
+    concurrency); the transition must be allowed by STATUS_TRANSITIONS.
+    """
+    status = body_data.get('status')
+    if status not in STATUS_TRANSITIONS:
+        return error_response(400, f"status must be one of: {', '.join(STATUS_TRANSITIONS)}")
+    
+    expected_version = body_data.get('version')
+    if expected_version is not None and (
+            isinstance(expected_version, bool) or not isinstance(expected_version, int) or expected_version < 0):
+        return error_response(400, "version must be a non-negative integer")
+    
+    allowed_from = [previous for previous, targets in STATUS_TRANSITIONS.items() if status in targets]
+    timestamp = datetime.utcnow().isoformat() + 'Z'
+    
+    try:
+        ticket = retry_dynamodb_operation(lambda: store.update_status(
+            ticket_id, status, allowed_from, timestamp, expected_version=expected_version,
+            expires_at=expiry_for(status)
+        ))
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            print(f"Error updating ticket status: {str(e)}")
+            return error_response(500, "Failed to update ticket")
+        return status_conflict(ticket_id, status, expected_version, e.response.get('Item'))
+    except Exception as e:
+        print(f"Error updating ticket status: {str(e)}")
+        return error_response(500, "Failed to update ticket")
+    
+    ticket_cache.invalidate(ticket_id)
+    return json_response(200, {
+        'ticket_id': ticket_id,
+        'status': ticket['status'],
+        'version': ticket['version'],
+        'updated_at': ticket['updated_at']
+    })
+
+
+def status_conflict(ticket_id, status, expected_version, current):
+    """
+    Map a failed status update to 404 or 409 using the current ticket
+    returned with the failed condition check.
+    """
+    if current is None:
+        return error_response(404, f"Ticket {ticket_id} not found")
+    
+    current_version = current.get('version', 0)
+    if expected_version is None and current['status'] == status:
+        # Already in the requested state (e.g. a retried PATCH): nothing to do
+        return json_response(200, {
+            'ticket_id': ticket_id,
+            'status': status,
+            'version': current_version,
+            'updated_at': current['updated_at']
+        })
+    if expected_version is not None and current_version != expected_version:
+        message = f"Version conflict: ticket {ticket_id} is at version {current_version}"
+    else:
+        message = f"Cannot change status from {current['status']} to {status}"
+    return json_response(409, {
+        'error': message,
+        'status': current['status'],
+        'version': current_version
+    })
+
+
+def list_ticket_comments(ticket_id, limit=None, cursor=None):
+    """
+    Page through a ticket's full comment history, oldest first.
+    limit: page size (default 10, max 100)
+    cursor: opaque next_cursor from a previous page
+    """
+    try:
+        limit = int(limit) if limit is not None else LIST_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= LIST_MAX_LIMIT:
+        return error_response(400, f"limit must be an integer between 1 and {LIST_MAX_LIMIT}")
+    
+    start_key = None
+    if cursor:
+        try:
+            start_key = decode_cursor(cursor, ticket_id)
+        except ValueError as e:
+            return error_response(400, f"Invalid cursor: {str(e)}")
+    
+    try:
+        comments, last_key = retry_dynamodb_operation(lambda: store.query_comments(
+            ticket_id, limit=limit, start_key=start_key
         ))
         
-        tickets = response.get('Items', [])
+        # An empty first page is ambiguous: confirm the ticket exists
+        if not comments and not start_key:
+            if retry_dynamodb_operation(lambda: store.get_ticket(ticket_id)) is None:
+                return error_response(404, f"Ticket {ticket_id} not found")
+        
+        return json_response(200, {
+            'comments': comments,
+            'next_cursor': encode_cursor(last_key, ticket_id) if last_key else None
+        })
+    except Exception as e:
+        print(f"Error listing comments: {str(e)}")
+        return error_response(500, "Failed to list comments")
+
+
+def list_recent_tickets(caller_id, limit=None, cursor=None, view=None, if_none_match=None):
+    """
+    List recent tickets for a caller, newest first. The first page in
+    summary view comes from the caller summary (one GetItem) when it holds
+    enough tickets; otherwise, and for later pages, from the GSI.
+    limit: page size (default 10, max 100)
+    cursor: opaque next_cursor from a previous page
+    view: "summary" returns only ticket_id, status, created_at and updated_at
+    if_none_match: If-None-Match header; a matching ETag returns 304
+    """
+    try:
+        limit = int(limit) if limit is not None else LIST_DEFAULT_LIMIT
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= LIST_MAX_LIMIT:
+        return error_response(400, f"limit must be an integer between 1 and {LIST_MAX_LIMIT}")
+    
+    if view not in (None, 'full', 'summary'):
+        return error_response(400, "view must be 'full' or 'summary'")
+    attributes = SUMMARY_ATTRIBUTES if view == 'summary' else None
+    
+    start_key = None
+    if cursor:
+        try:
+            start_key = decode_cursor(cursor, caller_id)
+        except ValueError as e:
+            return error_response(400, f"Invalid cursor: {str(e)}")
+    
+    try:
+        page = summary_page(caller_id, limit) if CALLER_SUMMARY_READS and attributes and not start_key else None
+        if page is not None:
+            tickets, last_key = page
+        else:
+            if if_none_match and attributes is None:
+                # Validator-only query before reading the full page
+                current, _ = retry_dynamodb_operation(lambda: store.query_by_caller(
+                    caller_id, limit=limit, start_key=start_key, attributes=etags.VALIDATOR_ATTRIBUTES
+                ))
+                etag = etags.page_etag(current, view)
+                if etags.matches(if_none_match, etag):
+                    return not_modified_response(etag)
+            tickets, last_key = retry_dynamodb_operation(lambda: store.query_by_caller(
+                caller_id, limit=limit, start_key=start_key, attributes=attributes
+            ))
         
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'tickets': tickets}, default=str)
-        }
+        etag = etags.page_etag(tickets, view)
+        if etags.matches(if_none_match, etag):
+            return not_modified_response(etag)
+        return json_response(200, {
+            'tickets': tickets,
+            'next_cursor': encode_cursor(last_key, caller_id) if last_key else None
+        }, headers=dict(JSON_HEADERS, ETag=etag))
     except Exception as e:
         print(f"Error listing tickets: {str(e)}")
         return error_response(500, "Failed to list tickets")
 
 
-def retry_dynamodb_operation(operation, max_attempts=3):
+def summary_page(caller_id, limit):
     """
-    Retry DynamoDB operation with exponential backoff.
+    First page of the caller's tickets from their summary item as
+    (tickets, last_key), or None to fall back to the GSI. Summary read
+    failures are logged and fall back rather than failing the request.
     """
-    for attempt in range(max_attempts):
-        try:
-            return operation()
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            if error_code in ['ProvisionedThroughputExceededException', 'ThrottlingException']:
-                if attempt < max_attempts - 1:
-                    wait_time = (2 ** attempt) * 0.1  # Exponential backoff: 0.1s, 0.2s, 0.4s
-                    print(f"Throttled, retrying in {wait_time}s (attempt {attempt + 1}/{max_attempts})")
-                    time.sleep(wait_time)
-                else:
-                    raise
-            else:
-                raise
-    raise Exception("Max retry attempts reached")
+    try:
+        summary = retry_dynamodb_operation(lambda: caller_summaries.get(caller_id))
+    except Exception as e:
+        print(f"Error reading caller summary: {str(e)}")
+        summary = None
+    page = caller_summary.recent_page(summary, limit) if summary else None
+    metrics.add('CallerSummaryHits' if page is not None else 'CallerSummaryMisses')
+    return page
+
+
+def get_caller_context(caller_id, limit=None, max_bytes=None):
+    """
+    The caller's newest tickets with their recent comments, as one compact
+    document for the start of a call. The ticket ids come from the caller
+    summary or one CallerIdIndex query; the tickets are then read
+    concurrently through the ticket cache.
+    limit: tickets to include (default 5, max 20)
+    max_bytes: budget for the response body; the oldest comments are
+    dropped first, then the oldest tickets (default CALLER_CONTEXT_MAX_BYTES)
+    """
+    try:
+        limit = int(limit) if limit is not None else CONTEXT_DEFAULT_TICKETS
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= CONTEXT_MAX_TICKETS:
+        return error_response(400, f"limit must be an integer between 1 and {CONTEXT_MAX_TICKETS}")
+    try:
+        max_bytes = int(max_bytes) if max_bytes is not None else CONTEXT_MAX_BYTES
+    except ValueError:
+        max_bytes = 0
+    if not CONTEXT_BYTES_RANGE[0] <= max_bytes <= CONTEXT_BYTES_RANGE[1]:
+        return error_response(400, "max_bytes must be an integer between {} and {}".format(*CONTEXT_BYTES_RANGE))
+    
+    try:
+        page = summary_page(caller_id, limit) if CALLER_SUMMARY_READS else None
+        if page is None:
+            page = retry_dynamodb_operation(lambda: store.query_by_caller(
+                caller_id, limit=limit, attributes=SUMMARY_ATTRIBUTES
+            ))
+        listed, last_key = page
+        tickets = run_concurrently(context_ticket, [t['ticket_id'] for t in listed], 'context', CONTEXT_CONCURRENCY)
+    except Exception as e:
+        print(f"Error reading caller context: {str(e)}")
+        return error_response(500, "Failed to read caller context")
+    
+    document = {
+        'caller_id': caller_id,
+        'tickets': [ticket for ticket in tickets if ticket is not None],
+        'more_tickets': last_key is not None,
+        'omitted_comments': 0,
+        'omitted_tickets': 0
+    }
+    with metrics.span('SerializeTime'):
+        body = fit_context(document, max_bytes)
+    if document['omitted_comments'] or document['omitted_tickets']:
+        metrics.add('ContextTrimmed')
+    return {'statusCode': 200, 'headers': JSON_HEADERS, 'body': body}
+
+
+def context_ticket(ticket_id):
+    """
+    CONTEXT_ATTRIBUTES of a ticket, read through the ticket cache, or None
+    if it has left the table since it was listed.
+    """
+    ticket = ticket_cache.get(ticket_id)
+    if ticket is None:
+        ticket = retry_dynamodb_operation(lambda: store.get_ticket(ticket_id))
+        if ticket is None:
+            return None
+        ticket_cache.put(ticket)
+    return {name: ticket[name] for name in CONTEXT_ATTRIBUTES if name in ticket}
+
+
+def fit_context(document, max_bytes):
+    """
+    Encode a caller context within max_bytes (of UTF-8). Comments are
+    dropped oldest first across all tickets, then whole tickets oldest
+    first; the newest ticket is always kept. Counts of what was dropped are
+    kept in the document's omitted_comments and omitted_tickets.
+    """
+    tickets = document['tickets']
+    body = encode(document)
+    # Sizes are UTF-8 bytes: orjson writes non-ASCII text unescaped
+    size = len(body.encode('utf-8'))
+    while size > max_bytes:
+        excess = size - max_bytes
+        # (added_at, ticket, position, encoded size with its separator)
+        comments = sorted(
+            (comment['added_at'], index, position, len(encode(comment).encode('utf-8')) + 1)
+            for index, ticket in enumerate(tickets)
+            for position, comment in enumerate(ticket.get('comments') or [])
+        )
+        if comments:
+            dropped = [0] * len(tickets)
+            for _, index, position, comment_size in comments:
+                if excess <= 0:
+                    break
+                dropped[index] = position + 1
+                excess -= comment_size
+            for index, ticket in enumerate(tickets):
+                if dropped[index]:
+                    ticket['comments'] = ticket['comments'][dropped[index]:]
+            document['omitted_comments'] += sum(dropped)
+        elif len(tickets) > 1:
+            tickets.pop()
+            document['omitted_tickets'] += 1
+        else:
+            break
+        body = encode(document)
+        size = len(body.encode('utf-8'))
+    return body
+
+
+def is_warmup_event(event):
+    """
+    Recognise scheduled warm-up pings (EventBridge schedule or {"warmup": true}).
+    """
+    if event.get('warmup'):
+        return True
+    return event.get('source') == 'aws.events' and event.get('detail-type') == 'Scheduled Event'
+
+
+def warm_up():
+    """
+    Pre-open the ticket store connection pool and TLS session, then return.
+    """
+    try:
+        store.warm()
+    except Exception as e:
+        print(f"Warm-up failed: {str(e)}")
+    return json_response(200, {'warmed': True})
+
+
+def route_name(event):
+    """
+    Metrics route label such as "GET /tickets/{id}": the matched resource
+    template, so ticket IDs never become dimensions. Paths no route matches
+    all share "{method} <unmatched>", so probes of random paths cannot
+    create new CloudWatch metrics.
+    """
+    resource = event.get('resource')
+    if not routes.methods(resource):
+        resource = UNMATCHED_RESOURCE
+    return f"{event.get('httpMethod', '')} {resource}"
+
+
+def retry_dynamodb_operation(operation, max_attempts=None):
+    """
+    Retry DynamoDB operation with full-jitter exponential backoff, bounded by
+    the container retry budget and this invocation's deadline.
+    """
+    return retry_policy.call(operation, max_attempts=max_attempts, on_retry=log_retry)
+
+
+def log_retry(attempt, error, delay):
+    # Connection errors carry response=None
+    code = (getattr(error, 'response', None) or {}).get('Error', {}).get('Code', type(error).__name__)
+    metrics.add('Retries')
+    metrics.add('RetryDelay', delay * 1000, 'Milliseconds')
+    print(f"{code}, retrying in {delay:.3f}s (attempt {attempt + 1}/{retry_policy.max_attempts})")
+
+
+def request_caller(event, body_data):
+    """
+    Caller a request is rate limited as: the X-Caller-Id header, else the
+    caller query parameter, caller_id path parameter or body caller_id,
+    else the API key or source IP.
+    """
+    caller_id = request_header(event, 'X-Caller-Id') or (event.get('queryStringParameters') or {}).get('caller') \
+        or (event.get('pathParameters') or {}).get('caller_id')
+    if not caller_id and isinstance(body_data, dict) and isinstance(body_data.get('caller_id'), str):
+        caller_id = body_data['caller_id']
+    if caller_id:
+        return caller_id
+    identity = (event.get('requestContext') or {}).get('identity') or {}
+    return identity.get('apiKey') or identity.get('sourceIp') or 'anonymous'
+
+
+def request_header(event, name):
+    """
+    Case-insensitive request header lookup.
+    """
+    name = name.lower()
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+    return None
 
 
 def error_response(status_code, message):
     """
     Generate standardized error response.
     """
-    return {
-        'statusCode': status_code,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'error': message})
-    }
+    return json_response(status_code, {'error': message})
@@ -0,0 +1,111 @@
+import os
+import threading
+
+from botocore.exceptions import ClientError
+
+
+def create_object_store(backend=None):
+    """
+    Create the archive object store selected by ARCHIVE_OBJECT_STORE.
+    Supported backends: s3 (default), local, memory.
+    """
+    backend = (backend or os.environ.get('ARCHIVE_OBJECT_STORE', 's3')).lower()
+    if backend == 's3':
+        return S3ObjectStore()
+    if backend == 'local':
+        return LocalObjectStore()
+    if backend == 'memory':
+        return MemoryObjectStore()
+    raise ValueError(f"Unknown object store backend: {backend}")
+
+
+class ObjectStore:
+    """
+    Write-once blobs addressed by key, for archived ticket batches.
+    """
+
+    def put(self, key, data):
+        """
+        Store data (bytes) under key, replacing any existing object.
+        """
+        raise NotImplementedError
+
+    def get(self, key):
+        """
+        Return the bytes stored under key, or None if there is no such object.
+        """
+        raise NotImplementedError
+
+
+class S3ObjectStore(ObjectStore):
+    """
+    Objects in the ARCHIVE_BUCKET S3 bucket under ARCHIVE_PREFIX.
+    """
+
+    def __init__(self, bucket=None, prefix=None, region=None, client=None):
+        self.bucket = bucket or os.environ.get('ARCHIVE_BUCKET', 'poc-itsm-ticket-archive')
+        self.prefix = os.environ.get('ARCHIVE_PREFIX', 'tickets/') if prefix is None else prefix
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        self._client = client
+
+    @property
+    def client(self):
+        # Created on first use: most invocations never touch the archive
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('s3', region_name=self.region)
+        return self._client
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                return None
+            raise
+        return response['Body'].read()
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Objects as files under the ARCHIVE_DIR directory, for local runs.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.environ.get('ARCHIVE_DIR', 'archive')
+
+    def put(self, key, data):
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+        os.replace(temporary, path)
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.root, key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class MemoryObjectStore(ObjectStore):
+    """
+    In-process objects for tests and load tests.
+    """
+
+    def __init__(self):
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, data):
+        with self._lock:
+            self._objects[key] = bytes(data)
+
+    def get(self, key):
+        with self._lock:
+            return self._objects.get(key)
@@ -0,0 +1,92 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+
+# Cursors are HMAC-signed so clients cannot forge ExclusiveStartKey values.
+# Every container must sign with the same key: CURSOR_SECRET, or the
+# Secrets Manager secret CURSOR_SECRET_ID. The key is resolved on the first
+# cursor signed or verified, so the secret read stays off the cold-start
+# path and routes that never page work without one.
+_secret = None
+_secret_lock = threading.Lock()
+
+
+def encode_cursor(last_evaluated_key, scope):
+    """
+    Wrap a LastEvaluatedKey in an opaque, signed cursor bound to scope
+    (for example the caller_id being listed).
+    """
+    payload = _b64encode(json.dumps({'k': last_evaluated_key, 's': scope},
+                                    separators=(',', ':'), sort_keys=True).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def decode_cursor(cursor, scope):
+    """
+    Return the LastEvaluatedKey inside cursor.
+    Raises ValueError if the cursor is malformed, tampered with, or was
+    issued for a different scope.
+    """
+    try:
+        payload, signature = cursor.split('.')
+    except (AttributeError, ValueError):
+        raise ValueError("Malformed cursor")
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid cursor signature")
+    try:
+        data = json.loads(_b64decode(payload))
+    except ValueError:
+        raise ValueError("Malformed cursor")
+    if data.get('s') != scope or not isinstance(data.get('k'), dict):
+        raise ValueError("Cursor does not match this request")
+    return data['k']
+
+
+def _sign(payload):
+    digest = hmac.new(_signing_key(), payload.encode(), hashlib.sha256).digest()
+    return _b64encode(digest[:16])
+
+
+def _signing_key():
+    global _secret
+    if _secret is None:
+        with _secret_lock:
+            if _secret is None:
+                _secret = _load_secret()
+    return _secret
+
+
+def _load_secret():
+    """
+    The shared signing key. There is deliberately no random fallback: a
+    per-container key would reject page 2 whenever it lands on another
+    container.
+    """
+    secret = os.environ.get('CURSOR_SECRET')
+    if secret:
+        return secret.encode()
+    secret_id = os.environ.get('CURSOR_SECRET_ID')
+    if secret_id:
+        return _fetch_secret(secret_id)
+    raise RuntimeError("Set CURSOR_SECRET or CURSOR_SECRET_ID to sign page cursors")
+
+
+def _fetch_secret(secret_id):
+    """
+    SecretString of a Secrets Manager secret. boto3 is imported here so
+    module import stays off the cold-start path.
+    """
+    import boto3
+    client = boto3.client('secretsmanager', region_name=os.environ.get('REGION', 'us-east-1'))
+    return client.get_secret_value(SecretId=secret_id)['SecretString'].encode()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
@@ -0,0 +1,209 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from botocore.exceptions import ClientError
+
+import metrics
+from ticket_store import ClientTable, get_dynamodb_client
+
+# Units accepted in RATE_LIMITS rules ("30/min")
+PERIODS = {'s': 1, 'sec': 1, 'min': 60, 'h': 3600, 'hour': 3600}
+
+# Rule key that applies to every route, in a bucket per caller
+ALL_ROUTES = '*'
+
+_RULE = re.compile(r'^(?P<limit>\d+)/(?P<count>\d*)(?P<unit>[a-z]+)$')
+
+
+def create_rate_limiter():
+    """
+    Create the rate limiter configured by environment variables:
+    RATE_LIMITS (rules; none means no limiting), RATE_LIMIT_STORE (shared
+    counters: none (default), dynamodb or memory) and RATE_LIMIT_MAX_BUCKETS.
+    """
+    return RateLimiter(
+        parse_rules(os.environ.get('RATE_LIMITS', '')),
+        shared=create_shared_counters(os.environ.get('RATE_LIMIT_STORE', 'none')),
+        max_buckets=int(os.environ.get('RATE_LIMIT_MAX_BUCKETS', '10000'))
+    )
+
+
+def parse_rules(value):
+    """
+    Parse "ROUTE=LIMIT/PERIOD,..." into {route: (limit, period_seconds)}.
+    ROUTE is a metrics route label such as "POST /tickets/{id}/comments",
+    or * for a bucket per caller across all routes. PERIOD is s, min or h,
+    optionally with a count ("100/10s").
+    """
+    rules = {}
+    for entry in filter(None, (part.strip() for part in value.split(','))):
+        route, _, limit = entry.rpartition('=')
+        match = _RULE.match(limit.strip().lower())
+        if not route.strip() or not match or match['unit'] not in PERIODS or int(match['limit']) < 1:
+            raise ValueError(f"Invalid rate limit rule: {entry}")
+        period = int(match['count'] or 1) * PERIODS[match['unit']]
+        rules[route.strip()] = (int(match['limit']), period)
+    return rules
+
+
+def create_shared_counters(backend):
+    """
+    Shared counter backend for RATE_LIMIT_STORE: none, dynamodb or memory.
+    """
+    backend = backend.lower()
+    if backend == 'none':
+        return None
+    if backend == 'dynamodb':
+        return DynamoDBRateCounters()
+    if backend == 'memory':
+        return MemoryRateCounters()
+    raise ValueError(f"Unknown rate limit store: {backend}")
+
+
+class RateLimiter:
+    """
+    Token buckets per (route, caller) and, with a * rule, per caller.
+
+    Each container enforces every limit in process first, so a caller over
+    its limit is rejected with no network call. With shared counters the
+    request then also counts against a fixed window per bucket shared by all
+    containers; a rejected window is remembered locally until it ends.
+    """
+
+    def __init__(self, rules, shared=None, max_buckets=10000, clock=time.time):
+        self.rules = rules
+        self.shared = shared
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, route, caller_id):
+        """
+        Take one token from every bucket of the request. Returns None if
+        allowed, or the seconds to wait before retrying.
+        """
+        keys = [(f'{name}|{caller_id}', self.rules[name]) for name in (route, ALL_ROUTES) if name in self.rules]
+        if not keys:
+            return None
+        now = self.clock()
+        with self._lock:
+            buckets = [(self._bucket(key, rule, now), rule) for key, rule in keys]
+            waits = [_wait(bucket, rule, now) for bucket, rule in buckets]
+            if any(waits):
+                return max(waits)
+            for bucket, _ in buckets:
+                bucket[0] -= 1
+        if self.shared is None:
+            return None
+        return self._check_shared(keys, now)
+
+    def _bucket(self, key, rule, now):
+        """
+        [tokens, refilled_at, blocked_until] for key, refilled to now.
+        Least recently used buckets are dropped beyond max_buckets.
+        """
+        limit, period = rule
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit), now, 0.0]
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(float(limit), bucket[0] + (now - bucket[1]) * limit / period)
+            bucket[1] = now
+        return bucket
+
+    def _check_shared(self, keys, now):
+        for key, (limit, period) in keys:
+            window = int(now // period) * period
+            try:
+                allowed = self.shared.increment(f'{key}#{window}', limit, window + period)
+            except Exception as e:
+                # Fail open: the shared table must not take the API down with it
+                print(f"Rate limit check failed for {key}: {str(e)}")
+                metrics.add('RateLimitErrors')
+                return None
+            if not allowed:
+                with self._lock:
+                    self._bucket(key, (limit, period), now)[2] = window + period
+                return window + period - now
+        return None
+
+
+def _wait(bucket, rule, now):
+    tokens, _, blocked_until = bucket
+    if blocked_until > now:
+        return blocked_until - now
+    if tokens >= 1:
+        return 0
+    limit, period = rule
+    return (1 - tokens) * period / limit
+
+
+class RateCounters:
+    """
+    Fixed-window request counters shared by all containers.
+    """
+
+    def increment(self, key, limit, expires_at):
+        """
+        Count one request in the window key unless it already holds limit.
+        Returns whether the request was counted. expires_at (epoch seconds)
+        is when the window can be discarded.
+        """
+        raise NotImplementedError
+
+
+class DynamoDBRateCounters(RateCounters):
+    """
+    Counters in the poc-itsm-rate-limits table (partition key bucket, TTL
+    on expires_at). Each check is one conditional ADD, with no read.
+    """
+
+    def __init__(self, table=None, table_name=None, region=None):
+        self.table_name = table_name or os.environ.get('RATE_LIMIT_TABLE_NAME', 'poc-itsm-rate-limits')
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = ClientTable(get_dynamodb_client(self.region), self.table_name)
+        return self._table
+
+    def increment(self, key, limit, expires_at):
+        try:
+            self.table.update_item(
+                Key={'bucket': key},
+                UpdateExpression='ADD request_count :one SET expires_at = :expires_at',
+                ConditionExpression='attribute_not_exists(request_count) OR request_count < :limit',
+                ExpressionAttributeValues={':one': 1, ':limit': limit, ':expires_at': int(expires_at)}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+
+class MemoryRateCounters(RateCounters):
+    """
+    In-process counters for local runs and tests.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def increment(self, key, limit, expires_at):
+        with self._lock:
+            count = self._counts.get(key, 0)
+            if count >= limit:
+                return False
+            self._counts[key] = count + 1
+            return True
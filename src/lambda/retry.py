@@ -0,0 +1,209 @@
+import contextvars
+import os
+import random
+import threading
+import time
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+THROTTLING_ERROR_CODES = frozenset([
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+])
+TRANSIENT_ERROR_CODES = frozenset([
+    'InternalServerError',
+    'ServiceUnavailable',
+    'TransactionConflictException',
+    'TransactionInProgressException',
+])
+# A canceled transaction is retried only if nothing but throttling or a
+# conflicting write canceled it
+TRANSIENT_CANCELLATION_REASONS = frozenset([
+    'ThrottlingError',
+    'ProvisionedThroughputExceeded',
+    'TransactionConflict',
+])
+CONNECTION_ERRORS = (ConnectionClosedError, ConnectTimeoutError, EndpointConnectionError, ReadTimeoutError)
+
+# Absolute monotonic deadline for the current invocation (None = no deadline).
+# A ContextVar so worker threads started with copy_context() inherit it.
+_deadline = contextvars.ContextVar('retry_deadline', default=None)
+
+
+class RetryDeadlineExceeded(Exception):
+    """
+    Raised instead of sleeping past the invocation deadline.
+    The error that triggered the retry is chained as __cause__.
+    """
+
+
+def create_retry_policy():
+    """
+    Create the retry policy configured by environment variables:
+    RETRY_MAX_ATTEMPTS (default 3), RETRY_BASE_DELAY_MS (default 100),
+    RETRY_MAX_DELAY_MS (default 1000) and RETRY_BUDGET_CAPACITY (default 500).
+    An attempt may take the client's connect plus read timeout.
+    """
+    return RetryPolicy(
+        max_attempts=int(os.environ.get('RETRY_MAX_ATTEMPTS', '3')),
+        base_delay=float(os.environ.get('RETRY_BASE_DELAY_MS', '100')) / 1000,
+        max_delay=float(os.environ.get('RETRY_MAX_DELAY_MS', '1000')) / 1000,
+        budget=RetryBudget(capacity=int(os.environ.get('RETRY_BUDGET_CAPACITY', '500'))),
+        attempt_timeout=sum(client_timeouts())
+    )
+
+
+def client_timeouts():
+    """
+    (connect, read) timeouts in seconds for DynamoDB calls:
+    DYNAMODB_CONNECT_TIMEOUT (default 1) and DYNAMODB_READ_TIMEOUT (default 2).
+    """
+    return (float(os.environ.get('DYNAMODB_CONNECT_TIMEOUT', '1')),
+            float(os.environ.get('DYNAMODB_READ_TIMEOUT', '2')))
+
+
+def start_deadline(context, margin_ms=None):
+    """
+    Derive this invocation's retry deadline from the Lambda context, keeping
+    margin_ms (default RETRY_DEADLINE_MARGIN_MS, 500) to build the response.
+    Contexts without get_remaining_time_in_millis clear the deadline.
+    """
+    if margin_ms is None:
+        margin_ms = float(os.environ.get('RETRY_DEADLINE_MARGIN_MS', '500'))
+    remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    deadline = None
+    if callable(remaining):
+        deadline = time.monotonic() + (remaining() - margin_ms) / 1000
+    _deadline.set(deadline)
+    return deadline
+
+
+def time_remaining():
+    """
+    Seconds left before the invocation deadline, or None without a deadline.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def sleep(seconds):
+    """
+    Backoff sleep; a module function so tests can patch it in one place.
+    """
+    time.sleep(seconds)
+
+
+def full_jitter(attempt, base_delay, max_delay):
+    """
+    Full-jitter backoff: uniform in [0, min(max_delay, base_delay * 2**attempt)].
+    Spreads concurrent retries out instead of retrying in lockstep.
+    """
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+def is_retryable(error):
+    if isinstance(error, ClientError):
+        code = error.response.get('Error', {}).get('Code')
+        if code == 'TransactionCanceledException':
+            # 'None' marks the actions that did not cancel it
+            reasons = {reason.get('Code') for reason in error.response.get('CancellationReasons', [])} - {'None'}
+            return bool(reasons) and reasons <= TRANSIENT_CANCELLATION_REASONS
+        return code in THROTTLING_ERROR_CODES or code in TRANSIENT_ERROR_CODES
+    return isinstance(error, CONNECTION_ERRORS)
+
+
+class RetryBudget:
+    """
+    Container-wide retry token bucket (the SDK "standard mode" quota).
+    Each retry spends retry_cost tokens and each first-try success refunds
+    one, so a sustained throttling storm stops retrying instead of
+    multiplying load on the table.
+    """
+
+    def __init__(self, capacity=500, retry_cost=5, success_refund=1):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.success_refund = success_refund
+        self.tokens = capacity
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Spend tokens for one retry. Returns False when the budget is empty.
+        """
+        with self._lock:
+            if self.tokens < self.retry_cost:
+                return False
+            self.tokens -= self.retry_cost
+            return True
+
+    def release(self, retried):
+        """
+        Refund tokens after a successful call.
+        """
+        with self._lock:
+            refund = self.retry_cost if retried else self.success_refund
+            self.tokens = min(self.capacity, self.tokens + refund)
+
+
+class RetryPolicy:
+    """
+    Retries throttling, transient 5xx and connection errors with full-jitter
+    exponential backoff, bounded by max_attempts, the shared retry budget and
+    the invocation deadline. attempt_timeout is the longest one attempt can
+    take (seconds); no attempt starts with less time than that left.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.1, max_delay=1.0, budget=None, sleep=None, attempt_timeout=0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.budget = budget if budget is not None else RetryBudget()
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def call(self, operation, max_attempts=None, on_retry=None):
+        """
+        Run operation, retrying retryable errors. Non-retryable errors and the
+        final retryable error are re-raised unchanged; RetryDeadlineExceeded
+        is raised when the next attempt would not finish before the deadline.
+        on_retry(attempt, error, delay) is called before each backoff sleep.
+        """
+        max_attempts = max_attempts or self.max_attempts
+        for attempt in range(max_attempts):
+            remaining = time_remaining()
+            if remaining is not None and (remaining <= 0 or remaining < self.attempt_timeout):
+                raise RetryDeadlineExceeded(
+                    f"{max(remaining, 0):.3f}s left, too little for a DynamoDB call of up to {self.attempt_timeout:.3f}s"
+                )
+            try:
+                result = operation()
+            except Exception as e:
+                if not is_retryable(e) or attempt == max_attempts - 1:
+                    raise
+                if not self.budget.acquire():
+                    print("Retry budget exhausted, not retrying")
+                    raise
+                delay = full_jitter(attempt, self.base_delay, self.max_delay)
+                remaining = time_remaining()
+                if remaining is not None and delay + self.attempt_timeout >= remaining:
+                    raise RetryDeadlineExceeded(
+                        f"Retry after {delay:.3f}s would pass the invocation deadline"
+                    ) from e
+                with self._lock:
+                    self.retries += 1
+                if on_retry is not None:
+                    on_retry(attempt, e, delay)
+                (self._sleep or sleep)(delay)
+                continue
+            self.budget.release(retried=attempt > 0)
+            return result
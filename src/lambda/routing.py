@@ -0,0 +1,124 @@
+import base64
+import re
+from collections import namedtuple
+from urllib.parse import parse_qsl, unquote
+
+# One operation of the API: handler(event, body_data) returns the proxy response.
+# rate_limited=False leaves limiting to the handler (POST /batch limits each operation)
+Route = namedtuple('Route', 'method resource handler rate_limited')
+
+_PARAMETER = re.compile(r'^\{(?P<name>\w+)\}$')
+
+
+class Router:
+    """
+    Operations by method and resource template ("/tickets/{id}/comments"),
+    compiled when added so a request costs one dict lookup for static
+    resources, or a few precompiled patterns with the same number of
+    segments for templated ones.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        self._templates = {}
+
+    def route(self, method, resource, rate_limited=True):
+        """
+        Decorator registering handler for method and resource.
+        """
+        def register(handler):
+            self.add(method, resource, handler, rate_limited)
+            return handler
+        return register
+
+    def add(self, method, resource, handler, rate_limited=True):
+        methods = self._resources.get(resource)
+        if methods is None:
+            methods = self._resources[resource] = {}
+            segments = resource.split('/')
+            if any(_PARAMETER.match(segment) for segment in segments):
+                self._templates.setdefault(len(segments), []).append((_compile(segments), resource))
+        if method in methods:
+            raise ValueError(f"Duplicate route: {method} {resource}")
+        methods[method] = Route(method, resource, handler, rate_limited)
+
+    def match(self, path):
+        """
+        (resource, path_parameters) for the resource path belongs to, or
+        None. Static resources win over templates ("/tickets/search" is not
+        a ticket id). Parameters may be empty ("/tickets/") so operations
+        can answer with their own 400.
+        """
+        if path in self._resources:
+            return path, None
+        for pattern, resource in self._templates.get(path.count('/') + 1, ()):
+            match = pattern.match(path)
+            if match:
+                return resource, {name: unquote(value) for name, value in match.groupdict().items()}
+        return None
+
+    def methods(self, resource):
+        """
+        {method: Route} registered for resource (empty if none).
+        """
+        return self._resources.get(resource) or {}
+
+
+def _compile(segments):
+    parts = []
+    for segment in segments:
+        parameter = _PARAMETER.match(segment)
+        parts.append(f"(?P<{parameter['name']}>[^/]*)" if parameter else re.escape(segment))
+    return re.compile('^' + '/'.join(parts) + '$')
+
+
+def normalize_event(event):
+    """
+    REST API proxy (payload v1) view of an API Gateway REST API, HTTP API
+    (payload v2) or Lambda Function URL event, so one handler serves all
+    three. v1 events are returned as they are. Bodies are left as sent,
+    with isBase64Encoded; decode_body reads them.
+    """
+    if event.get('version') != '2.0':
+        return event
+
+    context = event.get('requestContext') or {}
+    http = context.get('http') or {}
+    path = event.get('rawPath') or http.get('path') or '/'
+    # HTTP API keeps a named stage in rawPath ("/prod/tickets"); $default has none
+    stage = context.get('stage')
+    if stage and stage != '$default' and path.startswith(f'/{stage}/'):
+        path = path[len(stage) + 1:]
+    # Repeated query parameters keep their last value, as in v1 queryStringParameters
+    if 'rawQueryString' in event:
+        query = dict(parse_qsl(event['rawQueryString'], keep_blank_values=True))
+    else:
+        query = event.get('queryStringParameters') or {}
+    # "$default" (every Function URL and catch-all HTTP API routes) names no resource
+    _, _, resource = (event.get('routeKey') or '').partition(' ')
+
+    return {
+        'resource': resource or None,
+        'path': path,
+        'httpMethod': http.get('method', ''),
+        'headers': event.get('headers'),
+        'queryStringParameters': query or None,
+        'pathParameters': event.get('pathParameters'),
+        'requestContext': dict(context, httpMethod=http.get('method', ''), path=path, identity={
+            'sourceIp': http.get('sourceIp'),
+            'userAgent': http.get('userAgent')
+        }),
+        'body': event.get('body'),
+        'isBase64Encoded': bool(event.get('isBase64Encoded'))
+    }
+
+
+def decode_body(event):
+    """
+    The request body as text, base64-decoded when isBase64Encoded.
+    Raises ValueError (binascii.Error) for a body that is not valid base64.
+    """
+    body = event.get('body')
+    if event.get('isBase64Encoded') and body:
+        return base64.b64decode(body).decode('utf-8', 'replace')
+    return body
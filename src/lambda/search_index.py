@@ -0,0 +1,221 @@
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+import compression
+from ticket_store import ClientTable, drain_unprocessed, get_dynamodb_client
+
+# Distinct terms indexed per description or comment (most frequent first)
+MAX_TERMS = int(os.environ.get('SEARCH_MAX_TERMS', '32'))
+
+# Newest postings read per query term
+MAX_POSTINGS = int(os.environ.get('SEARCH_MAX_POSTINGS', '500'))
+
+# Query terms beyond this are ignored
+MAX_QUERY_TERMS = 8
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset('''
+    a about after again all am an and any are as at be been before but by can cannot could did do does
+    doing don for from had has have having he her here hi his how i if in into is it its just me my no
+    nor not now of off on once only or other our out over please same she should so some still such
+    than thank thanks that the their them then there these they this those through to too under until
+    up very was we were what when where which while who why will with won would yes you your
+'''.split())
+
+
+def tokenize(text):
+    """
+    Term frequencies for text: lowercased alphanumeric words without
+    stopwords, with simple plural folding ("printers" -> "printer").
+    Single digits are kept so "floor 3" stays searchable.
+    """
+    terms = Counter()
+    for token in _TOKEN.findall(text.lower()):
+        if token in STOPWORDS or (len(token) < 2 and not token.isdigit()):
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        terms[token] += 1
+    return terms
+
+
+def create_search_index(backend=None):
+    """
+    Create the search index selected by SEARCH_INDEX (default: the
+    TICKET_STORE backend). Supported backends: dynamodb, memory.
+    """
+    backend = (backend or os.environ.get('SEARCH_INDEX') or os.environ.get('TICKET_STORE', 'dynamodb')).lower()
+    if backend == 'dynamodb':
+        return DynamoDBSearchIndex()
+    if backend == 'memory':
+        return MemorySearchIndex()
+    raise ValueError(f"Unknown search index backend: {backend}")
+
+
+def caller_term(caller_id, term):
+    """
+    Key of the caller's own posting list for term
+    """
+    return f'{caller_id}#{term}'
+
+
+class SearchIndex:
+    """
+    Inverted index from term to postings. A posting records how often a
+    term occurs in one source (the description or one comment) of a ticket,
+    keyed by "{created_at}#{ticket_id}#{source}" so each posting list reads
+    newest first. Every posting is also listed under caller_term, so a
+    caller's search reads only that caller's postings.
+    """
+
+    def index_documents(self, documents):
+        """
+        Add postings for descriptions and comments given as
+        (ticket_id, caller_id, created_at, source, text) tuples; source is
+        'd' for the description or a per-comment key.
+        Returns the postings that could not be written.
+        """
+        postings = []
+        for ticket_id, caller_id, created_at, source, text in documents:
+            terms = tokenize(compression.compressor.decode(text) or '').most_common(MAX_TERMS)
+            postings.extend({
+                'term': term,
+                'posting_key': f'{created_at}#{ticket_id}#{source}',
+                'caller_term': caller_term(caller_id, term),
+                'ticket_id': ticket_id,
+                'caller_id': caller_id,
+                'created_at': created_at,
+                'tf': count
+            } for term, count in terms)
+        if not postings:
+            return []
+        return self.put_postings(postings)
+
+    def search(self, query, caller_id=None, limit=10):
+        """
+        Rank tickets matching any query term. Returns up to limit results
+        [{'ticket_id', 'caller_id', 'created_at', 'score'}], best first.
+        Each term scores idf * (1 + log(tf)) where idf favours the rarer
+        query terms; ties go to the newer ticket.
+        """
+        terms = list(tokenize(query))[:MAX_QUERY_TERMS]
+        postings = {term: self.postings(term, caller_id=caller_id, limit=MAX_POSTINGS) for term in terms}
+        document_frequency = {
+            term: len({posting['ticket_id'] for posting in found}) for term, found in postings.items()
+        }
+        most_common = max(document_frequency.values(), default=0)
+
+        tickets = {}
+        for term, found in postings.items():
+            frequency = Counter()
+            for posting in found:
+                frequency[posting['ticket_id']] += int(posting['tf'])
+                tickets.setdefault(posting['ticket_id'], {
+                    'ticket_id': posting['ticket_id'],
+                    'caller_id': posting['caller_id'],
+                    'created_at': posting['created_at'],
+                    'score': 0.0
+                })
+            idf = 1 + math.log(most_common / document_frequency[term]) if document_frequency[term] else 0
+            for ticket_id, tf in frequency.items():
+                tickets[ticket_id]['score'] += idf * (1 + math.log(tf))
+
+        ranked = sorted(tickets.values(), key=lambda t: (t['score'], t['created_at']), reverse=True)[:limit]
+        for result in ranked:
+            result['score'] = round(result['score'], 4)
+        return ranked
+
+    def put_postings(self, postings):
+        """
+        Store postings. Returns the postings that could not be written.
+        """
+        raise NotImplementedError
+
+    def postings(self, term, caller_id=None, limit=MAX_POSTINGS):
+        """
+        Return up to limit postings for term, newest ticket first,
+        optionally only for caller_id (the caller's newest limit postings,
+        not a filtered subset of everyone's).
+        """
+        raise NotImplementedError
+
+
+class DynamoDBSearchIndex(SearchIndex):
+    """
+    Search index in the poc-itsm-ticket-search table (partition key term,
+    sort key posting_key) with CallerTermIndex (partition key caller_term,
+    same sort key) for caller searches. Postings are immutable puts, so
+    descriptions and comments are indexed with BatchWriteItem and never
+    read-modify-write.
+    """
+
+    BATCH_WRITE_SIZE = 25
+    CALLER_INDEX = 'CallerTermIndex'
+
+    def __init__(self, table=None, table_name=None, region=None):
+        self.table_name = table_name or os.environ.get('SEARCH_TABLE_NAME', 'poc-itsm-ticket-search')
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = ClientTable(get_dynamodb_client(self.region), self.table_name)
+        return self._table
+
+    def put_postings(self, postings):
+        unprocessed = []
+        for start in range(0, len(postings), self.BATCH_WRITE_SIZE):
+            unprocessed.extend(drain_unprocessed(
+                lambda pending: self.table.batch_write_item(Items=pending).get('UnprocessedItems', []),
+                postings[start:start + self.BATCH_WRITE_SIZE]
+            ))
+        return unprocessed
+
+    def postings(self, term, caller_id=None, limit=MAX_POSTINGS):
+        if caller_id:
+            params = {
+                'IndexName': self.CALLER_INDEX,
+                'KeyConditionExpression': 'caller_term = :caller_term',
+                'ExpressionAttributeValues': {':caller_term': caller_term(caller_id, term)}
+            }
+        else:
+            params = {
+                'KeyConditionExpression': '#term = :term',
+                'ExpressionAttributeNames': {'#term': 'term'},
+                'ExpressionAttributeValues': {':term': term}
+            }
+        params['ScanIndexForward'] = False  # Newest tickets first
+        params['Limit'] = limit
+        return self.table.query(**params).get('Items', [])
+
+
+class MemorySearchIndex(SearchIndex):
+    """
+    In-process search index for local runs and load tests.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._caller_postings = {}
+        self._lock = threading.Lock()
+
+    def put_postings(self, postings):
+        with self._lock:
+            for posting in postings:
+                posting = dict(posting)
+                self._postings.setdefault(posting['term'], {})[posting['posting_key']] = posting
+                self._caller_postings.setdefault(posting['caller_term'], {})[posting['posting_key']] = posting
+        return []
+
+    def postings(self, term, caller_id=None, limit=MAX_POSTINGS):
+        with self._lock:
+            if caller_id:
+                found = self._caller_postings.get(caller_term(caller_id, term), {})
+            else:
+                found = self._postings.get(term, {})
+            newest = sorted(found.items(), reverse=True)[:limit]
+        return [dict(posting) for _, posting in newest]
@@ -0,0 +1,60 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from search_index import create_search_index
+from ticket_store import create_store
+
+store = create_store()
+search_index = create_search_index()
+
+_deserializer = TypeDeserializer()
+
+
+def lambda_handler(event, context):
+    """
+    DynamoDB Streams consumer that keeps the search index up to date when
+    the API runs with SEARCH_INDEX_UPDATES=stream. Subscribe it to the
+    streams of both the tickets and the comments table (NEW_IMAGE).
+
+    Only INSERT records are indexed: descriptions are written once and
+    comments are append-only. Postings are plain puts, so redelivered
+    batches are harmless; failures are raised so Lambda retries the batch.
+    """
+    tickets = []
+    comments = []
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'INSERT':
+            continue
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        item = {name: _deserializer.deserialize(value) for name, value in image.items()}
+        if 'comment_key' in item:
+            comments.append(item)
+        else:
+            tickets.append(item)
+
+    documents = [
+        (ticket['ticket_id'], ticket['caller_id'], ticket['created_at'], 'd', ticket['issue_description'])
+        for ticket in tickets
+    ]
+    if comments:
+        # Comment items carry only the ticket_id; postings also need the
+        # ticket's caller and creation time for filtering and ordering
+        found, unprocessed = store.get_tickets(list({comment['ticket_id'] for comment in comments}))
+        if unprocessed:
+            # Not missing, only unread (throttled): fail so the batch is redelivered
+            raise RuntimeError(f"{len(unprocessed)} tickets could not be read for comment postings")
+        for comment in comments:
+            ticket = found.get(comment['ticket_id'])
+            if ticket is None:
+                print(f"Skipping comment for missing ticket {comment['ticket_id']}")
+                continue
+            documents.append((ticket['ticket_id'], ticket['caller_id'], ticket['created_at'],
+                              f"c{comment['added_at']}", comment['comment_text']))
+
+    unprocessed = search_index.index_documents(documents) if documents else []
+    if unprocessed:
+        raise RuntimeError(f"{len(unprocessed)} search postings could not be written")
+
+    print(f"Indexed {len(documents)} documents from {len(event.get('Records', []))} stream records")
+    return {'indexed': len(documents)}
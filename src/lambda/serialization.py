@@ -0,0 +1,80 @@
+import json
+import os
+from decimal import Decimal
+
+import metrics
+
+try:
+    import orjson
+except ImportError:  # optional: not part of the Lambda runtime
+    orjson = None
+
+# Shared response headers. Treat as read-only; copy before adding headers.
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _default(value):
+    """
+    Encode DynamoDB numbers as JSON numbers (not strings); anything else
+    unexpected falls back to str() as before.
+    """
+    if isinstance(value, Decimal):
+        if value == value.to_integral_value():
+            return int(value)
+        return float(value)
+    return str(value)
+
+
+# One compact encoder instance instead of a new JSONEncoder per json.dumps call
+_stdlib_encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+
+def _encode_stdlib(payload):
+    return _stdlib_encoder.encode(payload)
+
+
+def _encode_orjson(payload):
+    return orjson.dumps(payload, default=_default).decode()
+
+
+def select_encoder(name=None):
+    """
+    Pick the body encoder: RESPONSE_JSON_ENCODER=auto (default) uses orjson
+    when installed, stdlib forces the standard library encoder.
+    """
+    name = (name or os.environ.get('RESPONSE_JSON_ENCODER', 'auto')).lower()
+    if name == 'orjson' or (name == 'auto' and orjson is not None):
+        if orjson is None:
+            raise ValueError("RESPONSE_JSON_ENCODER=orjson but orjson is not installed")
+        return _encode_orjson
+    if name in ('auto', 'stdlib'):
+        return _encode_stdlib
+    raise ValueError(f"Unknown JSON encoder: {name}")
+
+
+encode = select_encoder()
+
+
+def json_response(status_code, payload, headers=None):
+    """
+    Build an API Gateway proxy response with a JSON body.
+    headers, if given, replaces the shared JSON_HEADERS for this response.
+    """
+    with metrics.span('SerializeTime'):
+        body = encode(payload)
+    return {
+        'statusCode': status_code,
+        'headers': headers or JSON_HEADERS,
+        'body': body
+    }
+
+
+def not_modified_response(etag):
+    """
+    Bodiless 304 response for a conditional GET whose ETag still matches.
+    """
+    return {
+        'statusCode': 304,
+        'headers': {'ETag': etag},
+        'body': ''
+    }
@@ -0,0 +1,168 @@
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import serialization
+from object_store import create_object_store
+from ticket_store import RECENT_COMMENTS, ClientTable, drain_unprocessed, get_dynamodb_client
+
+# Tickets entering these statuses get an expires_at TTL; once DynamoDB
+# deletes them the ticket_archiver stream handler moves them to the archive
+ARCHIVE_STATUSES = ('resolved', 'closed')
+
+# Days a resolved or closed ticket stays in the tickets table; 0 disables
+ARCHIVE_AFTER_DAYS = float(os.environ.get('TICKET_ARCHIVE_AFTER_DAYS', '30'))
+
+
+def expiry_for(status, now=None):
+    """
+    expires_at (epoch seconds) for a ticket entering status, or None when
+    it stays in the tickets table.
+    """
+    if status not in ARCHIVE_STATUSES or ARCHIVE_AFTER_DAYS <= 0:
+        return None
+    return int((time.time() if now is None else now) + ARCHIVE_AFTER_DAYS * 86400)
+
+
+def create_archive_index(backend=None):
+    """
+    Create the archive index selected by ARCHIVE_INDEX_STORE (default: the
+    TICKET_STORE backend). Supported backends: dynamodb, memory.
+    """
+    backend = (backend or os.environ.get('ARCHIVE_INDEX_STORE') or os.environ.get('TICKET_STORE', 'dynamodb')).lower()
+    if backend == 'dynamodb':
+        return DynamoDBArchiveIndex()
+    if backend == 'memory':
+        return MemoryArchiveIndex()
+    raise ValueError(f"Unknown archive index backend: {backend}")
+
+
+class ArchiveIndex:
+    """
+    Where each archived ticket lives: {'ticket_id', 'object_key', 'line',
+    'caller_id', 'updated_at', 'archived_at'}.
+    """
+
+    def get(self, ticket_id):
+        """
+        Return the ticket's entry, or None if it was never archived.
+        """
+        raise NotImplementedError
+
+    def put_entries(self, entries):
+        """
+        Store entries, replacing existing ones. Returns the entries that
+        could not be written.
+        """
+        raise NotImplementedError
+
+
+class DynamoDBArchiveIndex(ArchiveIndex):
+    """
+    Archive index in the poc-itsm-ticket-archive-index table (partition key
+    ticket_id). Entries are about 150 bytes against several KB for a ticket.
+    """
+
+    BATCH_WRITE_SIZE = 25
+
+    def __init__(self, table=None, table_name=None, region=None):
+        self.table_name = table_name or os.environ.get('ARCHIVE_INDEX_TABLE_NAME', 'poc-itsm-ticket-archive-index')
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        self._table = table
+
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = ClientTable(get_dynamodb_client(self.region), self.table_name)
+        return self._table
+
+    def get(self, ticket_id):
+        return self.table.get_item(Key={'ticket_id': ticket_id}).get('Item')
+
+    def put_entries(self, entries):
+        unprocessed = []
+        for start in range(0, len(entries), self.BATCH_WRITE_SIZE):
+            unprocessed.extend(drain_unprocessed(
+                lambda pending: self.table.batch_write_item(Items=pending).get('UnprocessedItems', []),
+                entries[start:start + self.BATCH_WRITE_SIZE]
+            ))
+        return unprocessed
+
+
+class MemoryArchiveIndex(ArchiveIndex):
+    """
+    In-process archive index for local runs and tests.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, ticket_id):
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            return dict(entry) if entry else None
+
+    def put_entries(self, entries):
+        with self._lock:
+            for entry in entries:
+                self._entries[entry['ticket_id']] = dict(entry)
+        return []
+
+
+def create_ticket_archive():
+    return TicketArchive(create_object_store(), create_archive_index())
+
+
+class TicketArchive:
+    """
+    Archived tickets as gzip-compressed NDJSON batch objects (one ticket
+    per line, every comment included) located through the archive index.
+    """
+
+    def __init__(self, objects, index):
+        self.objects = objects
+        self.index = index
+
+    def write_batch(self, tickets, archived_at=None):
+        """
+        Store tickets as one object under {yyyy}/{mm}/{dd}/, then index
+        them. Returns the object key. Raises RuntimeError when index entries
+        could not be written; rewriting the batch is safe, the earlier
+        object is just left unreferenced.
+        """
+        archived_at = archived_at or datetime.utcnow().isoformat() + 'Z'
+        key = f"{archived_at[:10].replace('-', '/')}/{uuid.uuid4().hex}.ndjson.gz"
+        lines = ''.join(serialization.encode(dict(ticket, archived_at=archived_at)) + '\n' for ticket in tickets)
+        self.objects.put(key, gzip.compress(lines.encode('utf-8')))
+        unprocessed = self.index.put_entries([{
+            'ticket_id': ticket['ticket_id'],
+            'object_key': key,
+            'line': number,
+            'caller_id': ticket.get('caller_id'),
+            'updated_at': ticket.get('updated_at'),
+            'archived_at': archived_at
+        } for number, ticket in enumerate(tickets)])
+        if unprocessed:
+            raise RuntimeError(f"{len(unprocessed)} archive index entries could not be written")
+        return key
+
+    def get_ticket(self, ticket_id):
+        """
+        Return the archived ticket shaped like TicketStore.get_ticket (the
+        RECENT_COMMENTS newest comments) plus archived_at, or None.
+        """
+        entry = self.index.get(ticket_id)
+        if entry is None:
+            return None
+        data = self.objects.get(entry['object_key'])
+        if data is None:
+            print(f"Archive object {entry['object_key']} for ticket {ticket_id} is missing")
+            return None
+        ticket = json.loads(gzip.decompress(data).split(b'\n')[int(entry['line'])])
+        ticket['comments'] = ticket.get('comments', [])[-RECENT_COMMENTS:] if RECENT_COMMENTS else []
+        return ticket
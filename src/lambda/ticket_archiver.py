@@ -0,0 +1,64 @@
+from boto3.dynamodb.types import TypeDeserializer
+
+from ticket_archive import create_ticket_archive
+from ticket_store import create_store, full_ticket
+
+store = create_store()
+archive = create_ticket_archive()
+
+# Page size for reading an expired ticket's comments
+COMMENT_PAGE_SIZE = 100
+
+# userIdentity DynamoDB puts on stream records of TTL deletions
+TTL_IDENTITY = {'type': 'Service', 'principalId': 'dynamodb.amazonaws.com'}
+
+_deserializer = TypeDeserializer()
+
+
+def lambda_handler(event, context):
+    """
+    DynamoDB Streams consumer for the tickets table (NEW_AND_OLD_IMAGES, or
+    OLD_IMAGE) that moves tickets deleted by TTL into the ticket archive.
+
+    Every expired ticket in the batch is written, with its full comment
+    history, to one archive object; its comment items are deleted only
+    after the archive index points at it. Failures are raised so Lambda
+    retries the batch. A retry skips tickets the index already holds at
+    the same updated_at, whose comments may be partly deleted by then.
+    """
+    expired = []
+    for record in event.get('Records', []):
+        if record.get('eventName') != 'REMOVE' or record.get('userIdentity') != TTL_IDENTITY:
+            continue
+        image = record.get('dynamodb', {}).get('OldImage')
+        if image:
+            expired.append({name: _deserializer.deserialize(value) for name, value in image.items()})
+
+    if not expired:
+        return {'archived': 0, 'object_key': None}
+
+    pending = [item for item in expired if not archived(item)]
+    tickets = [full_ticket(item, all_comments(item['ticket_id'])) for item in pending]
+    key = archive.write_batch(tickets) if tickets else None
+
+    failed = sum(store.delete_comments(item['ticket_id']) for item in expired)
+    if failed:
+        raise RuntimeError(f"{failed} archived comments could not be deleted")
+
+    print(f"Archived {len(tickets)} tickets to {key} from {len(event.get('Records', []))} stream records")
+    return {'archived': len(tickets), 'object_key': key}
+
+
+def archived(item):
+    entry = archive.index.get(item['ticket_id'])
+    return entry is not None and entry.get('updated_at') == item.get('updated_at')
+
+
+def all_comments(ticket_id):
+    comments = []
+    start_key = None
+    while True:
+        page, start_key = store.query_comments(ticket_id, COMMENT_PAGE_SIZE, start_key=start_key)
+        comments.extend(page)
+        if not start_key:
+            return comments
@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def create_ticket_cache():
+    """
+    Create the ticket cache configured by environment variables:
+    TICKET_CACHE_ENABLED (default true), TICKET_CACHE_MAX_ENTRIES (default 1024)
+    and TICKET_CACHE_TTL_SECONDS (default 5).
+    """
+    return TicketCache(
+        max_entries=int(os.environ.get('TICKET_CACHE_MAX_ENTRIES', '1024')),
+        ttl_seconds=float(os.environ.get('TICKET_CACHE_TTL_SECONDS', '5')),
+        enabled=os.environ.get('TICKET_CACHE_ENABLED', 'true').lower() == 'true'
+    )
+
+
+class TicketCache:
+    """
+    In-process LRU cache of ticket items keyed by ticket_id.
+    Lives at module scope so it survives across warm invocations. Entries
+    expire after ttl_seconds, which bounds staleness from writes made by
+    other containers. Cached items are shared and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=5.0, enabled=True, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_entries > 0
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, ticket_id):
+        """
+        Return the cached ticket, or None on a miss or expired entry.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(ticket_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, item = entry
+            if expires_at <= self._clock():
+                del self._entries[ticket_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(ticket_id)
+            self.hits += 1
+            return item
+
+    def put(self, item):
+        """
+        Cache a ticket item, evicting the least recently used entry when full.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            ticket_id = item['ticket_id']
+            self._entries[ticket_id] = (self._clock() + self.ttl_seconds, item)
+            self._entries.move_to_end(ticket_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, ticket_id):
+        """
+        Drop a ticket after a write that changes it.
+        """
+        with self._lock:
+            self._entries.pop(ticket_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Return hit/miss counters and current size.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries)
+            }
@@ -0,0 +1,983 @@
+import bisect
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+import compression
+import metrics
+import retry
+
+# Low-level DynamoDB clients, created on first use and shared per container.
+# boto3 is imported lazily so module import stays off the cold-start path.
+_clients = {}
+_clients_lock = threading.Lock()
+
+# Number of most recent comments embedded in a ticket read
+RECENT_COMMENTS = int(os.environ.get('TICKET_RECENT_COMMENTS', '10'))
+
+
+def create_store(backend=None):
+    """
+    Create the ticket store selected by the TICKET_STORE environment variable.
+    Supported backends: dynamodb (default), memory.
+    """
+    backend = (backend or os.environ.get('TICKET_STORE', 'dynamodb')).lower()
+    if backend == 'dynamodb':
+        return DynamoDBTicketStore()
+    if backend == 'memory':
+        return MemoryTicketStore()
+    raise ValueError(f"Unknown ticket store backend: {backend}")
+
+
+class TicketStore:
+    """
+    Storage interface used by the Mock ITSM API operations.
+    Backends raise botocore ClientError for storage-level failures so the
+    handler's retry and error mapping behave the same for every backend.
+
+    Comments are stored as separate items keyed by (ticket_id, comment_key),
+    so adding one costs the same regardless of how many the ticket has.
+    """
+
+    def put_ticket(self, item, only_if_new=False):
+        """
+        Store a new ticket item. Any comments list on the item is not stored.
+        only_if_new raises ConditionalCheckFailedException instead of
+        overwriting an existing ticket with the same ticket_id.
+        """
+        raise NotImplementedError
+
+    def get_ticket(self, ticket_id, consistent=False, attributes=None):
+        """
+        Return the ticket item for ticket_id, or None if it does not exist.
+        The item's comments holds the RECENT_COMMENTS newest comments, oldest
+        first. consistent requests a strongly-consistent read where supported.
+        attributes restricts the item to the named attributes; comments are
+        only read when named.
+        """
+        raise NotImplementedError
+
+    def append_comment(self, ticket_id, comment, timestamp, request_token=None):
+        """
+        Add a comment to an existing ticket, set updated_at and increment
+        comment_count, all or nothing. Retrying with the same request_token
+        (up to 36 characters, unique per comment) stores and counts the
+        comment once. Raises ConditionalCheckFailedException if the ticket
+        does not exist.
+        """
+        raise NotImplementedError
+
+    def update_status(self, ticket_id, status, allowed_from, timestamp, expected_version=None, expires_at=None):
+        """
+        Set status and updated_at and increment version in one conditional
+        write, only if the current status is in allowed_from and, when given,
+        version equals expected_version (tickets without a version are at 0).
+        expires_at (epoch seconds) sets the ticket's TTL; None removes it.
+        Returns the updated ticket without comments. On failure raises
+        ConditionalCheckFailedException whose response carries the current
+        ticket as 'Item' (absent if the ticket does not exist).
+        """
+        raise NotImplementedError
+
+    def query_comments(self, ticket_id, limit, start_key=None):
+        """
+        Return (comments, last_key): up to limit comments for ticket_id,
+        oldest first, starting after start_key.
+        """
+        raise NotImplementedError
+
+    def delete_comments(self, ticket_id):
+        """
+        Delete every comment item of ticket_id (once it has been archived).
+        Returns the number of comments that could not be deleted.
+        """
+        raise NotImplementedError
+
+    def query_by_caller(self, caller_id, limit, start_key=None, attributes=None):
+        """
+        Return (items, last_key): up to limit tickets for caller_id, newest
+        created_at first, starting after start_key. last_key is None when
+        there are no more tickets. attributes restricts each item to the
+        named attributes.
+        """
+        raise NotImplementedError
+
+    def scan_segment(self, segment, total_segments, limit, start_key=None):
+        """
+        Return (items, last_key): up to limit tickets from one of
+        total_segments disjoint segments of the table, starting after
+        start_key. last_key is None when the segment is exhausted. Items
+        are returned as stored apart from decompressed text, including any
+        legacy inline comments.
+        """
+        raise NotImplementedError
+
+    def scan_comment_segment(self, segment, total_segments, limit, start_key=None):
+        """
+        scan_segment over the comment items. Each is returned as stored
+        (ticket_id, comment_key, added_at) with comment_text decompressed.
+        """
+        raise NotImplementedError
+
+    def put_tickets(self, items):
+        """
+        Store many new ticket items.
+        Returns the items that could not be written.
+        """
+        raise NotImplementedError
+
+    def put_comments(self, records):
+        """
+        Store many comment items as returned by scan_comment_segment,
+        keeping their comment_key. comment_count on the tickets is left as
+        it is. Returns the items that could not be written.
+        """
+        raise NotImplementedError
+
+    def get_tickets(self, ticket_ids, consistent=False):
+        """
+        Fetch many tickets. Returns (found, unprocessed) where found maps
+        ticket_id to item and unprocessed lists ids that could not be read.
+        Ids missing from both do not exist. Items carry comment_count but
+        no comments.
+        """
+        raise NotImplementedError
+
+    def warm(self):
+        """
+        Prepare connections ahead of real traffic. No-op by default.
+        """
+
+
+class DynamoDBTicketStore(TicketStore):
+    """
+    Ticket store backed by the poc-itsm-tickets DynamoDB table, with comments
+    in poc-itsm-ticket-comments (partition key ticket_id, sort key comment_key).
+    """
+
+    # DynamoDB per-request limits for BatchWriteItem and BatchGetItem
+    BATCH_WRITE_SIZE = 25
+    BATCH_GET_SIZE = 100
+    # Unprocessed items/keys are resent with full-jitter exponential backoff
+    UNPROCESSED_MAX_ATTEMPTS = 5
+    UNPROCESSED_BASE_DELAY = 0.05
+    UNPROCESSED_MAX_DELAY = 1.0
+
+    def __init__(self, table=None, table_name=None, region=None,
+                 comments_table=None, comments_table_name=None, caller_shards=None):
+        self.table_name = table_name or os.environ.get('TABLE_NAME', 'poc-itsm-tickets')
+        self.comments_table_name = comments_table_name or os.environ.get(
+            'COMMENTS_TABLE_NAME', 'poc-itsm-ticket-comments')
+        self.region = region or os.environ.get('REGION', 'us-east-1')
+        # More than one shard: tickets carry caller_shard and caller queries
+        # scatter-gather over CallerShardIndex instead of CallerIdIndex
+        if caller_shards is None:
+            caller_shards = int(os.environ.get('CALLER_INDEX_SHARDS', '1'))
+        self.caller_shards = caller_shards
+        self._table = table
+        self._comments_table = comments_table
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def table(self):
+        """
+        Table adapter, built on first use instead of at import.
+        """
+        if self._table is None:
+            self._table = ClientTable(get_dynamodb_client(self.region), self.table_name)
+        return self._table
+
+    @property
+    def comments_table(self):
+        if self._comments_table is None:
+            self._comments_table = ClientTable(get_dynamodb_client(self.region), self.comments_table_name)
+        return self._comments_table
+
+    def warm(self):
+        """
+        Open the connection pool and TLS session with a cheap point read.
+        """
+        self.table.get_item(Key={'ticket_id': '__warmup__'})
+
+    def put_ticket(self, item, only_if_new=False):
+        params = {'Item': self._record(item)}
+        if only_if_new:
+            params['ConditionExpression'] = 'attribute_not_exists(ticket_id)'
+        self.table.put_item(**params)
+
+    def get_ticket(self, ticket_id, consistent=False, attributes=None):
+        params = {}
+        if attributes:
+            params.update(projection_expression(_stored_attributes(attributes)))
+        response = self.table.get_item(Key={'ticket_id': ticket_id}, ConsistentRead=consistent, **params)
+        item = response.get('Item')
+        if item is None:
+            return None
+        if attributes and 'comments' not in attributes:
+            return _projected(_without_comments(item), attributes)
+        newest, _ = self._query_comments(ticket_id, RECENT_COMMENTS, newest_first=True, consistent=consistent)
+        return _projected(_with_recent_comments(item, newest[::-1]), attributes)
+
+    def append_comment(self, ticket_id, comment, timestamp, request_token=None):
+        # One transaction, so a retry never counts a comment twice or stores
+        # it uncounted. The small constant-size update on the ticket doubles
+        # as the existence check; ClientRequestToken makes a retry after an
+        # ambiguous failure (timeout) a no-op for ten minutes, and the comment
+        # key reuses the token so a later retry overwrites the same item.
+        params = {'ClientRequestToken': request_token} if request_token else {}
+        try:
+            self.table.transact_write_items(TransactItems=[
+                {'Update': {
+                    'Key': {'ticket_id': ticket_id},
+                    'UpdateExpression': 'SET updated_at = :timestamp ADD comment_count :one',
+                    'ConditionExpression': 'attribute_exists(ticket_id)',
+                    'ExpressionAttributeValues': {
+                        ':timestamp': timestamp,
+                        ':one': 1
+                    }
+                }},
+                {'Put': {
+                    'TableName': self.comments_table_name,
+                    'Item': _comment_record(ticket_id, comment, request_token)
+                }}
+            ], **params)
+        except ClientError as e:
+            if 'ConditionalCheckFailed' in _cancellation_reasons(e):
+                raise _conditional_check_failed('UpdateItem') from e
+            raise
+
+    def update_status(self, ticket_id, status, allowed_from, timestamp, expected_version=None, expires_at=None):
+        values = {
+            ':status': status,
+            ':timestamp': timestamp,
+            ':one': 1
+        }
+        allowed = []
+        for index, previous in enumerate(allowed_from):
+            values[f':from{index}'] = previous
+            allowed.append(f':from{index}')
+        condition = f"#status IN ({', '.join(allowed)})"
+        if expected_version == 0:
+            condition += ' AND attribute_not_exists(version)'
+        elif expected_version is not None:
+            condition += ' AND version = :version'
+            values[':version'] = expected_version
+        if expires_at is None:
+            update = 'SET #status = :status, updated_at = :timestamp ADD version :one REMOVE expires_at'
+        else:
+            update = 'SET #status = :status, updated_at = :timestamp, expires_at = :expires_at ADD version :one'
+            values[':expires_at'] = expires_at
+        response = self.table.update_item(
+            Key={'ticket_id': ticket_id},
+            UpdateExpression=update,
+            ConditionExpression=condition,
+            ExpressionAttributeNames={'#status': 'status'},
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW',
+            # The current item comes back with a failed check, so callers can
+            # tell 404 from 409 without a second read
+            ReturnValuesOnConditionCheckFailure='ALL_OLD'
+        )
+        return _without_comments(response['Attributes'])
+
+    def query_comments(self, ticket_id, limit, start_key=None):
+        return self._query_comments(ticket_id, limit, start_key=start_key)
+
+    def _query_comments(self, ticket_id, limit, start_key=None, newest_first=False, consistent=False):
+        params = {
+            'KeyConditionExpression': 'ticket_id = :ticket_id',
+            'ExpressionAttributeValues': {
+                ':ticket_id': ticket_id
+            },
+            'ScanIndexForward': not newest_first,
+            'ConsistentRead': consistent,
+            'Limit': limit
+        }
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        response = self.comments_table.query(**params)
+        comments = [_public_comment(item) for item in response.get('Items', [])]
+        return comments, response.get('LastEvaluatedKey')
+
+    def delete_comments(self, ticket_id):
+        params = {
+            'KeyConditionExpression': 'ticket_id = :ticket_id',
+            'ExpressionAttributeValues': {':ticket_id': ticket_id},
+            **projection_expression(('ticket_id', 'comment_key'))
+        }
+        failed = 0
+        while True:
+            response = self.comments_table.query(**params)
+            for chunk in _chunks(response.get('Items', []), self.BATCH_WRITE_SIZE):
+                failed += len(self._drain_unprocessed(
+                    lambda pending: self.comments_table.batch_delete_item(Keys=pending).get('UnprocessedKeys', []),
+                    chunk
+                ))
+            if 'LastEvaluatedKey' not in response:
+                return failed
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    def query_by_caller(self, caller_id, limit, start_key=None, attributes=None):
+        if self.caller_shards > 1:
+            return self._query_caller_shards(caller_id, limit, start_key, attributes)
+        params = {
+            'IndexName': 'CallerIdIndex',
+            'KeyConditionExpression': 'caller_id = :caller_id',
+            'ExpressionAttributeValues': {
+                ':caller_id': caller_id
+            },
+            'ScanIndexForward': False,  # Sort by created_at descending
+            'Limit': limit
+        }
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        if attributes:
+            params.update(projection_expression(attributes))
+        response = self.table.query(**params)
+        items = [_decode_ticket(item) for item in response.get('Items', [])]
+        return items, response.get('LastEvaluatedKey')
+
+    def scan_segment(self, segment, total_segments, limit, start_key=None):
+        params = {'Segment': segment, 'TotalSegments': total_segments, 'Limit': limit}
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        response = self.table.scan(**params)
+        # Exports keep the TTL so imported tickets still expire on schedule
+        items = [_decode_ticket(item, keep_ttl=True) for item in response.get('Items', [])]
+        return items, response.get('LastEvaluatedKey')
+
+    def scan_comment_segment(self, segment, total_segments, limit, start_key=None):
+        params = {'Segment': segment, 'TotalSegments': total_segments, 'Limit': limit}
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        response = self.comments_table.scan(**params)
+        return [_decode_comment(record) for record in response.get('Items', [])], response.get('LastEvaluatedKey')
+
+    def put_tickets(self, items):
+        return self._put_batches(self.table, [self._record(item) for item in items])
+
+    def put_comments(self, records):
+        return self._put_batches(self.comments_table, [_stored_comment(record) for record in records])
+
+    def _put_batches(self, table, items):
+        unprocessed = []
+        for chunk in _chunks(items, self.BATCH_WRITE_SIZE):
+            unprocessed.extend(self._drain_unprocessed(
+                lambda pending: table.batch_write_item(Items=pending).get('UnprocessedItems', []),
+                chunk
+            ))
+        return unprocessed
+
+    def get_tickets(self, ticket_ids, consistent=False):
+        found = {}
+
+        def fetch(pending):
+            response = self.table.batch_get_item(Keys=pending, ConsistentRead=consistent)
+            for item in response.get('Items', []):
+                found[item['ticket_id']] = _without_comments(item)
+            return response.get('UnprocessedKeys', [])
+
+        unprocessed = []
+        # BatchGetItem rejects duplicate keys within one request
+        unique_ids = list(dict.fromkeys(ticket_ids))
+        for chunk in _chunks(unique_ids, self.BATCH_GET_SIZE):
+            keys = [{'ticket_id': ticket_id} for ticket_id in chunk]
+            unprocessed.extend(self._drain_unprocessed(fetch, keys))
+        return found, [key['ticket_id'] for key in unprocessed]
+
+    def _record(self, item):
+        record = _ticket_record(item)
+        if self.caller_shards > 1 and 'caller_id' in record:
+            record['caller_shard'] = caller_shard_key(record['caller_id'], record['ticket_id'], self.caller_shards)
+        return record
+
+    def _query_caller_shards(self, caller_id, limit, start_key, attributes):
+        """
+        Scatter-gather over CallerShardIndex: query every shard in parallel
+        from the page boundary (the last ticket of the previous page), then
+        k-way merge by created_at, newest first. Pages and cursors have the
+        same shape as CallerIdIndex ones.
+        """
+        boundary = _caller_order(start_key) if start_key else None
+        projection = {}
+        if attributes:
+            projection = projection_expression(tuple(dict.fromkeys((*attributes, 'ticket_id', 'created_at'))))
+
+        def query_shard(shard):
+            params = {
+                'IndexName': 'CallerShardIndex',
+                'KeyConditionExpression': 'caller_shard = :shard',
+                'ExpressionAttributeValues': {':shard': f'{caller_id}#{shard}'},
+                'ScanIndexForward': False,
+                # One extra: the boundary ticket itself sorts into its shard's page
+                'Limit': limit + 1,
+                **projection
+            }
+            if boundary:
+                params['KeyConditionExpression'] += ' AND created_at <= :created_at'
+                params['ExpressionAttributeValues'][':created_at'] = boundary[0]
+            response = self.table.query(**params)
+            return [_decode_ticket(item) for item in response.get('Items', [])], 'LastEvaluatedKey' in response
+
+        # Each query runs in a copy of this request's context so retries
+        # keep its deadline and DynamoDB calls land on its metrics
+        futures = [self.shard_executor().submit(contextvars.copy_context().run, query_shard, shard)
+                   for shard in range(self.caller_shards)]
+        results = [future.result() for future in futures]
+
+        merged = heapq.merge(*(items for items, _ in results), key=_caller_order, reverse=True)
+        if boundary:
+            merged = (item for item in merged if _caller_order(item) < boundary)
+        page = list(itertools.islice(merged, limit + 1))
+        more = len(page) > limit or any(truncated for _, truncated in results)
+        page = page[:limit]
+        last_key = None
+        if page and more:
+            last_key = {'ticket_id': page[-1]['ticket_id'], 'caller_id': caller_id, 'created_at': page[-1]['created_at']}
+        if attributes:
+            page = [{name: item[name] for name in attributes if name in item} for item in page]
+        return page, last_key
+
+    def shard_executor(self):
+        """
+        Worker pool for shard queries, created on first use. Locked so
+        concurrent first requests (POST /batch workers, local server
+        threads) share one pool instead of each leaking their own.
+        """
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=min(self.caller_shards, 16),
+                                                        thread_name_prefix='caller-shard')
+        return self._executor
+
+    def _drain_unprocessed(self, send, pending):
+        return drain_unprocessed(
+            send, pending, self.UNPROCESSED_MAX_ATTEMPTS, self.UNPROCESSED_BASE_DELAY, self.UNPROCESSED_MAX_DELAY
+        )
+
+
+def drain_unprocessed(send, pending, max_attempts=5, base_delay=0.05, max_delay=1.0):
+    """
+    Send a batch and resend whatever DynamoDB leaves unprocessed, with
+    full-jitter backoff bounded by the invocation deadline.
+    Returns what is still unprocessed after the final attempt.
+    """
+    for attempt in range(max_attempts):
+        pending = send(pending)
+        if not pending:
+            return []
+        if attempt < max_attempts - 1:
+            metrics.add('UnprocessedResends')
+            delay = retry.full_jitter(attempt, base_delay, max_delay)
+            remaining = retry.time_remaining()
+            if remaining is not None and delay >= remaining:
+                print(f"{len(pending)} batch requests unprocessed at the invocation deadline")
+                return pending
+            retry.sleep(delay)
+    print(f"{len(pending)} batch requests still unprocessed after {max_attempts} attempts")
+    return pending
+
+
+def get_dynamodb_client(region):
+    """
+    Return the cached low-level DynamoDB client for region, creating it once.
+    """
+    client = _clients.get(region)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(region)
+            if client is None:
+                import boto3
+                client = boto3.client('dynamodb', region_name=region, config=client_config())
+                _clients[region] = client
+    return client
+
+
+def client_config():
+    """
+    botocore settings for the DynamoDB client, from environment variables:
+    DYNAMODB_CONNECT_TIMEOUT (default 1s), DYNAMODB_READ_TIMEOUT (default 2s)
+    and DYNAMODB_MAX_POOL_CONNECTIONS (default 25). botocore's own retries
+    are disabled; the retry module owns backoff, budget and deadlines.
+    """
+    from botocore.config import Config
+    connect_timeout, read_timeout = retry.client_timeouts()
+    return Config(
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout,
+        max_pool_connections=int(os.environ.get('DYNAMODB_MAX_POOL_CONNECTIONS', '25')),
+        retries={'total_max_attempts': 1, 'mode': 'standard'},
+        tcp_keepalive=True
+    )
+
+
+class ClientTable:
+    """
+    Table-shaped adapter over the low-level DynamoDB client.
+    Accepts and returns plain Python values like boto3's Table resource,
+    without paying for the resource model at cold start.
+    """
+
+    _SERIALIZED_MAPS = ('Item', 'Key', 'ExpressionAttributeValues', 'ExclusiveStartKey')
+    _DESERIALIZED_MAPS = ('Item', 'Attributes', 'LastEvaluatedKey')
+
+    def __init__(self, client, table_name):
+        from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+        self.client = client
+        self.table_name = table_name
+        self._serializer = TypeSerializer()
+        self._deserializer = TypeDeserializer()
+
+    def put_item(self, **kwargs):
+        return self._call('put_item', kwargs)
+
+    def get_item(self, **kwargs):
+        return self._call('get_item', kwargs)
+
+    def update_item(self, **kwargs):
+        return self._call('update_item', kwargs)
+
+    def delete_item(self, **kwargs):
+        return self._call('delete_item', kwargs)
+
+    def query(self, **kwargs):
+        return self._call('query', kwargs)
+
+    def scan(self, **kwargs):
+        return self._call('scan', kwargs)
+
+    def transact_write_items(self, TransactItems, ClientRequestToken=None):
+        """
+        TransactWriteItems with plain values. Actions write this table
+        unless they name another with TableName.
+        """
+        actions = []
+        for action in TransactItems:
+            (kind, params), = action.items()
+            params = dict(params)
+            params.setdefault('TableName', self.table_name)
+            for name in self._SERIALIZED_MAPS:
+                if name in params:
+                    params[name] = self.serialize(params[name])
+            actions.append({kind: params})
+        request = {'TransactItems': actions}
+        if ClientRequestToken:
+            request['ClientRequestToken'] = ClientRequestToken
+        return self._send('transact_write_items', request)
+
+    def batch_write_item(self, Items):
+        """
+        BatchWriteItem of put requests scoped to this table (at most 25 items).
+        Returns {'UnprocessedItems': [item, ...]} with plain values.
+        """
+        response = self._send('batch_write_item', {
+            'RequestItems': {
+                self.table_name: [{'PutRequest': {'Item': self.serialize(item)}} for item in Items]
+            }
+        })
+        unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+        return {'UnprocessedItems': [self.deserialize(request['PutRequest']['Item']) for request in unprocessed]}
+
+    def batch_delete_item(self, Keys):
+        """
+        BatchWriteItem of delete requests scoped to this table (at most 25 keys).
+        Returns {'UnprocessedKeys': [key, ...]} with plain values.
+        """
+        response = self._send('batch_write_item', {
+            'RequestItems': {
+                self.table_name: [{'DeleteRequest': {'Key': self.serialize(key)}} for key in Keys]
+            }
+        })
+        unprocessed = response.get('UnprocessedItems', {}).get(self.table_name, [])
+        return {'UnprocessedKeys': [self.deserialize(request['DeleteRequest']['Key']) for request in unprocessed]}
+
+    def batch_get_item(self, Keys, ConsistentRead=False):
+        """
+        BatchGetItem scoped to this table (at most 100 keys).
+        Returns {'Items': [...], 'UnprocessedKeys': [...]} with plain values.
+        """
+        response = self._send('batch_get_item', {
+            'RequestItems': {
+                self.table_name: {
+                    'Keys': [self.serialize(key) for key in Keys],
+                    'ConsistentRead': ConsistentRead
+                }
+            }
+        })
+        items = response.get('Responses', {}).get(self.table_name, [])
+        unprocessed = response.get('UnprocessedKeys', {}).get(self.table_name, {}).get('Keys', [])
+        return {
+            'Items': [self.deserialize(item) for item in items],
+            'UnprocessedKeys': [self.deserialize(key) for key in unprocessed]
+        }
+
+    def serialize(self, values):
+        return {name: self._serializer.serialize(value) for name, value in values.items()}
+
+    def deserialize(self, values):
+        return {name: self._deserializer.deserialize(value) for name, value in values.items()}
+
+    def _call(self, operation_name, kwargs):
+        request = dict(kwargs, TableName=self.table_name)
+        for name in self._SERIALIZED_MAPS:
+            if name in request:
+                request[name] = self.serialize(request[name])
+        response = self._send(operation_name, request)
+        for name in self._DESERIALIZED_MAPS:
+            if name in response:
+                response[name] = self.deserialize(response[name])
+        if 'Items' in response:
+            response['Items'] = [self.deserialize(item) for item in response['Items']]
+        return response
+
+    def _send(self, operation_name, request):
+        """
+        Call the client, recording call time and consumed capacity on the
+        current request's metrics.
+        """
+        request.setdefault('ReturnConsumedCapacity', 'TOTAL')
+        metrics.add('DynamoDBCalls')
+        with metrics.span('DynamoDBTime'):
+            try:
+                response = getattr(self.client, operation_name)(**request)
+            except ClientError as e:
+                # ReturnValuesOnConditionCheckFailure puts the item on the error
+                if 'Item' in e.response:
+                    e.response['Item'] = self.deserialize(e.response['Item'])
+                raise
+        metrics.record_consumed_capacity(operation_name, response.get('ConsumedCapacity'))
+        return response
+
+
+class MemoryTicketStore(TicketStore):
+    """
+    Embedded in-process ticket store for local runs and load tests.
+    Keeps a caller_id -> (created_at, ticket_id) sorted index that mirrors
+    CallerIdIndex, so caller queries never scan the whole store.
+    """
+
+    def __init__(self):
+        self._items = {}
+        self._caller_index = {}
+        self._comments = {}
+        self._lock = threading.Lock()
+
+    def put_ticket(self, item, only_if_new=False):
+        item = _ticket_record(_copy_item(item))
+        ticket_id = item['ticket_id']
+        with self._lock:
+            previous = self._items.get(ticket_id)
+            if previous is not None:
+                if only_if_new:
+                    raise _conditional_check_failed('PutItem')
+                self._unindex(previous)
+            self._items[ticket_id] = item
+            entries = self._caller_index.setdefault(item['caller_id'], [])
+            bisect.insort(entries, (item['created_at'], ticket_id))
+
+    def get_ticket(self, ticket_id, consistent=False, attributes=None):
+        with self._lock:
+            item = self._items.get(ticket_id)
+            if item is None:
+                return None
+            newest = self._comments.get(ticket_id, [])[-RECENT_COMMENTS:] if RECENT_COMMENTS else []
+            return _projected(_with_recent_comments(_copy_item(item), [_public_comment(c) for c in newest]), attributes)
+
+    def append_comment(self, ticket_id, comment, timestamp, request_token=None):
+        # Applied under the lock and never fails half way, so there is
+        # nothing for request_token to deduplicate
+        with self._lock:
+            item = self._items.get(ticket_id)
+            if item is None:
+                raise _conditional_check_failed('UpdateItem')
+            item['updated_at'] = timestamp
+            item['comment_count'] = item.get('comment_count', 0) + 1
+            record = _comment_record(ticket_id, comment, request_token)
+            bisect.insort(self._comments.setdefault(ticket_id, []), record, key=lambda c: c['comment_key'])
+
+    def update_status(self, ticket_id, status, allowed_from, timestamp, expected_version=None, expires_at=None):
+        with self._lock:
+            item = self._items.get(ticket_id)
+            if item is None:
+                raise _conditional_check_failed('UpdateItem')
+            if item.get('status') not in allowed_from or (
+                    expected_version is not None and item.get('version', 0) != expected_version):
+                raise _conditional_check_failed('UpdateItem', current=_copy_item(item))
+            item['status'] = status
+            item['updated_at'] = timestamp
+            item['version'] = item.get('version', 0) + 1
+            if expires_at is None:
+                item.pop('expires_at', None)
+            else:
+                item['expires_at'] = expires_at
+            return _without_comments(_copy_item(item))
+
+    def query_comments(self, ticket_id, limit, start_key=None):
+        with self._lock:
+            records = self._comments.get(ticket_id, [])
+            start = 0
+            if start_key:
+                start = bisect.bisect_right(records, start_key['comment_key'], key=lambda c: c['comment_key'])
+            page = records[start:start + limit]
+            more = start + limit < len(records)
+        last_key = None
+        if page and more:
+            last_key = {'ticket_id': ticket_id, 'comment_key': page[-1]['comment_key']}
+        return [_public_comment(record) for record in page], last_key
+
+    def delete_comments(self, ticket_id):
+        with self._lock:
+            self._comments.pop(ticket_id, None)
+        return 0
+
+    def query_by_caller(self, caller_id, limit, start_key=None, attributes=None):
+        with self._lock:
+            entries = self._caller_index.get(caller_id, [])
+            end = len(entries)
+            if start_key:
+                end = bisect.bisect_left(entries, (start_key['created_at'], start_key['ticket_id']))
+            page = entries[max(end - limit, 0):end][::-1]
+            items = [_decode_ticket(_copy_item(self._items[ticket_id])) for _, ticket_id in page]
+        last_key = None
+        if page and end - limit > 0:
+            last = items[-1]
+            last_key = {key: last[key] for key in ('ticket_id', 'caller_id', 'created_at')}
+        if attributes:
+            items = [{name: item[name] for name in attributes if name in item} for item in items]
+        return items, last_key
+
+    def scan_segment(self, segment, total_segments, limit, start_key=None):
+        with self._lock:
+            ticket_ids = sorted(
+                ticket_id for ticket_id in self._items
+                if zlib.crc32(ticket_id.encode('utf-8')) % total_segments == segment
+            )
+            start = bisect.bisect_right(ticket_ids, start_key['ticket_id']) if start_key else 0
+            page = ticket_ids[start:start + limit]
+            items = [_decode_ticket(_copy_item(self._items[ticket_id]), keep_ttl=True) for ticket_id in page]
+        last_key = {'ticket_id': page[-1]} if page and start + limit < len(ticket_ids) else None
+        return items, last_key
+
+    def scan_comment_segment(self, segment, total_segments, limit, start_key=None):
+        with self._lock:
+            keys = sorted(
+                (ticket_id, record['comment_key'], index)
+                for ticket_id, records in self._comments.items()
+                if zlib.crc32(ticket_id.encode('utf-8')) % total_segments == segment
+                for index, record in enumerate(records)
+            )
+            start = bisect.bisect_right(keys, (start_key['ticket_id'], start_key['comment_key'], len(keys))) \
+                if start_key else 0
+            page = keys[start:start + limit]
+            items = [_decode_comment(dict(self._comments[ticket_id][index])) for ticket_id, _, index in page]
+        last_key = None
+        if page and start + limit < len(keys):
+            last_key = {'ticket_id': page[-1][0], 'comment_key': page[-1][1]}
+        return items, last_key
+
+    def put_tickets(self, items):
+        for item in items:
+            self.put_ticket(item)
+        return []
+
+    def put_comments(self, records):
+        with self._lock:
+            for record in records:
+                record = _stored_comment(record)
+                comments = self._comments.setdefault(record['ticket_id'], [])
+                # Writing a key again replaces it, as BatchWriteItem does
+                comments[:] = [c for c in comments if c['comment_key'] != record['comment_key']]
+                bisect.insort(comments, record, key=lambda c: c['comment_key'])
+        return []
+
+    def get_tickets(self, ticket_ids, consistent=False):
+        found = {}
+        for ticket_id in ticket_ids:
+            with self._lock:
+                item = self._items.get(ticket_id)
+                if item is not None:
+                    found[ticket_id] = _without_comments(_copy_item(item))
+        return found, []
+
+    def _unindex(self, item):
+        entries = self._caller_index.get(item['caller_id'], [])
+        position = bisect.bisect_left(entries, (item['created_at'], item['ticket_id']))
+        if position < len(entries) and entries[position][1] == item['ticket_id']:
+            del entries[position]
+
+
+def caller_shard_key(caller_id, ticket_id, shards):
+    """
+    Sharded caller key "{caller_id}#{N}" with N derived from the ticket id,
+    so one caller's tickets spread evenly over shards index partitions.
+    """
+    return f"{caller_id}#{zlib.crc32(ticket_id.encode('utf-8')) % shards}"
+
+
+def _caller_order(item):
+    return item['created_at'], item['ticket_id']
+
+
+def projection_expression(attributes):
+    """
+    Build ProjectionExpression parameters, aliasing every name so reserved
+    words such as status need no special casing.
+    """
+    names = {f'#p{index}': name for index, name in enumerate(attributes)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names
+    }
+
+
+def _stored_attributes(attributes):
+    """
+    Attributes to project for a ticket read of attributes. ticket_id is
+    always read, and legacy inline comments are needed for comment_count.
+    """
+    stored = ['ticket_id', *attributes]
+    if 'comment_count' in attributes and 'comments' not in attributes:
+        stored.append('comments')
+    return tuple(dict.fromkeys(stored))
+
+
+def _projected(item, attributes):
+    if not attributes:
+        return item
+    return {name: item[name] for name in attributes if name in item}
+
+
+def _conditional_check_failed(operation, current=None):
+    """
+    ClientError matching DynamoDB's; current is returned as 'Item' the way
+    ReturnValuesOnConditionCheckFailure=ALL_OLD does.
+    """
+    response = {'Error': {'Code': 'ConditionalCheckFailedException',
+                          'Message': 'The conditional request failed'}}
+    if current is not None:
+        response['Item'] = current
+    return ClientError(response, operation)
+
+
+def _cancellation_reasons(error):
+    """
+    Codes of a TransactionCanceledException's CancellationReasons, one per
+    action ('None' for actions that did not cancel it); empty for other errors.
+    """
+    if error.response.get('Error', {}).get('Code') != 'TransactionCanceledException':
+        return []
+    return [reason.get('Code') for reason in error.response.get('CancellationReasons', [])]
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _ticket_record(item):
+    """
+    Ticket attributes as stored: comments live in their own items.
+    Legacy inline comments are kept for reads that merge them back in.
+    """
+    record = dict(item)
+    if not record.get('comments'):
+        record.pop('comments', None)
+    if 'issue_description' in record:
+        record['issue_description'] = compression.compressor.encode(record['issue_description'])
+    return record
+
+
+def _comment_record(ticket_id, comment, request_token=None):
+    """
+    Comment item keyed by (ticket_id, comment_key). comment_key sorts by
+    added_at; the suffix (request_token, or random) keeps same-timestamp
+    comments distinct.
+    """
+    record = dict(comment)
+    record['comment_text'] = compression.compressor.encode(record['comment_text'])
+    record['ticket_id'] = ticket_id
+    record['comment_key'] = f"{comment['added_at']}#{request_token or uuid.uuid4().hex[:8]}"
+    return record
+
+
+def _stored_comment(record):
+    """
+    Comment item for a record from scan_comment_segment, text compressed again.
+    """
+    stored = dict(record)
+    stored['comment_text'] = compression.compressor.encode(stored['comment_text'])
+    return stored
+
+
+def _decode_comment(record):
+    record['comment_text'] = compression.compressor.decode(record['comment_text'])
+    return record
+
+
+def _public_comment(record):
+    return {'comment_text': compression.compressor.decode(record['comment_text']), 'added_at': record['added_at']}
+
+
+def _decode_ticket(item, keep_ttl=False):
+    """
+    Restore text stored compressed by _ticket_record and drop the internal
+    caller_shard index key and, unless keep_ttl, the expires_at TTL.
+    """
+    item.pop('caller_shard', None)
+    if not keep_ttl:
+        item.pop('expires_at', None)
+    if 'issue_description' in item:
+        item['issue_description'] = compression.compressor.decode(item['issue_description'])
+    return item
+
+
+def _with_recent_comments(item, comments):
+    """
+    Attach the newest comments to a ticket read, merging any legacy
+    comments still stored inline from the list_append layout.
+    """
+    _decode_ticket(item)
+    legacy = item.pop('comments', None) or []
+    if legacy:
+        comments = sorted(legacy + comments, key=lambda c: c['added_at'])[-RECENT_COMMENTS:] if RECENT_COMMENTS else []
+    item['comments'] = comments
+    item['comment_count'] = item.get('comment_count', 0) + len(legacy)
+    return item
+
+
+def full_ticket(item, comments):
+    """
+    A ticket item as stored (e.g. a stream image) with its complete comment
+    history, oldest first, as {'comment_text', 'added_at'} dicts.
+    """
+    item = _decode_ticket(dict(item))
+    legacy = item.pop('comments', None) or []
+    item['comments'] = sorted(legacy + list(comments), key=lambda c: c['added_at'])
+    item['comment_count'] = item.get('comment_count', 0) + len(legacy)
+    return item
+
+
+def _without_comments(item):
+    _decode_ticket(item)
+    legacy = item.pop('comments', None) or []
+    item['comment_count'] = item.get('comment_count', 0) + len(legacy)
+    return item
+
+
+def _copy_item(item):
+    """
+    Copy a ticket item so callers never share mutable state with the store.
+    """
+    copied = dict(item)
+    if 'comments' in copied:
+        copied['comments'] = [dict(comment) for comment in copied['comments']]
+    return copied
@@ -0,0 +1,54 @@
+import pytest
+import secrets
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import mock_itsm_handler
+from caller_summary import MemoryCallerSummaries
+from object_store import MemoryObjectStore
+from rate_limit import RateLimiter
+from search_index import MemorySearchIndex
+from ticket_archive import MemoryArchiveIndex, TicketArchive
+from ticket_cache import TicketCache
+from ticket_store import MemoryTicketStore
+
+
+class HandlerBackends(SimpleNamespace):
+    """The backends mock_itsm_handler is using, by module global name"""
+
+    def use(self, **backends):
+        """
+        Swap backends in for the rest of the test (the fixture restores
+        the originals).
+        """
+        for name, backend in backends.items():
+            if not hasattr(self, name):
+                raise AttributeError(f"Not a handler backend: {name}")
+            setattr(self, name, backend)
+            setattr(mock_itsm_handler, name, backend)
+        return self
+
+
+@pytest.fixture
+def handler_backends():
+    """
+    Fresh memory backends behind the handler, so no test sees another's
+    tickets, and a cursor signing key of its own
+    """
+    backends = HandlerBackends(
+        store=MemoryTicketStore(),
+        search_index=MemorySearchIndex(),
+        caller_summaries=MemoryCallerSummaries(),
+        ticket_archive=TicketArchive(MemoryObjectStore(), MemoryArchiveIndex()),
+        archive_cache=TicketCache(),
+        ticket_cache=TicketCache(),
+        rate_limiter=RateLimiter({})
+    )
+    with patch.multiple(mock_itsm_handler, **vars(backends)), \
+            patch('pagination._secret', secrets.token_bytes(32)):
+        yield backends
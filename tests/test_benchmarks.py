@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+# Add src/lambda and benchmarks to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import load_test
+import metrics
+import mock_itsm_handler
+
+
+@pytest.fixture(autouse=True)
+def restore_handler_state():
+    """load_test swaps the handler's stores, search index, cache, retry policy and metrics sink"""
+    with patch.object(mock_itsm_handler, 'store'), \
+            patch.object(mock_itsm_handler, 'search_index'), \
+            patch.object(mock_itsm_handler, 'caller_summaries'), \
+            patch.object(mock_itsm_handler, 'ticket_cache'), \
+            patch.object(mock_itsm_handler, 'retry_policy'), \
+            patch.object(metrics, 'sink'):
+        yield
+
+
+class TestStubbedStore:
+    """Test the DynamoDB stand-in used by the load test"""
+
+    def test_store_round_trip(self):
+        """Test the real DynamoDB store code runs against the stub tables"""
+        store, tables = load_test.build_store(latency=0, throttle_rate=0, seed=1)
+        for number in range(3):
+            store.put_ticket({
+                'ticket_id': f't-{number}',
+                'caller_id': 'user-001',
+                'issue_description': 'Test issue',
+                'status': 'open',
+                'created_at': f'2026-02-09T12:00:0{number}Z',
+                'updated_at': f'2026-02-09T12:00:0{number}Z',
+                'comment_count': 0
+            })
+        store.append_comment('t-1', {'comment_text': 'Hello', 'added_at': '2026-02-09T12:01:00Z'},
+                             '2026-02-09T12:01:00Z')
+
+        ticket = store.get_ticket('t-1')
+        first, last_key = store.query_by_caller('user-001', limit=2)
+        second, end = store.query_by_caller('user-001', limit=2, start_key=last_key)
+
+        assert ticket['comment_count'] == 1
+        assert ticket['comments'] == [{'comment_text': 'Hello', 'added_at': '2026-02-09T12:01:00Z'}]
+        assert [t['ticket_id'] for t in first + second] == ['t-2', 't-1', 't-0']
+        assert end is None
+        assert tables[load_test.TABLE_NAME].calls > 0
+
+    def test_missing_ticket_comment_fails_condition(self):
+        """Test attribute_exists conditions are enforced"""
+        store, _ = load_test.build_store(latency=0, throttle_rate=0, seed=1)
+        with pytest.raises(Exception) as excinfo:
+            store.append_comment('missing', {'comment_text': 'x', 'added_at': 'now'}, 'now')
+        assert excinfo.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+class TestLoadTest:
+    """Test the load test harness"""
+
+    def test_reports_percentiles_per_route(self):
+        """Test a small run reports every route of the call-centre flow"""
+        results = load_test.run(load_test.parse_args([
+            '--calls', '5', '--workers', '2', '--latency-ms', '0', '--seed', '1'
+        ]))
+
+        assert results['requests'] == 5 * (1 + 3 + 2 + 1)
+        assert set(results['routes']) == {
+            'POST /tickets', 'GET /tickets/{id}', 'POST /tickets/{id}/comments', 'GET /tickets'
+        }
+        row = results['routes']['POST /tickets']
+        assert row['requests'] == 5
+        assert row['errors'] == 0
+        assert row['p50_ms'] <= row['p95_ms'] <= row['p99_ms'] <= row['max_ms']
+        assert row['write_capacity_units'] > 0
+
+    def test_throttles_are_retried(self):
+        """Test throttled DynamoDB calls show up as retries, not errors"""
+        with patch('retry.sleep'):
+            results = load_test.run(load_test.parse_args([
+                '--calls', '10', '--workers', '1', '--latency-ms', '0', '--throttle-rate', '0.2', '--seed', '3'
+            ]))
+
+        assert results['dynamodb']['throttles'] > 0
+        assert sum(row['retries'] for row in results['routes'].values()) > 0
+
+    def test_baseline_comparison(self):
+        """Test p95/p99 growth beyond the tolerance is reported"""
+        baseline = {'routes': {'GET /tickets': {'p95_ms': 10.0, 'p99_ms': 20.0}}}
+        results = {'routes': {'GET /tickets': {'p95_ms': 11.0, 'p99_ms': 30.0}}}
+
+        assert load_test.compare(results, baseline, tolerance=0.2) == ['GET /tickets p99_ms: 20.0 -> 30.0']
+
+    def test_percentile_nearest_rank(self):
+        """Test nearest-rank percentiles"""
+        values = list(range(1, 101))
+        assert load_test.percentile(values, 50) == 50
+        assert load_test.percentile(values, 99) == 99
+        assert load_test.percentile([], 50) is None
@@ -0,0 +1,318 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import caller_summarizer
+import caller_summary
+import mock_itsm_handler
+from caller_summary import DynamoDBCallerSummaries, MemoryCallerSummaries, apply_change, new_summary, recent_page
+from ticket_store import MemoryTicketStore
+
+
+def ticket(number, status='open', caller_id='user-001', **extra):
+    item = {
+        'ticket_id': f't-{number:02d}',
+        'caller_id': caller_id,
+        'issue_description': f'Issue {number}',
+        'status': status,
+        'created_at': f'2026-02-09T12:00:{number:02d}Z',
+        'updated_at': f'2026-02-09T12:00:{number:02d}Z',
+        'comment_count': 0
+    }
+    item.update(extra)
+    return item
+
+
+def image(item):
+    """DynamoDB stream image for a plain item"""
+    return {name: {'N': str(value)} if isinstance(value, int) else {'S': value} for name, value in item.items()}
+
+
+def stream_record(sequence, old=None, new=None):
+    images = {'SequenceNumber': str(sequence)}
+    if old:
+        images['OldImage'] = image(old)
+    if new:
+        images['NewImage'] = image(new)
+    return {'eventName': 'MODIFY' if old and new else ('INSERT' if new else 'REMOVE'), 'dynamodb': images}
+
+
+class TestApplyChange:
+    """Test folding ticket changes into a summary"""
+
+    def test_insert_modify_remove(self):
+        """Test counts, recent order and last activity follow the changes"""
+        summary = new_summary('user-001')
+        apply_change(summary, None, ticket(1))
+        apply_change(summary, None, ticket(2))
+        apply_change(summary, ticket(1), ticket(1, status='resolved', updated_at='2026-02-09T13:00:00Z'))
+        apply_change(summary, ticket(2), None)
+
+        assert summary['status_counts'] == {'open': 0, 'resolved': 1}
+        assert summary['ticket_count'] == 1
+        assert [entry['ticket_id'] for entry in summary['recent']] == ['t-01']
+        assert summary['last_activity_at'] == '2026-02-09T13:00:00Z'
+
+    def test_redelivered_changes_not_double_counted(self):
+        """Test re-applying the same records leaves the summary unchanged"""
+        summary = new_summary('user-001')
+        changes = [(None, ticket(1)), (ticket(1), ticket(1, status='closed'))]
+        for old, new in changes + changes:
+            apply_change(summary, old, new)
+
+        assert summary['status_counts'] == {'open': 0, 'closed': 1}
+        assert summary['ticket_count'] == 1
+
+    def test_redelivered_older_ticket_changes_not_double_counted(self):
+        """Test re-applied records for tickets outside the recent list are skipped"""
+        summary = new_summary('user-001')
+        with patch('caller_summary.RECENT_TICKETS', 1):
+            apply_change(summary, None, ticket(1), '100')
+            apply_change(summary, None, ticket(2), '200')
+            changes = [
+                (ticket(1), ticket(1, status='in_progress'), '300'),
+                (ticket(1, status='in_progress'), ticket(1, status='resolved'), '400'),
+            ]
+            for old, new, sequence in changes + changes:
+                apply_change(summary, old, new, sequence)
+            apply_change(summary, ticket(1, status='resolved'), None, '500')
+            apply_change(summary, ticket(1, status='resolved'), None, '500')
+
+        assert summary['status_counts'] == {'open': 1, 'in_progress': 0, 'resolved': 0}
+        assert summary['ticket_count'] == 1
+        assert summary['applied'] == [['t-01', '500']]
+
+    def test_applied_changes_bounded(self):
+        """Test only the latest older-ticket changes are remembered"""
+        summary = new_summary('user-001')
+        with patch('caller_summary.RECENT_TICKETS', 1), patch('caller_summary.APPLIED_CHANGES', 2):
+            apply_change(summary, None, ticket(9), '900')
+            for number in range(1, 4):
+                apply_change(summary, ticket(number), ticket(number, status='resolved'), str(number))
+
+        assert summary['applied'] == [['t-02', '2'], ['t-03', '3']]
+
+    def test_recent_entries_hold_list_attributes(self):
+        """Test recent entries keep only the summary view attributes"""
+        summary = new_summary('user-001')
+        apply_change(summary, None, ticket(1, comments=[{'text': 'hi'}], version=1))
+
+        assert summary['recent'] == [{
+            'ticket_id': 't-01', 'status': 'open',
+            'created_at': '2026-02-09T12:00:01Z', 'updated_at': '2026-02-09T12:00:01Z'
+        }]
+
+    def test_recent_list_bounded_newest_first(self):
+        """Test only the newest tickets are kept, while counts cover all"""
+        summary = new_summary('user-001')
+        with patch('caller_summary.RECENT_TICKETS', 3):
+            for number in (4, 1, 5, 3, 2):
+                apply_change(summary, None, ticket(number))
+            # Older than the recent list: counted from the old image
+            apply_change(summary, ticket(1), ticket(1, status='resolved'))
+
+        assert [entry['ticket_id'] for entry in summary['recent']] == ['t-05', 't-04', 't-03']
+        assert summary['ticket_count'] == 5
+        assert summary['status_counts'] == {'open': 4, 'resolved': 1}
+
+    def test_size_budget_drops_oldest(self):
+        """Test oversized recent lists keep the newest entries within budget"""
+        summary = new_summary('user-001')
+        with patch('caller_summary.MAX_RECENT_BYTES', 200):
+            for number in range(1, 5):
+                apply_change(summary, None, ticket(number))
+
+        assert [entry['ticket_id'] for entry in summary['recent']] == ['t-04', 't-03']
+        assert summary['ticket_count'] == 4
+
+
+class TestRecentPage:
+    """Test serving the first list page from a summary"""
+
+    def build(self, count, limit=20):
+        summary = new_summary('user-001')
+        with patch('caller_summary.RECENT_TICKETS', limit):
+            for number in range(1, count + 1):
+                apply_change(summary, None, ticket(number))
+        return summary
+
+    def test_page_with_cursor_key(self):
+        """Test a partial page returns the GSI key of its last ticket"""
+        tickets, last_key = recent_page(self.build(5), 2)
+
+        assert [t['ticket_id'] for t in tickets] == ['t-05', 't-04']
+        assert last_key == {'ticket_id': 't-04', 'caller_id': 'user-001', 'created_at': '2026-02-09T12:00:04Z'}
+
+    def test_all_tickets(self):
+        """Test no cursor when the page holds every ticket"""
+        tickets, last_key = recent_page(self.build(3), 10)
+
+        assert len(tickets) == 3
+        assert last_key is None
+
+    def test_not_enough_tickets(self):
+        """Test None when the summary holds fewer tickets than requested"""
+        assert recent_page(self.build(5, limit=3), 4) is None
+
+
+class TestUpdateSummary:
+    """Test the optimistic read-modify-write"""
+
+    def test_seeds_from_existing_tickets(self):
+        """Test a caller's first summary includes tickets from before the stream"""
+        store = MemoryTicketStore()
+        for number in range(1, 4):
+            store.put_ticket(ticket(number, status='resolved' if number == 1 else 'open'))
+        summaries = MemoryCallerSummaries()
+
+        with patch('caller_summary.RECENT_TICKETS', 2), patch('caller_summary.SEED_PAGE_SIZE', 1):
+            summary = caller_summary.update_summary(summaries, store, 'user-001', [(None, None, ticket(3))])
+
+        assert summary['ticket_count'] == 3
+        assert summary['status_counts'] == {'open': 2, 'resolved': 1}
+        assert [entry['ticket_id'] for entry in summary['recent']] == ['t-03', 't-02']
+        assert summaries.get('user-001')['version'] == 1
+
+    def test_conflict_retried(self):
+        """Test a concurrent write makes the update re-read and re-apply"""
+        summaries = MemoryCallerSummaries()
+        summaries.put(dict(new_summary('user-001'), version=1))
+        stale = MagicMock(wraps=summaries)
+        stale.put.side_effect = [False, True]
+
+        caller_summary.update_summary(stale, MemoryTicketStore(), 'user-001', [(None, None, ticket(1))])
+
+        assert stale.get.call_count == 2
+        assert stale.put.call_args.kwargs['expected_version'] == 1
+
+    def test_dynamodb_conditional_put(self):
+        """Test summaries are written only over the version that was read"""
+        table = MagicMock()
+        table.put_item.side_effect = [None, ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}}, 'PutItem'
+        )]
+        summaries = DynamoDBCallerSummaries(table=table)
+
+        assert summaries.put(new_summary('user-001')) is True
+        assert summaries.put(new_summary('user-001'), expected_version=3) is False
+        first, second = table.put_item.call_args_list
+        assert first.kwargs['ConditionExpression'] == 'attribute_not_exists(caller_id)'
+        assert second.kwargs['ConditionExpression'] == 'version = :version'
+        assert second.kwargs['ExpressionAttributeValues'] == {':version': 3}
+
+
+class TestCallerSummarizer:
+    """Test the tickets table stream handler"""
+
+    def test_groups_records_by_caller(self):
+        """Test one summary update per caller per batch"""
+        summaries = MemoryCallerSummaries()
+        event = {'Records': [
+            stream_record(1, new=ticket(1)),
+            stream_record(2, new=ticket(2, caller_id='user-002')),
+            stream_record(3, old=ticket(1), new=ticket(1, status='in_progress')),
+        ]}
+
+        with patch('caller_summarizer.store', MemoryTicketStore()), \
+                patch('caller_summarizer.summaries', summaries):
+            result = caller_summarizer.lambda_handler(event, {})
+
+        assert result == {'batchItemFailures': []}
+        assert summaries.get('user-001')['status_counts'] == {'open': 0, 'in_progress': 1}
+        assert summaries.get('user-001')['version'] == 1
+        assert summaries.get('user-002')['ticket_count'] == 1
+
+    def test_failed_caller_reported(self):
+        """Test a failed caller's first record is returned for retry"""
+        summaries = MagicMock()
+        summaries.get.side_effect = RuntimeError('table unavailable')
+        event = {'Records': [stream_record(7, new=ticket(1)), stream_record(8, new=ticket(2))]}
+
+        with patch('caller_summarizer.summaries', summaries):
+            result = caller_summarizer.lambda_handler(event, {})
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': '7'}]}
+
+
+class TestListFromSummary:
+    """Test GET /tickets?caller= served from the caller summary"""
+
+    @pytest.fixture
+    def summaries(self, handler_backends):
+        store = MagicMock()
+        store.query_by_caller.return_value = ([ticket(1)], None)
+        handler_backends.use(store=store)
+        return handler_backends.caller_summaries, store
+
+    def list_tickets(self, **parameters):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': dict(parameters, caller='user-001')
+        }, {})
+        return json.loads(response['body'])
+
+    def seed(self, summaries, count):
+        summary = new_summary('user-001')
+        for number in range(1, count + 1):
+            apply_change(summary, None, ticket(number))
+        summaries.put(summary)
+
+    def test_first_page_is_one_read(self, summaries):
+        """Test the summary answers a summary view page without a GSI query"""
+        summaries_store, store = summaries
+        self.seed(summaries_store, 3)
+
+        body = self.list_tickets(limit='2', view='summary')
+
+        store.query_by_caller.assert_not_called()
+        assert [t['ticket_id'] for t in body['tickets']] == ['t-03', 't-02']
+        assert body['tickets'][0] == {
+            'ticket_id': 't-03', 'status': 'open',
+            'created_at': '2026-02-09T12:00:03Z', 'updated_at': '2026-02-09T12:00:03Z'
+        }
+        assert body['next_cursor'] is not None
+
+    def test_full_view_reads_gsi(self, summaries):
+        """Test full tickets are not served from the summary"""
+        summaries_store, store = summaries
+        self.seed(summaries_store, 3)
+
+        body = self.list_tickets()
+
+        store.query_by_caller.assert_called_once()
+        assert body['tickets'][0]['issue_description'] == 'Issue 1'
+
+    def test_cursor_continues_on_gsi(self, summaries):
+        """Test the summary's cursor is accepted by the GSI path"""
+        summaries_store, store = summaries
+        self.seed(summaries_store, 3)
+
+        cursor = self.list_tickets(limit='2', view='summary')['next_cursor']
+        self.list_tickets(limit='2', view='summary', cursor=cursor)
+
+        assert store.query_by_caller.call_args.kwargs['start_key'] == {
+            'ticket_id': 't-02', 'caller_id': 'user-001', 'created_at': '2026-02-09T12:00:02Z'
+        }
+
+    def test_missing_summary_falls_back(self, summaries):
+        """Test callers without a summary are listed from the GSI"""
+        body = self.list_tickets(view='summary')
+
+        summaries[1].query_by_caller.assert_called_once()
+        assert [t['ticket_id'] for t in body['tickets']] == ['t-01']
+
+    def test_summary_errors_fall_back(self, summaries):
+        """Test a failing summary read never fails the listing"""
+        failing = MagicMock()
+        failing.get.side_effect = RuntimeError('table unavailable')
+        with patch('mock_itsm_handler.caller_summaries', failing):
+            body = self.list_tickets(view='summary')
+
+        assert [t['ticket_id'] for t in body['tickets']] == ['t-01']
@@ -0,0 +1,91 @@
+import json
+import os
+import subprocess
+import sys
+
+LAMBDA_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda')
+
+# Budgets in milliseconds; override in slower CI environments. The first
+# request includes importing boto3 and creating the DynamoDB client.
+IMPORT_BUDGET_MS = float(os.environ.get('COLD_START_IMPORT_BUDGET_MS', '250'))
+FIRST_REQUEST_BUDGET_MS = float(os.environ.get('COLD_START_FIRST_REQUEST_BUDGET_MS', '750'))
+
+# With the dynamodb store, the cached client is answered by a Stubber
+# attached the moment ticket_store creates it, so the timed request pays
+# for the boto3 import and client creation but makes no network calls.
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import mock_itsm_handler
+import_ms = (time.perf_counter() - start) * 1000
+boto3_loaded = 'boto3' in sys.modules
+
+import ticket_store
+stubbers = []
+
+
+class StubbedClients(dict):
+    def __setitem__(self, region, client):
+        from botocore.stub import Stubber
+        stubber = Stubber(client)
+        stubber.add_response('put_item', {})
+        stubber.add_response('batch_write_item', {'UnprocessedItems': {}})
+        stubber.activate()
+        stubbers.append(stubber)
+        super().__setitem__(region, client)
+
+
+ticket_store._clients = StubbedClients()
+start = time.perf_counter()
+response = mock_itsm_handler.lambda_handler({
+    'httpMethod': 'POST',
+    'path': '/tickets',
+    'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Laptop not turning on'})
+}, {})
+first_request_ms = (time.perf_counter() - start) * 1000
+for stubber in stubbers:
+    stubber.assert_no_pending_responses()
+print(json.dumps({
+    'import_ms': import_ms,
+    'boto3_loaded': boto3_loaded,
+    'first_request_ms': first_request_ms,
+    'status': response['statusCode'],
+    'clients': len(stubbers)
+}))
+'''
+
+
+def run_probe(ticket_store):
+    """Import the handler in a fresh interpreter and time the cold path"""
+    # Static credentials, as Lambda provides them, keep client creation
+    # off the instance metadata endpoint
+    env = dict(os.environ, TICKET_STORE=ticket_store, PYTHONDONTWRITEBYTECODE='1',
+               AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing', AWS_EC2_METADATA_DISABLED='true')
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE],
+        cwd=LAMBDA_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    """Test cold-start budgets"""
+
+    def test_import_does_not_load_boto3(self):
+        """Test boto3 is deferred until the first DynamoDB call"""
+        probe = run_probe('memory')
+        assert probe['boto3_loaded'] is False
+
+    def test_import_time_within_budget(self):
+        """Test handler import time against the configured budget"""
+        # Best of three to smooth out scheduler noise
+        import_ms = min(run_probe('dynamodb')['import_ms'] for _ in range(3))
+        assert import_ms <= IMPORT_BUDGET_MS, f"import took {import_ms:.1f} ms"
+
+    def test_first_request_within_budget(self):
+        """Test first request latency, DynamoDB client creation included, against the configured budget"""
+        probes = [run_probe('dynamodb') for _ in range(3)]
+        assert all(probe['status'] == 201 for probe in probes)
+        assert all(probe['clients'] == 1 for probe in probes)
+        first_request_ms = min(probe['first_request_ms'] for probe in probes)
+        assert first_request_ms <= FIRST_REQUEST_BUDGET_MS, f"first request took {first_request_ms:.1f} ms"
@@ -0,0 +1,109 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import compression
+import mock_itsm_handler
+from compression import TextCompressor
+from ticket_cache import TicketCache
+from ticket_store import DynamoDBTicketStore, MemoryTicketStore
+
+TRANSCRIPT = '\n'.join(
+    f"[00:{second:02d}] Caller: My laptop will not turn on after the update, the fan spins but the screen stays black."
+    for second in range(40)
+)
+
+
+class TestTextCompressor:
+    """Test the text codec"""
+
+    @pytest.mark.parametrize('codec', ['zlib', 'bz2', 'lzma'])
+    def test_round_trip(self, codec):
+        """Test long text is stored as smaller bytes and decodes unchanged"""
+        compressor = TextCompressor(codec, min_bytes=1024)
+
+        stored = compressor.encode(TRANSCRIPT)
+
+        assert isinstance(stored, bytes)
+        assert len(stored) < len(TRANSCRIPT.encode('utf-8'))
+        assert compressor.decode(stored) == TRANSCRIPT
+
+    def test_short_text_unchanged(self):
+        """Test text under the threshold is stored as a plain string"""
+        assert TextCompressor('zlib', min_bytes=1024).encode('Printer jammed') == 'Printer jammed'
+
+    def test_disabled(self):
+        """Test TEXT_COMPRESSION=none stores everything as strings"""
+        assert TextCompressor('none').encode(TRANSCRIPT) == TRANSCRIPT
+
+    def test_decode_uses_stored_codec(self):
+        """Test values written under another codec still decode"""
+        stored = TextCompressor('lzma', min_bytes=0).encode(TRANSCRIPT)
+        assert TextCompressor('zlib').decode(stored) == TRANSCRIPT
+
+    def test_decode_boto3_binary(self):
+        """Test Binary values from the DynamoDB deserializer decode"""
+        from boto3.dynamodb.types import Binary
+        stored = TextCompressor('zlib', min_bytes=0).encode(TRANSCRIPT)
+        assert TextCompressor('zlib').decode(Binary(stored)) == TRANSCRIPT
+
+    def test_unknown_codec(self):
+        """Test invalid TEXT_COMPRESSION values are rejected"""
+        with pytest.raises(ValueError):
+            compression.create_compressor('snappy')
+
+
+class TestCompressedStorage:
+    """Test compression in the ticket store"""
+
+    def test_memory_store_round_trip(self):
+        """Test long descriptions and comments are compressed at rest and transparent on read"""
+        store = MemoryTicketStore()
+        store.put_ticket({
+            'ticket_id': 't-1',
+            'caller_id': 'user-001',
+            'issue_description': TRANSCRIPT,
+            'status': 'open',
+            'created_at': '2026-02-09T12:00:00Z',
+            'updated_at': '2026-02-09T12:00:00Z'
+        })
+        store.append_comment('t-1', {'comment_text': TRANSCRIPT, 'added_at': '2026-02-09T12:01:00Z'},
+                             '2026-02-09T12:01:00Z')
+
+        assert isinstance(store._items['t-1']['issue_description'], bytes)
+        assert isinstance(store._comments['t-1'][0]['comment_text'], bytes)
+        assert store.get_ticket('t-1')['issue_description'] == TRANSCRIPT
+        assert store.get_ticket('t-1')['comments'][0]['comment_text'] == TRANSCRIPT
+        assert store.query_by_caller('user-001', limit=1)[0][0]['issue_description'] == TRANSCRIPT
+        assert store.get_tickets(['t-1'])[0]['t-1']['issue_description'] == TRANSCRIPT
+
+    def test_dynamodb_writes_binary_attribute(self):
+        """Test the put sends the compressed description as bytes"""
+        table = MagicMock()
+        store = DynamoDBTicketStore(table=table, comments_table=MagicMock())
+
+        store.put_ticket({'ticket_id': 't-1', 'issue_description': TRANSCRIPT})
+
+        assert isinstance(table.put_item.call_args.kwargs['Item']['issue_description'], bytes)
+
+    def test_handler_returns_plain_text(self, handler_backends):
+        """Test API responses never expose compressed bytes"""
+        handler_backends.use(ticket_cache=TicketCache(enabled=False))
+        created = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': TRANSCRIPT})
+        }, {})
+        ticket_id = json.loads(created['body'])['ticket_id']
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': f'/tickets/{ticket_id}',
+            'pathParameters': {'id': ticket_id}
+        }, {})
+
+        assert json.loads(response['body'])['issue_description'] == TRANSCRIPT
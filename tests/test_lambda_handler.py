@@ -2,20 +2,28 @@ import pytest
 import json
 import sys
 import os
+import threading
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
 # Add src/lambda to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
 
+import etags
 import mock_itsm_handler
+import serialization
+from rate_limit import RateLimiter
+from ticket_store import DynamoDBTicketStore, MemoryTicketStore
 
 
 @pytest.fixture
-def mock_table():
+def mock_table(handler_backends):
     """Mock DynamoDB table"""
-    with patch('mock_itsm_handler.table') as mock:
-        yield mock
+    mock = MagicMock()
+    mock.comments = MagicMock()
+    mock.comments.query.return_value = {'Items': []}
+    handler_backends.use(store=DynamoDBTicketStore(table=mock, comments_table=mock.comments))
+    return mock
 
 
 @pytest.fixture
@@ -184,14 +192,85 @@ class TestGetTicketStatus:
         mock_table.get_item.assert_not_called()
 
 
+class TestFieldSelection:
+    """Test GET /tickets/{id}?fields="""
+    
+    def get_event(self, fields):
+        return {
+            'httpMethod': 'GET',
+            'path': '/tickets/test-ticket-123',
+            'pathParameters': {'id': 'test-ticket-123'},
+            'queryStringParameters': {'fields': fields}
+        }
+    
+    def test_compact_preset_is_projected_read(self, mock_table, sample_ticket):
+        """Test compact reads three attributes and skips the comments query"""
+        mock_table.get_item.return_value = {'Item': {
+            'ticket_id': 'test-ticket-123', 'status': 'open', 'updated_at': '2026-02-09T12:00:00Z'
+        }}
+        
+        response = mock_itsm_handler.lambda_handler(self.get_event('compact'), {})
+        
+        assert json.loads(response['body']) == {
+            'ticket_id': 'test-ticket-123', 'status': 'open', 'updated_at': '2026-02-09T12:00:00Z'
+        }
+        kwargs = mock_table.get_item.call_args.kwargs
+        assert sorted(kwargs['ExpressionAttributeNames'].values()) == ['status', 'ticket_id', 'updated_at']
+        mock_table.comments.query.assert_not_called()
+        assert mock_itsm_handler.ticket_cache.get('test-ticket-123') is None
+    
+    def test_field_list_from_cache(self, mock_table, sample_ticket):
+        """Test a cached ticket is trimmed without a read"""
+        mock_itsm_handler.ticket_cache.put(sample_ticket)
+        
+        response = mock_itsm_handler.lambda_handler(self.get_event('status, comments'), {})
+        
+        assert json.loads(response['body']) == {'ticket_id': 'test-ticket-123', 'status': 'open', 'comments': []}
+        mock_table.get_item.assert_not_called()
+    
+    @pytest.mark.parametrize('fields', ['', 'full'])
+    def test_full_ticket(self, mock_table, sample_ticket, fields):
+        """Test an empty value or full returns and caches the whole ticket"""
+        mock_table.get_item.return_value = {'Item': sample_ticket}
+        
+        body = json.loads(mock_itsm_handler.lambda_handler(self.get_event(fields), {})['body'])
+        
+        assert body['issue_description'] == 'Laptop not turning on'
+        assert 'ProjectionExpression' not in mock_table.get_item.call_args.kwargs
+        assert mock_itsm_handler.ticket_cache.get('test-ticket-123') is not None
+    
+    @pytest.mark.parametrize('fields', ['status,secret', ' , ', 'summary'])
+    def test_unknown_fields(self, mock_table, fields):
+        """Test names outside the Ticket schema are rejected before any read"""
+        response = mock_itsm_handler.lambda_handler(self.get_event(fields), {})
+        
+        assert response['statusCode'] == 400
+        mock_table.get_item.assert_not_called()
+    
+    def test_fields_match_openapi_schema(self):
+        """Test the selectable fields are the Ticket schema's properties"""
+        yaml = pytest.importorskip('yaml')
+        spec_path = os.path.join(os.path.dirname(__file__), '..', 'specs', 'mock-itsm-api-openapi.yaml')
+        with open(spec_path) as f:
+            spec = yaml.safe_load(f)
+        
+        properties = spec['components']['schemas']['Ticket']['properties']
+        assert set(mock_itsm_handler.TICKET_FIELDS) == set(properties)
+        for preset in mock_itsm_handler.FIELD_PRESETS.values():
+            assert set(preset) <= set(properties)
+
+
 class TestAddTicketComment:
     """Test add_ticket_comment operation"""
     
     def test_add_comment_success(self, mock_table):
         """Test successful comment addition"""
-        mock_table.update_item.return_value = {
-            'Attributes': {
-                'updated_at': '2026-02-09T12:30:00Z'
+        mock_table.transact_write_items.return_value = {}
+        mock_table.get_item.return_value = {
+            'Item': {
+                'ticket_id': 'test-ticket-123',
+                'caller_id': 'user-001',
+                'created_at': '2026-02-09T12:00:00Z'
             }
         }
         
@@ -210,7 +289,8 @@ class TestAddTicketComment:
         body = json.loads(response['body'])
         assert body['success'] is True
         assert 'updated_at' in body
-        mock_table.update_item.assert_called_once()
+        mock_table.transact_write_items.assert_called_once()
+        mock_table.update_item.assert_not_called()
     
     def test_add_comment_missing_comment(self, mock_table):
         """Test comment addition with missing comment text"""
@@ -226,16 +306,16 @@ class TestAddTicketComment:
         assert response['statusCode'] == 400
         body = json.loads(response['body'])
         assert 'error' in body
-        mock_table.update_item.assert_not_called()
+        mock_table.transact_write_items.assert_not_called()
     
     def test_add_comment_ticket_not_found(self, mock_table):
         """Test comment addition when ticket doesn't exist"""
         from botocore.exceptions import ClientError
         
-        mock_table.update_item.side_effect = ClientError(
-            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'Item not found'}},
-            'UpdateItem'
-        )
+        mock_table.transact_write_items.side_effect = ClientError({
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': [{'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}]
+        }, 'TransactWriteItems')
         
         event = {
             'httpMethod': 'POST',
@@ -375,8 +455,8 @@ class TestErrorHandling:
     def test_invalid_endpoint(self, mock_table):
         """Test request to invalid endpoint"""
         event = {
-            'httpMethod': 'DELETE',
-            'path': '/tickets/test-ticket-123'
+            'httpMethod': 'GET',
+            'path': '/tickets/test-ticket-123/attachments'
         }
         
         response = mock_itsm_handler.lambda_handler(event, {})
@@ -385,6 +465,20 @@ class TestErrorHandling:
         body = json.loads(response['body'])
         assert 'error' in body
     
+    def test_method_not_allowed(self, mock_table):
+        """Test an unsupported method on a known resource gets 405 with Allow"""
+        event = {
+            'httpMethod': 'DELETE',
+            'path': '/tickets/test-ticket-123'
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 405
+        assert response['headers']['Allow'] == 'GET, PATCH'
+        assert 'error' in json.loads(response['body'])
+        mock_table.get_item.assert_not_called()
+    
     def test_unexpected_exception(self, mock_table):
         """Test handling of unexpected exceptions"""
         mock_table.put_item.side_effect = Exception("Unexpected error")
@@ -403,3 +497,821 @@ class TestErrorHandling:
         assert response['statusCode'] == 500
         body = json.loads(response['body'])
         assert 'error' in body
+
+
+class TestWarmUp:
+    """Test scheduled warm-up events"""
+    
+    def test_scheduled_event_warms_store(self, mock_table):
+        """Test EventBridge schedule pre-opens the connection and returns"""
+        mock_table.get_item.return_value = {}
+        
+        event = {
+            'source': 'aws.events',
+            'detail-type': 'Scheduled Event',
+            'detail': {}
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['warmed'] is True
+        mock_table.get_item.assert_called_once()
+        mock_table.put_item.assert_not_called()
+    
+    def test_warmup_flag(self, mock_table):
+        """Test explicit warm-up flag"""
+        mock_table.get_item.return_value = {}
+        
+        response = mock_itsm_handler.lambda_handler({'warmup': True}, {})
+        
+        assert response['statusCode'] == 200
+        mock_table.get_item.assert_called_once()
+    
+    def test_warmup_failure_is_not_an_error(self, mock_table):
+        """Test warm-up failures do not fail the invocation"""
+        mock_table.get_item.side_effect = Exception("Network unreachable")
+        
+        response = mock_itsm_handler.lambda_handler({'warmup': True}, {})
+        
+        assert response['statusCode'] == 200
+
+
+class TestBatchCreate:
+    """Test POST /tickets/batch"""
+    
+    def test_batch_create_chunks_writes(self, mock_table):
+        """Test 60 tickets are written in chunks of 25"""
+        mock_table.batch_write_item.return_value = {'UnprocessedItems': []}
+        
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/batch',
+            'body': json.dumps({'tickets': [
+                {'caller_id': 'user-001', 'issue_description': f'Issue {i}'} for i in range(60)
+            ]})
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 200
+        results = json.loads(response['body'])['results']
+        assert [r['status'] for r in results] == [201] * 60
+        assert [len(c.kwargs['Items']) for c in mock_table.batch_write_item.call_args_list] == [25, 25, 10]
+        mock_table.put_item.assert_not_called()
+    
+    def test_batch_create_reports_per_item_results(self, mock_table):
+        """Test invalid and unprocessed items are reported individually"""
+        def leave_last_unprocessed(Items):
+            return {'UnprocessedItems': [Items[-1]]}
+        mock_table.batch_write_item.side_effect = leave_last_unprocessed
+        
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/batch',
+            'body': json.dumps({'tickets': [
+                {'caller_id': 'user-001', 'issue_description': 'Printer jam'},
+                {'caller_id': 'user-001'},
+                {'caller_id': 'user-002', 'issue_description': 'VPN drops'}
+            ]})
+        }
+        
+        with patch('retry.sleep'):
+            response = mock_itsm_handler.lambda_handler(event, {})
+        
+        results = json.loads(response['body'])['results']
+        assert [r['status'] for r in results] == [201, 400, 500]
+        assert 'ticket_id' in results[0]
+        assert 'ticket_id' not in results[2]
+        assert mock_table.batch_write_item.call_count == DynamoDBTicketStore.UNPROCESSED_MAX_ATTEMPTS
+    
+    def test_batch_create_error_fails_only_its_chunk(self, mock_table):
+        """Test tickets written before a failing chunk keep their ids"""
+        from botocore.exceptions import ClientError
+        mock_table.batch_write_item.side_effect = [
+            {'UnprocessedItems': []},
+            ClientError({'Error': {'Code': 'ValidationException', 'Message': 'bad'}}, 'BatchWriteItem'),
+            {'UnprocessedItems': []}
+        ]
+        
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/batch',
+            'body': json.dumps({'tickets': [
+                {'caller_id': 'user-001', 'issue_description': f'Issue {i}'} for i in range(60)
+            ]})
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 200
+        results = json.loads(response['body'])['results']
+        assert [r['status'] for r in results] == [201] * 25 + [500] * 25 + [201] * 10
+        calls = mock_table.batch_write_item.call_args_list
+        written = [item['ticket_id'] for call in (calls[0], calls[2]) for item in call.kwargs['Items']]
+        assert [r['ticket_id'] for r in results if r['status'] == 201] == written
+    
+    def test_batch_create_too_many_items(self, mock_table):
+        """Test batches over BATCH_MAX_ITEMS are rejected"""
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/batch',
+            'body': json.dumps({'tickets': [
+                {'caller_id': 'user-001', 'issue_description': 'Issue'}
+            ] * (mock_itsm_handler.BATCH_MAX_ITEMS + 1)})
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 400
+        mock_table.batch_write_item.assert_not_called()
+    
+    def test_batch_create_missing_tickets(self, mock_table):
+        """Test batch create without a tickets list"""
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/batch',
+            'body': json.dumps({})
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 400
+
+
+class TestBatchLookup:
+    """Test POST /tickets/lookup"""
+    
+    def test_lookup_retries_unprocessed_keys(self, mock_table, sample_ticket):
+        """Test unprocessed keys are resent and results keep request order"""
+        mock_table.batch_get_item.side_effect = [
+            {'Items': [], 'UnprocessedKeys': [{'ticket_id': 'test-ticket-123'}]},
+            {'Items': [sample_ticket], 'UnprocessedKeys': []}
+        ]
+        
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/lookup',
+            'body': json.dumps({'ticket_ids': ['nonexistent', 'test-ticket-123', 'test-ticket-123']})
+        }
+        
+        with patch('retry.sleep') as sleep:
+            response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 200
+        results = json.loads(response['body'])['results']
+        assert [r['status'] for r in results] == [404, 200, 200]
+        assert results[1]['ticket']['caller_id'] == 'user-001'
+        first_keys = mock_table.batch_get_item.call_args_list[0].kwargs['Keys']
+        assert first_keys == [{'ticket_id': 'nonexistent'}, {'ticket_id': 'test-ticket-123'}]
+        sleep.assert_called_once()
+    
+    def test_lookup_chunks_keys(self, mock_table):
+        """Test 250 ids are read in chunks of 100"""
+        mock_table.batch_get_item.return_value = {'Items': [], 'UnprocessedKeys': []}
+        
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/lookup',
+            'body': json.dumps({'ticket_ids': [f't-{i}' for i in range(250)]})
+        }
+        
+        mock_itsm_handler.lambda_handler(event, {})
+        
+        assert [len(c.kwargs['Keys']) for c in mock_table.batch_get_item.call_args_list] == [100, 100, 50]
+    
+    def test_lookup_missing_ids(self, mock_table):
+        """Test lookup without ticket_ids"""
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets/lookup',
+            'body': json.dumps({'ticket_ids': []})
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 400
+        mock_table.batch_get_item.assert_not_called()
+
+
+class TestListPagination:
+    """Test cursor pagination and summary view on GET /tickets"""
+    
+    def list_event(self, **query):
+        return {
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': dict(query, caller='user-001')
+        }
+    
+    def test_cursor_round_trips_last_evaluated_key(self, mock_table, sample_ticket):
+        """Test next_cursor wraps LastEvaluatedKey and feeds ExclusiveStartKey"""
+        last_key = {'ticket_id': 'test-ticket-123', 'caller_id': 'user-001', 'created_at': '2026-02-09T12:00:00Z'}
+        mock_table.query.return_value = {'Items': [sample_ticket], 'LastEvaluatedKey': last_key}
+        
+        response = mock_itsm_handler.lambda_handler(self.list_event(limit='1'), {})
+        cursor = json.loads(response['body'])['next_cursor']
+        
+        assert mock_table.query.call_args.kwargs['Limit'] == 1
+        assert 'test-ticket-123' not in cursor
+        
+        mock_table.query.return_value = {'Items': []}
+        response = mock_itsm_handler.lambda_handler(self.list_event(limit='1', cursor=cursor), {})
+        
+        assert mock_table.query.call_args.kwargs['ExclusiveStartKey'] == last_key
+        assert json.loads(response['body'])['next_cursor'] is None
+    
+    def test_tampered_cursor_rejected(self, mock_table):
+        """Test a modified cursor is rejected before querying"""
+        mock_table.query.return_value = {
+            'Items': [], 'LastEvaluatedKey': {'ticket_id': 'a', 'caller_id': 'user-001', 'created_at': 'x'}
+        }
+        cursor = json.loads(mock_itsm_handler.lambda_handler(self.list_event(), {})['body'])['next_cursor']
+        mock_table.query.reset_mock()
+        
+        tampered = 'A' + cursor[1:] if cursor[0] != 'A' else 'B' + cursor[1:]
+        response = mock_itsm_handler.lambda_handler(self.list_event(cursor=tampered), {})
+        
+        assert response['statusCode'] == 400
+        mock_table.query.assert_not_called()
+    
+    def test_cursor_bound_to_caller(self, mock_table):
+        """Test a cursor cannot be replayed for another caller"""
+        mock_table.query.return_value = {
+            'Items': [], 'LastEvaluatedKey': {'ticket_id': 'a', 'caller_id': 'user-001', 'created_at': 'x'}
+        }
+        cursor = json.loads(mock_itsm_handler.lambda_handler(self.list_event(), {})['body'])['next_cursor']
+        
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': {'caller': 'user-002', 'cursor': cursor}
+        }, {})
+        
+        assert response['statusCode'] == 400
+    
+    def test_summary_view_uses_projection(self, mock_table):
+        """Test view=summary sends a ProjectionExpression with aliased names"""
+        mock_table.query.return_value = {'Items': []}
+        
+        mock_itsm_handler.lambda_handler(self.list_event(view='summary'), {})
+        
+        kwargs = mock_table.query.call_args.kwargs
+        assert sorted(kwargs['ExpressionAttributeNames'].values()) == ['created_at', 'status', 'ticket_id', 'updated_at']
+        assert set(kwargs['ProjectionExpression'].split(', ')) == set(kwargs['ExpressionAttributeNames'])
+    
+    @pytest.mark.parametrize('query', [{'limit': '0'}, {'limit': '101'}, {'limit': 'ten'}, {'view': 'everything'}])
+    def test_invalid_parameters(self, mock_table, query):
+        """Test invalid limit and view values"""
+        response = mock_itsm_handler.lambda_handler(self.list_event(**query), {})
+        
+        assert response['statusCode'] == 400
+        mock_table.query.assert_not_called()
+
+
+class TestListTicketComments:
+    """Test GET /tickets/{id}/comments"""
+    
+    def comments_event(self, ticket_id='test-ticket-123', **query):
+        return {
+            'httpMethod': 'GET',
+            'path': f'/tickets/{ticket_id}/comments',
+            'pathParameters': {'id': ticket_id},
+            'queryStringParameters': query or None
+        }
+    
+    def test_pages_comment_history(self, mock_table):
+        """Test comment history is paged oldest first with a cursor"""
+        last_key = {'ticket_id': 'test-ticket-123', 'comment_key': 'a#1'}
+        mock_table.comments.query.return_value = {
+            'Items': [{'ticket_id': 'test-ticket-123', 'comment_key': 'a#1',
+                       'comment_text': 'Rebooted', 'added_at': '2026-02-09T12:30:00Z'}],
+            'LastEvaluatedKey': last_key
+        }
+        
+        response = mock_itsm_handler.lambda_handler(self.comments_event(limit='1'), {})
+        
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['comments'] == [{'comment_text': 'Rebooted', 'added_at': '2026-02-09T12:30:00Z'}]
+        assert mock_table.comments.query.call_args.kwargs['ScanIndexForward'] is True
+        
+        mock_itsm_handler.lambda_handler(self.comments_event(limit='1', cursor=body['next_cursor']), {})
+        
+        assert mock_table.comments.query.call_args.kwargs['ExclusiveStartKey'] == last_key
+        mock_table.get_item.assert_not_called()
+    
+    def test_missing_ticket(self, mock_table):
+        """Test 404 when the ticket does not exist"""
+        mock_table.get_item.return_value = {}
+        
+        response = mock_itsm_handler.lambda_handler(self.comments_event('nonexistent'), {})
+        
+        assert response['statusCode'] == 404
+    
+    def test_ticket_without_comments(self, mock_table, sample_ticket):
+        """Test an existing ticket with no comments returns an empty page"""
+        mock_table.get_item.return_value = {'Item': sample_ticket}
+        
+        response = mock_itsm_handler.lambda_handler(self.comments_event(), {})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body']) == {'comments': [], 'next_cursor': None}
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match on GET /tickets/{id} and GET /tickets"""
+    
+    @pytest.fixture
+    def ticket_id(self, handler_backends):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Printer jammed'})
+        }, {})
+        return json.loads(response['body'])['ticket_id']
+    
+    def get_event(self, ticket_id, etag=None, **query):
+        return {
+            'httpMethod': 'GET',
+            'path': f'/tickets/{ticket_id}',
+            'pathParameters': {'id': ticket_id},
+            'queryStringParameters': query or None,
+            'headers': {'If-None-Match': etag} if etag else {}
+        }
+    
+    def test_unchanged_ticket_is_304(self, ticket_id):
+        """Test the ETag of a 200 makes the next poll a bodiless 304"""
+        first = mock_itsm_handler.lambda_handler(self.get_event(ticket_id), {})
+        etag = first['headers']['ETag']
+        
+        response = mock_itsm_handler.lambda_handler(self.get_event(ticket_id, etag), {})
+        
+        assert response['statusCode'] == 304
+        assert response['body'] == ''
+        assert response['headers'] == {'ETag': etag}
+    
+    def test_changed_ticket_is_200(self, ticket_id):
+        """Test a comment changes the ETag"""
+        etag = mock_itsm_handler.lambda_handler(self.get_event(ticket_id), {})['headers']['ETag']
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': f'/tickets/{ticket_id}/comments',
+            'pathParameters': {'id': ticket_id},
+            'body': json.dumps({'comment': 'Still jammed'})
+        }, {})
+        
+        response = mock_itsm_handler.lambda_handler(self.get_event(ticket_id, etag), {})
+        
+        assert response['statusCode'] == 200
+        assert response['headers']['ETag'] != etag
+        assert json.loads(response['body'])['comment_count'] == 1
+    
+    def test_field_selections_have_own_etags(self, ticket_id):
+        """Test a compact ETag does not validate the full ticket"""
+        compact = mock_itsm_handler.lambda_handler(self.get_event(ticket_id, fields='compact'), {})
+        
+        response = mock_itsm_handler.lambda_handler(self.get_event(ticket_id, compact['headers']['ETag']), {})
+        
+        assert response['statusCode'] == 200
+        assert 'issue_description' in json.loads(response['body'])
+    
+    def test_cache_miss_checks_with_projected_read(self, mock_table, sample_ticket):
+        """Test an unchanged ticket costs one projected GetItem and no comments query"""
+        mock_table.get_item.return_value = {'Item': {
+            'ticket_id': 'test-ticket-123', 'updated_at': '2026-02-09T12:00:00Z'
+        }}
+        
+        response = mock_itsm_handler.lambda_handler(
+            self.get_event('test-ticket-123', etags.ticket_etag(sample_ticket)), {})
+        
+        assert response['statusCode'] == 304
+        kwargs = mock_table.get_item.call_args.kwargs
+        assert sorted(kwargs['ExpressionAttributeNames'].values()) == ['ticket_id', 'updated_at']
+        mock_table.get_item.assert_called_once()
+        mock_table.comments.query.assert_not_called()
+    
+    def test_unchanged_page_is_304(self, mock_table, sample_ticket):
+        """Test a list poll is answered from the validator query alone"""
+        mock_table.query.return_value = {'Items': [
+            {'ticket_id': 'test-ticket-123', 'updated_at': '2026-02-09T12:00:00Z'}
+        ]}
+        event = {
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': {'caller': 'user-001'},
+            'headers': {'if-none-match': etags.page_etag([sample_ticket])}
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 304
+        mock_table.query.assert_called_once()
+        assert 'ProjectionExpression' in mock_table.query.call_args.kwargs
+    
+    def test_changed_page_is_200(self, mock_table, sample_ticket):
+        """Test a stale page ETag falls through to the full query"""
+        mock_table.query.return_value = {'Items': [sample_ticket]}
+        event = {
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': {'caller': 'user-001'},
+            'headers': {'If-None-Match': 'W/"stale"'}
+        }
+        
+        response = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert response['statusCode'] == 200
+        assert response['headers']['ETag'] == etags.page_etag([sample_ticket])
+        assert mock_table.query.call_count == 2
+    
+    @pytest.mark.parametrize('header,expected', [
+        ('W/"a", W/"b"', True), ('"b"', True), ('*', True), ('W/"c"', False), ('', False)
+    ])
+    def test_weak_comparison(self, header, expected):
+        """Test If-None-Match lists, weak tags and the * wildcard"""
+        assert etags.matches(header, 'W/"b"') is expected
+
+
+class TestIdempotentCreate:
+    """Test Idempotency-Key handling on POST /tickets"""
+    
+    @pytest.fixture
+    def memory_store(self, handler_backends):
+        return handler_backends.store
+    
+    def create_event(self, key, description='Laptop not turning on', header='Idempotency-Key'):
+        return {
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'headers': {header: key},
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': description})
+        }
+    
+    def test_replay_returns_original_ticket(self, memory_store):
+        """Test a retried create returns the first response and writes once"""
+        first = mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        second = mock_itsm_handler.lambda_handler(self.create_event('key-1', header='idempotency-key'), {})
+        
+        assert first['statusCode'] == second['statusCode'] == 201
+        assert json.loads(first['body']) == json.loads(second['body'])
+        assert second['headers']['Idempotent-Replayed'] == 'true'
+        tickets, _ = memory_store.query_by_caller('user-001', limit=10)
+        assert len(tickets) == 1
+    
+    def test_replay_after_cache_miss_uses_conditional_write(self, memory_store):
+        """Test a replay on a cold container is caught by the conditional put"""
+        first = mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        mock_itsm_handler.ticket_cache.clear()
+        second = mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        
+        assert json.loads(second['body']) == json.loads(first['body'])
+        assert second['headers']['Idempotent-Replayed'] == 'true'
+    
+    def test_key_reused_with_different_request(self, memory_store):
+        """Test a key cannot be reused for a different issue"""
+        mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        response = mock_itsm_handler.lambda_handler(self.create_event('key-1', 'Printer jammed'), {})
+        
+        assert response['statusCode'] == 422
+    
+    def test_keys_are_scoped_per_caller(self, memory_store):
+        """Test two callers using the same key get separate tickets"""
+        first = mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        event = self.create_event('key-1')
+        event['body'] = json.dumps({'caller_id': 'user-002', 'issue_description': 'Laptop not turning on'})
+        second = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert json.loads(first['body'])['ticket_id'] != json.loads(second['body'])['ticket_id']
+    
+    def test_body_field(self, memory_store):
+        """Test idempotency_key in the body works like the header"""
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Laptop', 'idempotency_key': 'k'})
+        }
+        first = mock_itsm_handler.lambda_handler(event, {})
+        second = mock_itsm_handler.lambda_handler(event, {})
+        
+        assert json.loads(first['body'])['ticket_id'] == json.loads(second['body'])['ticket_id']
+    
+    def test_replay_reads_only_what_it_compares(self, mock_table):
+        """Test a replay on a cold container is one projected GetItem, with no comments query"""
+        from botocore.exceptions import ClientError
+        
+        mock_table.put_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'exists'}}, 'PutItem'
+        )
+        mock_table.get_item.return_value = {'Item': {
+            'ticket_id': 't-1', 'issue_description': 'Laptop not turning on', 'created_at': '2026-02-09T12:00:00Z'
+        }}
+        
+        response = mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        
+        assert response['statusCode'] == 201
+        assert response['headers']['Idempotent-Replayed'] == 'true'
+        params = mock_table.get_item.call_args.kwargs
+        assert params['ConsistentRead'] is True
+        assert 'ProjectionExpression' in params
+        mock_table.comments.query.assert_not_called()
+    
+    def test_conditional_put_on_dynamodb(self, mock_table):
+        """Test keyed creates use attribute_not_exists"""
+        mock_itsm_handler.lambda_handler(self.create_event('key-1'), {})
+        
+        assert mock_table.put_item.call_args.kwargs['ConditionExpression'] == 'attribute_not_exists(ticket_id)'
+    
+    def test_key_too_long(self, mock_table):
+        """Test oversized keys are rejected"""
+        response = mock_itsm_handler.lambda_handler(self.create_event('k' * 256), {})
+        
+        assert response['statusCode'] == 400
+        mock_table.put_item.assert_not_called()
+
+
+class TestUpdateTicketStatus:
+    """Test PATCH /tickets/{id}"""
+    
+    @pytest.fixture
+    def ticket_id(self, handler_backends):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Laptop not turning on'})
+        }, {})
+        return json.loads(response['body'])['ticket_id']
+    
+    def patch_event(self, ticket_id, body):
+        return {
+            'httpMethod': 'PATCH',
+            'path': f'/tickets/{ticket_id}',
+            'pathParameters': {'id': ticket_id},
+            'body': json.dumps(body)
+        }
+    
+    def test_transition_increments_version(self, ticket_id):
+        """Test an allowed transition returns the new status and version"""
+        response = mock_itsm_handler.lambda_handler(
+            self.patch_event(ticket_id, {'status': 'in_progress', 'version': 1}), {})
+        
+        assert response['statusCode'] == 200
+        body = json.loads(response['body'])
+        assert body['status'] == 'in_progress'
+        assert body['version'] == 2
+    
+    def test_stale_version_conflicts(self, ticket_id):
+        """Test the second of two concurrent updates gets 409 instead of overwriting"""
+        first = mock_itsm_handler.lambda_handler(
+            self.patch_event(ticket_id, {'status': 'in_progress', 'version': 1}), {})
+        second = mock_itsm_handler.lambda_handler(
+            self.patch_event(ticket_id, {'status': 'resolved', 'version': 1}), {})
+        
+        assert first['statusCode'] == 200
+        assert second['statusCode'] == 409
+        assert json.loads(second['body'])['version'] == 2
+    
+    def test_disallowed_transition(self, ticket_id):
+        """Test closed tickets cannot be reopened"""
+        mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, {'status': 'closed'}), {})
+        response = mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, {'status': 'open'}), {})
+        
+        assert response['statusCode'] == 409
+        assert json.loads(response['body'])['error'] == 'Cannot change status from closed to open'
+    
+    def test_repeated_update_is_a_no_op(self, ticket_id):
+        """Test a retried PATCH without version succeeds without another change"""
+        mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, {'status': 'resolved'}), {})
+        response = mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, {'status': 'resolved'}), {})
+        
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['version'] == 2
+    
+    def test_status_visible_on_get(self, ticket_id):
+        """Test the cached ticket is invalidated after an update"""
+        get_event = {'httpMethod': 'GET', 'path': f'/tickets/{ticket_id}', 'pathParameters': {'id': ticket_id}}
+        mock_itsm_handler.lambda_handler(get_event, {})
+        mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, {'status': 'in_progress'}), {})
+        
+        assert json.loads(mock_itsm_handler.lambda_handler(get_event, {})['body'])['status'] == 'in_progress'
+    
+    def test_missing_ticket(self, ticket_id):
+        """Test updating a nonexistent ticket returns 404"""
+        response = mock_itsm_handler.lambda_handler(self.patch_event('nonexistent', {'status': 'closed'}), {})
+        
+        assert response['statusCode'] == 404
+    
+    @pytest.mark.parametrize('body', [{}, {'status': 'done'}, {'status': 'closed', 'version': 'one'},
+                                      {'status': 'closed', 'version': True}])
+    def test_invalid_input(self, ticket_id, body):
+        """Test invalid status or version values are rejected"""
+        response = mock_itsm_handler.lambda_handler(self.patch_event(ticket_id, body), {})
+        
+        assert response['statusCode'] == 400
+
+
+class TestOperationBatch:
+    """Test POST /batch running several operations in one request"""
+    
+    @pytest.fixture
+    def ticket_id(self, handler_backends):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Printer jammed'})
+        }, {})
+        return json.loads(response['body'])['ticket_id']
+    
+    def batch(self, operations, headers=None):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/batch',
+            'headers': headers,
+            'body': json.dumps({'operations': operations})
+        }, {})
+        return response['statusCode'], json.loads(response['body'])
+    
+    def test_results_in_request_order(self, ticket_id):
+        """Test each operation gets its own status, headers and body"""
+        status, body = self.batch([
+            {'id': 'status', 'method': 'GET', 'path': f'/tickets/{ticket_id}?fields=compact'},
+            {'method': 'GET', 'path': '/tickets', 'query': {'caller': 'user-001', 'limit': 5}},
+            {'id': 'comment', 'method': 'POST', 'path': f'/tickets/{ticket_id}/comments',
+             'body': {'comment': 'Cleared the paper'}},
+            {'id': 'missing', 'method': 'get', 'path': '/tickets/nonexistent'}
+        ])
+        
+        assert status == 200
+        results = body['results']
+        assert [(r['id'], r['status']) for r in results] == [
+            ('status', 200), ('1', 200), ('comment', 200), ('missing', 404)
+        ]
+        assert results[0]['body'] == {'ticket_id': ticket_id, 'status': 'open',
+                                      'updated_at': results[0]['body']['updated_at']}
+        assert results[0]['headers']['ETag'].startswith('W/')
+        assert [t['ticket_id'] for t in results[1]['body']['tickets']] == [ticket_id]
+        assert 'headers' not in results[3]
+        assert results[3]['body'] == {'error': 'Ticket nonexistent not found'}
+    
+    def test_operations_run_concurrently(self, ticket_id):
+        """Test operations overlap on the worker pool instead of running one by one"""
+        barrier = threading.Barrier(2, timeout=2)
+        store = mock_itsm_handler.store
+        
+        def get_ticket(*args, **kwargs):
+            barrier.wait()
+            return MemoryTicketStore.get_ticket(store, *args, **kwargs)
+        
+        with patch.object(store, 'get_ticket', side_effect=get_ticket):
+            _, body = self.batch([
+                {'method': 'GET', 'path': f'/tickets/{ticket_id}', 'query': {'consistent': True}},
+                {'method': 'GET', 'path': f'/tickets/{ticket_id}', 'query': {'consistent': True}}
+            ])
+        
+        assert [r['status'] for r in body['results']] == [200, 200]
+    
+    def test_not_modified_has_no_body(self, ticket_id):
+        """Test a 304 operation result carries its ETag and a null body"""
+        _, first = self.batch([{'method': 'GET', 'path': f'/tickets/{ticket_id}'}])
+        etag = first['results'][0]['headers']['ETag']
+        
+        _, body = self.batch([{'method': 'GET', 'path': f'/tickets/{ticket_id}',
+                               'headers': {'If-None-Match': etag}}])
+        
+        assert body['results'][0] == {'id': '0', 'status': 304, 'headers': {'ETag': etag}, 'body': None}
+    
+    @pytest.mark.parametrize('operations', [None, [], [{'method': 'GET', 'path': '/tickets'}] * 11])
+    def test_invalid_envelope(self, ticket_id, operations):
+        """Test a missing, empty or oversized operations list is rejected"""
+        status, _ = self.batch(operations)
+        
+        assert status == 400
+    
+    def test_invalid_operations(self, ticket_id):
+        """Test malformed and nested operations fail on their own"""
+        _, body = self.batch([
+            {'method': 'GET'},
+            {'method': 'POST', 'path': '/batch', 'body': {'operations': []}},
+            {'method': 'GET', 'path': '/tickets', 'query': 'caller=user-001'},
+            {'method': 'GET', 'path': f'/tickets/{ticket_id}'}
+        ])
+        
+        assert [r['status'] for r in body['results']] == [400, 400, 400, 200]
+    
+    def test_rate_limited_per_operation(self, ticket_id):
+        """Test rate limits apply to each operation as its own route and caller"""
+        limiter = RateLimiter({'GET /tickets/{id}': (1, 60)})
+        
+        with patch('mock_itsm_handler.rate_limiter', limiter):
+            _, body = self.batch([
+                {'method': 'GET', 'path': f'/tickets/{ticket_id}'},
+                {'method': 'GET', 'path': f'/tickets/{ticket_id}'},
+                {'method': 'GET', 'path': '/tickets', 'query': {'caller': 'user-001'}}
+            ], headers={'X-Caller-Id': 'user-001'})
+        
+        statuses = sorted(r['status'] for r in body['results'][:2])
+        assert statuses == [200, 429]
+        assert body['results'][2]['status'] == 200
+
+
+class TestCallerContext:
+    """Test GET /callers/{caller_id}/context"""
+    
+    @pytest.fixture
+    def store(self, handler_backends):
+        store = handler_backends.store
+        for number in range(3):
+            store.put_ticket({
+                'ticket_id': f't-{number}', 'caller_id': 'user-001', 'issue_description': f'Issue {number}',
+                'status': 'open', 'created_at': f'2026-02-09T12:00:0{number}Z',
+                'updated_at': f'2026-02-09T12:00:0{number}Z', 'version': 1
+            })
+            for minute in range(3):
+                store.append_comment(f't-{number}', {
+                    'comment_text': f'Update {minute} on ticket {number} ' + 'x' * 100,
+                    'added_at': f'2026-02-09T12:{minute}{number}:00Z'
+                }, f'2026-02-09T12:{minute}{number}:00Z')
+        return store
+    
+    def context(self, caller_id='user-001', **parameters):
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': f'/callers/{caller_id}/context',
+            'queryStringParameters': parameters or None
+        }, {})
+        return response['statusCode'], response['body']
+    
+    def test_newest_tickets_read_concurrently(self, store):
+        """Test the newest tickets come back with their comments, read in parallel"""
+        barrier = threading.Barrier(2, timeout=2)
+        
+        def get_ticket(*args, **kwargs):
+            barrier.wait()
+            return MemoryTicketStore.get_ticket(store, *args, **kwargs)
+        
+        with patch.object(store, 'get_ticket', side_effect=get_ticket):
+            status, body = self.context(limit='2')
+        
+        document = json.loads(body)
+        assert status == 200
+        assert [t['ticket_id'] for t in document['tickets']] == ['t-2', 't-1']
+        assert document['more_tickets'] is True
+        assert document['omitted_comments'] == 0
+        assert set(document['tickets'][0]) == set(mock_itsm_handler.CONTEXT_ATTRIBUTES)
+        assert len(document['tickets'][0]['comments']) == 3
+    
+    def test_oldest_comments_dropped_first(self, store):
+        """Test the budget drops the oldest comments across tickets, then the oldest tickets"""
+        status, body = self.context(max_bytes='1500')
+        document = json.loads(body)
+        
+        assert status == 200
+        assert len(body) <= 1500
+        remaining = sorted(c['added_at'] for t in document['tickets'] for c in t['comments'])
+        assert document['omitted_comments'] == 9 - len(remaining)
+        assert remaining == sorted(f'2026-02-09T12:{m}{n}:00Z' for m in range(3) for n in range(3))[-len(remaining):]
+        assert [t['comment_count'] for t in document['tickets']] == [3, 3, 3]
+    
+    def test_oldest_tickets_dropped_last(self, store):
+        """Test whole tickets are dropped, oldest first, once no comments are left"""
+        ticket = store.get_ticket('t-0')
+        store.put_ticket(dict(ticket, issue_description='Printer jammed ' * 100, comments=[]))
+        
+        _, body = self.context(max_bytes='1024')
+        document = json.loads(body)
+        assert len(body) <= 1024
+        assert document['omitted_comments'] == 9
+        assert document['omitted_tickets'] == 1
+        assert [t['ticket_id'] for t in document['tickets']] == ['t-2', 't-1']
+    
+    @pytest.mark.parametrize('encoder', ['stdlib', 'orjson'])
+    def test_budget_counts_utf8_bytes(self, store, encoder):
+        """Test non-ASCII text is measured in encoded bytes, with either encoder"""
+        if encoder == 'orjson':
+            pytest.importorskip('orjson')
+        for number in range(3):
+            for minute in range(3, 6):
+                store.append_comment(f't-{number}', {
+                    'comment_text': 'الطابعة لا تعمل بعد تحديث النظام ' * 3,
+                    'added_at': f'2026-02-09T12:{minute}{number}:00Z'
+                }, f'2026-02-09T12:{minute}{number}:00Z')
+        
+        with patch('mock_itsm_handler.encode', serialization.select_encoder(encoder)):
+            status, body = self.context(max_bytes='2048')
+        
+        assert status == 200
+        assert len(body.encode('utf-8')) <= 2048
+        assert json.loads(body)['omitted_comments'] > 0
+    
+    def test_unknown_caller(self, store):
+        """Test a caller without tickets gets an empty context"""
+        status, body = self.context(caller_id='user-999')
+        
+        assert status == 200
+        assert json.loads(body)['tickets'] == []
+    
+    @pytest.mark.parametrize('parameters', [{'limit': '0'}, {'limit': '21'}, {'max_bytes': '100'},
+                                            {'max_bytes': 'lots'}])
+    def test_invalid_parameters(self, store, parameters):
+        """Test out-of-range limits and budgets are rejected"""
+        assert self.context(**parameters)[0] == 400
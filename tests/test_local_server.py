@@ -0,0 +1,124 @@
+import pytest
+import http.client
+import json
+import sys
+import os
+import threading
+from unittest.mock import patch
+
+# Add src/lambda and tools to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import local_server
+import metrics
+
+
+@pytest.fixture
+def server(handler_backends):
+    with patch('metrics.sink', metrics.MemorySink()):
+        server = local_server.PooledHTTPServer(('127.0.0.1', 0), threads=2)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def request(connection, method, path, body=None, headers=None):
+    connection.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    return response.status, json.loads(data) if data else None
+
+
+class TestProxyEvent:
+    """Test translating HTTP requests into proxy events"""
+
+    def test_ticket_path_parameters(self):
+        """Test ticket routes get their resource template and id"""
+        event = local_server.proxy_event('POST', '/tickets/t%201/comments', [], b'{}')
+
+        assert event['resource'] == '/tickets/{id}/comments'
+        assert event['pathParameters'] == {'id': 't 1'}
+        assert event['requestContext']['resourcePath'] == '/tickets/{id}/comments'
+        assert event['body'] == '{}'
+
+    def test_static_resources_not_templated(self):
+        """Test /tickets/search and friends are not mistaken for ticket IDs"""
+        for path in ('/tickets', '/tickets/search', '/tickets/batch', '/tickets/lookup'):
+            event = local_server.proxy_event('GET', path, [], b'')
+            assert event['resource'] == path
+            assert event['pathParameters'] is None
+            assert event['body'] is None
+
+    def test_query_and_headers(self):
+        """Test repeated values keep the last one in the single-value maps"""
+        event = local_server.proxy_event(
+            'GET', '/tickets?caller=a&caller=b&limit=', [('X-Trace', '1'), ('X-Trace', '2')], b''
+        )
+
+        assert event['queryStringParameters'] == {'caller': 'b', 'limit': ''}
+        assert event['multiValueQueryStringParameters'] == {'caller': ['a', 'b'], 'limit': ['']}
+        assert event['headers'] == {'X-Trace': '2'}
+        assert event['multiValueHeaders'] == {'X-Trace': ['1', '2']}
+
+
+class TestServer:
+    """Test serving the handler over HTTP"""
+
+    def test_ticket_flow_on_one_connection(self, server):
+        """Test create, get, comment and list reuse a keep-alive connection"""
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+
+        status, ticket = request(connection, 'POST', '/tickets', {
+            'caller_id': 'user-001', 'issue_description': 'VPN drops every hour'
+        })
+        assert status == 201
+        socket = connection.sock
+        ticket_id = ticket['ticket_id']
+
+        status, body = request(connection, 'GET', f'/tickets/{ticket_id}')
+        assert status == 200
+        assert body['issue_description'] == 'VPN drops every hour'
+
+        status, _ = request(connection, 'POST', f'/tickets/{ticket_id}/comments', {'comment': 'Still dropping'})
+        assert status == 200
+        status, body = request(connection, 'GET', f'/tickets/{ticket_id}/comments')
+        assert [comment['comment_text'] for comment in body['comments']] == ['Still dropping']
+
+        status, body = request(connection, 'GET', '/tickets?caller=user-001')
+        assert [t['ticket_id'] for t in body['tickets']] == [ticket_id]
+        assert connection.sock is socket
+        connection.close()
+
+    def test_handler_errors(self, server):
+        """Test handler error responses pass through with their status"""
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+
+        assert request(connection, 'GET', '/tickets/missing')[0] == 404
+        assert request(connection, 'DELETE', '/unknown')[0] == 404
+        connection.close()
+
+    def test_integration_failure_is_502(self, server):
+        """Test an exception escaping lambda_handler becomes a 502"""
+        connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+
+        with patch('mock_itsm_handler.lambda_handler', side_effect=RuntimeError('boom')):
+            status, body = request(connection, 'GET', '/tickets/t-1')
+
+        assert status == 502
+        assert body == {'message': 'Internal server error'}
+        connection.close()
+
+    def test_lambda_context(self, server):
+        """Test the handler gets a request ID and a remaining-time budget"""
+        with patch('mock_itsm_handler.lambda_handler', return_value={'statusCode': 204, 'body': ''}) as handler:
+            connection = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=5)
+            assert request(connection, 'GET', '/tickets')[0] == 204
+            connection.close()
+
+        event, context = handler.call_args.args
+        assert event['requestContext']['requestId'] == context.aws_request_id
+        assert 0 < context.get_remaining_time_in_millis() <= 10000
@@ -0,0 +1,172 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import metrics
+import mock_itsm_handler
+import ticket_store
+from ticket_store import DynamoDBTicketStore
+
+
+class FakeContext:
+    aws_request_id = 'req-123'
+
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+
+@pytest.fixture
+def sink():
+    """Collect EMF documents in memory"""
+    memory = metrics.MemorySink()
+    with patch('metrics.sink', memory):
+        yield memory
+
+
+@pytest.fixture
+def handler_store(handler_backends):
+    return handler_backends.store
+
+
+def create_event():
+    return {
+        'httpMethod': 'POST',
+        'path': '/tickets',
+        'resource': '/tickets',
+        'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Test issue'})
+    }
+
+
+class TestCreateSink:
+    """Test sink selection"""
+
+    def test_sinks(self):
+        """Test supported METRICS_SINK values"""
+        assert isinstance(metrics.create_sink('emf'), metrics.StdoutSink)
+        assert isinstance(metrics.create_sink('memory'), metrics.MemorySink)
+        assert isinstance(metrics.create_sink('none'), metrics.NullSink)
+
+    def test_unknown_sink(self):
+        """Test invalid METRICS_SINK values are rejected"""
+        with pytest.raises(ValueError):
+            metrics.create_sink('statsd')
+
+    def test_stdout_sink_prints_one_line(self, capsys):
+        """Test EMF documents are written as single JSON lines"""
+        metrics.StdoutSink().emit({'Route': 'GET /tickets'})
+        assert json.loads(capsys.readouterr().out) == {'Route': 'GET /tickets'}
+
+
+class TestHandlerMetrics:
+    """Test per-request metrics from lambda_handler"""
+
+    def test_emits_emf_document(self, sink, handler_store):
+        """Test one EMF document per request with route dimension and timings"""
+        response = mock_itsm_handler.lambda_handler(create_event(), FakeContext())
+
+        assert response['statusCode'] == 201
+        assert len(sink.documents) == 1
+        document = sink.documents[0]
+        directive = document['_aws']['CloudWatchMetrics'][0]
+        assert directive['Namespace'] == metrics.NAMESPACE
+        assert directive['Dimensions'] == [['Route']]
+        names = {metric['Name'] for metric in directive['Metrics']}
+        assert {'Latency', 'ParseTime', 'SerializeTime', 'ColdStart', 'Errors'} <= names
+        assert document['Route'] == 'POST /tickets'
+        assert document['StatusCode'] == 201
+        assert document['RequestId'] == 'req-123'
+        assert document['Errors'] == 0
+        assert document['Latency'] >= document['ParseTime']
+
+    def test_cold_start_flagged_once(self, sink, handler_store):
+        """Test only the first invocation in a container is a cold start"""
+        with patch('metrics._cold_start', True):
+            mock_itsm_handler.lambda_handler(create_event(), {})
+            mock_itsm_handler.lambda_handler(create_event(), {})
+
+        assert [d['ColdStart'] for d in sink.documents] == [1, 0]
+
+    def test_route_label_hides_ticket_ids(self, sink, handler_store):
+        """Test ticket IDs never become metric dimensions"""
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': '/tickets/abc-123',
+            'pathParameters': {'id': 'abc-123'}
+        }, {})
+
+        assert sink.documents[0]['Route'] == 'GET /tickets/{id}'
+        assert sink.documents[0]['StatusCode'] == 404
+
+    def test_unmatched_paths_share_one_route_label(self, sink, handler_store):
+        """Test probes of unknown paths cannot create new metric dimensions"""
+        for path in ('/wp-admin/0x', '/wp-admin/1x', '/.env'):
+            mock_itsm_handler.lambda_handler({'httpMethod': 'GET', 'path': path}, {})
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/batch',
+            'body': json.dumps({'operations': [{'method': 'GET', 'path': '/wp-admin/2x'}]})
+        }, {})
+
+        assert [d['Route'] for d in sink.documents] == ['GET <unmatched>'] * 3 + ['POST /batch']
+        assert [d['StatusCode'] for d in sink.documents] == [404, 404, 404, 200]
+
+    def test_retries_are_counted(self, sink, handler_backends):
+        """Test retries and backoff time are recorded"""
+        table = MagicMock()
+        table.put_item.side_effect = [
+            ClientError({'Error': {'Code': 'ThrottlingException', 'Message': 'Throttled'}}, 'PutItem'),
+            {}
+        ]
+        handler_backends.use(store=DynamoDBTicketStore(table=table))
+        with patch('retry.sleep'), \
+                patch('retry.random.uniform', return_value=0.05):
+            mock_itsm_handler.lambda_handler(create_event(), {})
+
+        document = sink.documents[0]
+        assert document['Retries'] == 1
+        assert document['RetryDelay'] == pytest.approx(50)
+
+    def test_warmup_emits_nothing(self, sink, handler_store):
+        """Test warm-up pings do not skew request metrics"""
+        mock_itsm_handler.lambda_handler({'warmup': True}, {})
+        assert sink.documents == []
+
+
+class TestConsumedCapacity:
+    """Test DynamoDB capacity and call timing"""
+
+    def test_client_table_records_capacity(self, sink):
+        """Test ReturnConsumedCapacity is requested and summed per request"""
+        client = MagicMock()
+        client.get_item.return_value = {'ConsumedCapacity': {'TableName': 't', 'CapacityUnits': 0.5}}
+        client.put_item.return_value = {'ConsumedCapacity': {'TableName': 't', 'CapacityUnits': 1.0}}
+        client.batch_get_item.return_value = {'ConsumedCapacity': [
+            {'TableName': 't', 'CapacityUnits': 2.0}
+        ]}
+        table = ticket_store.ClientTable(client, 't')
+
+        metrics.start_invocation('GET /tickets/{id}')
+        table.get_item(Key={'ticket_id': 't-1'})
+        table.get_item(Key={'ticket_id': 't-2'})
+        table.put_item(Item={'ticket_id': 't-3'})
+        table.batch_get_item(Keys=[{'ticket_id': 't-1'}])
+        document = metrics.finish_invocation(200)
+
+        assert client.get_item.call_args.kwargs['ReturnConsumedCapacity'] == 'TOTAL'
+        assert client.batch_get_item.call_args.kwargs['ReturnConsumedCapacity'] == 'TOTAL'
+        assert document['ReadCapacityUnits'] == 3.0
+        assert document['WriteCapacityUnits'] == 1.0
+        assert document['DynamoDBCalls'] == 4
+        assert 'DynamoDBTime' in document
+
+    def test_recording_outside_a_request_is_a_noop(self, sink):
+        """Test store calls outside lambda_handler do not fail or emit"""
+        metrics.add('DynamoDBCalls')
+        assert metrics.finish_invocation() is None
+        assert sink.documents == []
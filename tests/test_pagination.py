@@ -0,0 +1,69 @@
+import pytest
+import importlib.util
+import sys
+import os
+from unittest.mock import patch
+
+import boto3
+from botocore.stub import Stubber
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+PAGINATION = os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda', 'pagination.py')
+
+
+def load_pagination():
+    """A fresh pagination module, as in a new container"""
+    spec = importlib.util.spec_from_file_location('pagination_under_test', PAGINATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def cursor_env(**env):
+    """os.environ with CURSOR_SECRET / CURSOR_SECRET_ID unset unless given"""
+    environ = {name: value for name, value in os.environ.items() if not name.startswith('CURSOR_SECRET')}
+    return patch.dict(os.environ, dict(environ, **env), clear=True)
+
+
+class TestCursorSecret:
+    """Test where the cursor signing key comes from"""
+
+    def test_missing_secret_fails_only_on_cursors(self):
+        """Test the module imports without a key and refuses to sign or verify"""
+        with cursor_env():
+            pagination = load_pagination()
+
+            with pytest.raises(RuntimeError, match='CURSOR_SECRET'):
+                pagination.encode_cursor({'ticket_id': 't-1'}, 'user-001')
+            with pytest.raises(RuntimeError, match='CURSOR_SECRET'):
+                pagination.decode_cursor('payload.signature', 'user-001')
+
+    def test_shared_secret_verifies_across_containers(self):
+        """Test two containers with one CURSOR_SECRET accept each other's cursors"""
+        with cursor_env(CURSOR_SECRET='shared'):
+            cursor = load_pagination().encode_cursor({'ticket_id': 't-1'}, 'user-001')
+            assert load_pagination().decode_cursor(cursor, 'user-001') == {'ticket_id': 't-1'}
+
+        with cursor_env(CURSOR_SECRET='other'), pytest.raises(ValueError):
+            load_pagination().decode_cursor(cursor, 'user-001')
+
+    def test_secrets_manager_read_once_on_first_cursor(self):
+        """Test CURSOR_SECRET_ID is fetched lazily, once, and used as the key"""
+        client = boto3.client('secretsmanager', region_name='us-east-1')
+        stubber = Stubber(client)
+        stubber.add_response('get_secret_value', {'SecretString': 'shared'},
+                             {'SecretId': 'poc-itsm-cursor-secret'})
+
+        with cursor_env(CURSOR_SECRET_ID='poc-itsm-cursor-secret'), \
+                patch('boto3.client', return_value=client) as create_client, stubber:
+            pagination = load_pagination()
+            assert not create_client.called
+
+            cursor = pagination.encode_cursor({'ticket_id': 't-1'}, 'user-001')
+            assert pagination.decode_cursor(cursor, 'user-001') == {'ticket_id': 't-1'}
+
+        stubber.assert_no_pending_responses()
+        with cursor_env(CURSOR_SECRET='shared'):
+            assert load_pagination().decode_cursor(cursor, 'user-001') == {'ticket_id': 't-1'}
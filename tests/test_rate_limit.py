@@ -0,0 +1,185 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import metrics
+import mock_itsm_handler
+from rate_limit import DynamoDBRateCounters, MemoryRateCounters, RateLimiter, create_shared_counters, parse_rules
+
+COMMENTS = 'POST /tickets/{id}/comments'
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def comment_event(ticket_id='t-1', caller_id='user-001'):
+    return {
+        'httpMethod': 'POST',
+        'resource': '/tickets/{id}/comments',
+        'path': f'/tickets/{ticket_id}/comments',
+        'pathParameters': {'id': ticket_id},
+        'headers': {'X-Caller-Id': caller_id},
+        'body': json.dumps({'comment': 'Still broken'})
+    }
+
+
+class TestParseRules:
+    """Test RATE_LIMITS parsing"""
+
+    def test_rules(self):
+        """Test routes, limits and periods"""
+        rules = parse_rules(f'{COMMENTS}=30/min, GET /tickets=100/10s,*=1000/h')
+
+        assert rules == {COMMENTS: (30, 60), 'GET /tickets': (100, 10), '*': (1000, 3600)}
+        assert parse_rules('') == {}
+
+    @pytest.mark.parametrize('value', ['GET /tickets', 'GET /tickets=ten/min', 'GET /tickets=0/min',
+                                       'GET /tickets=5/day', '=5/min'])
+    def test_invalid_rules(self, value):
+        """Test malformed rules are rejected at startup"""
+        with pytest.raises(ValueError):
+            parse_rules(value)
+
+    def test_unknown_store(self):
+        """Test an unknown RATE_LIMIT_STORE is rejected"""
+        with pytest.raises(ValueError):
+            create_shared_counters('redis')
+
+
+class TestRateLimiter:
+    """Test the in-container token buckets"""
+
+    def test_burst_then_refill(self):
+        """Test the bucket allows the limit at once, then refills over the period"""
+        clock = Clock()
+        limiter = RateLimiter({COMMENTS: (3, 60)}, clock=clock)
+
+        assert [limiter.check(COMMENTS, 'user-001') for _ in range(3)] == [None, None, None]
+        assert limiter.check(COMMENTS, 'user-001') == pytest.approx(20)
+        clock.now += 20
+        assert limiter.check(COMMENTS, 'user-001') is None
+        assert limiter.check(COMMENTS, 'user-001') == pytest.approx(20)
+
+    def test_buckets_per_caller_and_route(self):
+        """Test one caller's bucket does not limit another caller or other routes"""
+        limiter = RateLimiter({COMMENTS: (1, 60)}, clock=Clock())
+
+        assert limiter.check(COMMENTS, 'user-001') is None
+        assert limiter.check(COMMENTS, 'user-001') is not None
+        assert limiter.check(COMMENTS, 'user-002') is None
+        assert limiter.check('GET /tickets', 'user-001') is None
+
+    def test_all_routes_rule(self):
+        """Test a * rule limits a caller across routes, without spending route tokens on rejects"""
+        limiter = RateLimiter({COMMENTS: (5, 60), '*': (2, 60)}, clock=Clock())
+
+        assert limiter.check('GET /tickets', 'user-001') is None
+        assert limiter.check(COMMENTS, 'user-001') is None
+        assert limiter.check(COMMENTS, 'user-001') == pytest.approx(30)
+        assert limiter._buckets[f'{COMMENTS}|user-001'][0] == 4
+
+    def test_least_recently_used_buckets_dropped(self):
+        """Test the bucket map stays bounded"""
+        limiter = RateLimiter({COMMENTS: (1, 60)}, max_buckets=2, clock=Clock())
+
+        for caller in ('a', 'b', 'c'):
+            limiter.check(COMMENTS, caller)
+
+        assert list(limiter._buckets) == [f'{COMMENTS}|b', f'{COMMENTS}|c']
+
+
+class TestSharedCounters:
+    """Test the shared fixed-window counters"""
+
+    def test_limit_shared_across_containers(self):
+        """Test two containers share one window and remember the rejection"""
+        clock = Clock(1030.0)
+        shared = MemoryRateCounters()
+        first = RateLimiter({COMMENTS: (2, 60)}, shared=shared, clock=clock)
+        second = RateLimiter({COMMENTS: (2, 60)}, shared=shared, clock=clock)
+
+        assert first.check(COMMENTS, 'user-001') is None
+        assert second.check(COMMENTS, 'user-001') is None
+        assert first.check(COMMENTS, 'user-001') == pytest.approx(50)
+
+        with patch.object(shared, 'increment') as increment:
+            assert first.check(COMMENTS, 'user-001') == pytest.approx(50)
+        increment.assert_not_called()
+
+        clock.now = 1080.0
+        assert second.check(COMMENTS, 'user-001') is None
+
+    def test_fails_open(self):
+        """Test shared counter errors allow the request and are counted"""
+        shared = MagicMock()
+        shared.increment.side_effect = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}}, 'UpdateItem'
+        )
+        limiter = RateLimiter({COMMENTS: (2, 60)}, shared=shared, clock=Clock())
+
+        with patch('metrics.add') as add:
+            assert limiter.check(COMMENTS, 'user-001') is None
+        add.assert_called_with('RateLimitErrors')
+
+    def test_dynamodb_conditional_counter(self):
+        """Test each window is one conditional ADD and a failed condition rejects"""
+        table = MagicMock()
+        counters = DynamoDBRateCounters(table=table)
+
+        assert counters.increment('k#960', 30, 1020) is True
+        params = table.update_item.call_args.kwargs
+        assert params['Key'] == {'bucket': 'k#960'}
+        assert params['ConditionExpression'] == 'attribute_not_exists(request_count) OR request_count < :limit'
+        assert params['ExpressionAttributeValues'] == {':one': 1, ':limit': 30, ':expires_at': 1020}
+
+        table.update_item.side_effect = ClientError(
+            {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}}, 'UpdateItem'
+        )
+        assert counters.increment('k#960', 30, 1020) is False
+
+
+class TestHandlerRateLimit:
+    """Test 429 responses from the handler"""
+
+    def test_rejected_before_store_call(self):
+        """Test a limited caller gets 429 with Retry-After and no store call"""
+        store = MagicMock()
+        store.append_comment.return_value = {'ticket_id': 't-1', 'caller_id': 'user-001', 'created_at': 'x'}
+        limiter = RateLimiter({COMMENTS: (1, 60)}, clock=Clock())
+        sink = metrics.MemorySink()
+
+        with patch('mock_itsm_handler.store', store), patch('mock_itsm_handler.rate_limiter', limiter), \
+                patch('mock_itsm_handler.SEARCH_INDEX_UPDATES', 'stream'), patch('metrics.sink', sink):
+            assert mock_itsm_handler.lambda_handler(comment_event(), {})['statusCode'] == 200
+            response = mock_itsm_handler.lambda_handler(comment_event(), {})
+            other = mock_itsm_handler.lambda_handler(comment_event(caller_id='user-002'), {})
+
+        assert response['statusCode'] == 429
+        assert response['headers']['Retry-After'] == '60'
+        assert json.loads(response['body']) == {'error': 'Rate limit exceeded'}
+        assert other['statusCode'] == 200
+        assert store.append_comment.call_count == 2
+        assert sink.documents[1]['RateLimited'] == 1
+
+    def test_caller_identity(self):
+        """Test the caller is taken from the header, query, path, body, then API key"""
+        caller = mock_itsm_handler.request_caller
+
+        assert caller({'headers': {'x-caller-id': 'h'}, 'queryStringParameters': {'caller': 'q'}}, {}) == 'h'
+        assert caller({'queryStringParameters': {'caller': 'q'}}, {'caller_id': 'b'}) == 'q'
+        assert caller({'pathParameters': {'caller_id': 'p'}}, {'caller_id': 'b'}) == 'p'
+        assert caller({}, {'caller_id': 'b'}) == 'b'
+        assert caller({'requestContext': {'identity': {'apiKey': 'key', 'sourceIp': '10.0.0.1'}}}, {}) == 'key'
+        assert caller({'requestContext': {'identity': {'sourceIp': '10.0.0.1'}}}, []) == '10.0.0.1'
+        assert caller({}, {}) == 'anonymous'
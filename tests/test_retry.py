@@ -0,0 +1,208 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import mock_itsm_handler
+import retry
+from retry import RetryBudget, RetryDeadlineExceeded, RetryPolicy
+from ticket_store import DynamoDBTicketStore
+
+
+def throttle():
+    return ClientError(
+        {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Throttled'}},
+        'PutItem'
+    )
+
+
+class FakeContext:
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture(autouse=True)
+def no_deadline():
+    """Each test starts without an invocation deadline"""
+    retry.start_deadline({})
+    yield
+    retry.start_deadline({})
+
+
+class TestRetryPolicy:
+    """Test the retry engine"""
+
+    def test_backoff_uses_full_jitter(self):
+        """Test delays are drawn from [0, base * 2**attempt]"""
+        sleeps = []
+        operation = MagicMock(side_effect=[throttle(), throttle(), 'ok'])
+        policy = RetryPolicy(max_attempts=3, base_delay=0.1, sleep=sleeps.append)
+
+        with patch('retry.random.uniform', side_effect=lambda low, high: high) as uniform:
+            assert policy.call(operation) == 'ok'
+
+        assert [c.args for c in uniform.call_args_list] == [(0, 0.1), (0, 0.2)]
+        assert sleeps == [0.1, 0.2]
+        assert policy.retries == 2
+
+    def test_delay_is_capped(self):
+        """Test max_delay caps the backoff window"""
+        assert retry.full_jitter(10, 0.1, 1.0) <= 1.0
+
+    def test_non_retryable_error_raised_immediately(self):
+        """Test validation errors are not retried"""
+        error = ClientError({'Error': {'Code': 'ValidationException', 'Message': 'bad'}}, 'PutItem')
+        operation = MagicMock(side_effect=error)
+
+        with pytest.raises(ClientError):
+            RetryPolicy(sleep=lambda _: None).call(operation)
+
+        assert operation.call_count == 1
+
+    def test_connection_errors_are_retried(self):
+        """Test network failures are retried like throttles"""
+        operation = MagicMock(side_effect=[EndpointConnectionError(endpoint_url='https://dynamodb'), 'ok'])
+
+        assert RetryPolicy(sleep=lambda _: None).call(operation) == 'ok'
+
+    @pytest.mark.parametrize('reasons, retryable', [
+        (['None', 'ThrottlingError'], True),
+        (['TransactionConflict', 'None'], True),
+        (['ConditionalCheckFailed', 'ThrottlingError'], False),
+        (['ValidationError', 'None'], False),
+        ([], False),
+    ])
+    def test_canceled_transactions_by_reason(self, reasons, retryable):
+        """Test only throttled or conflicting transactions are retried"""
+        error = ClientError({
+            'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+            'CancellationReasons': [{'Code': code} for code in reasons]
+        }, 'TransactWriteItems')
+
+        assert retry.is_retryable(error) is retryable
+
+    def test_last_error_is_raised_not_a_bare_exception(self):
+        """Test exhausted retries surface the DynamoDB error"""
+        operation = MagicMock(side_effect=throttle())
+
+        with pytest.raises(ClientError) as excinfo:
+            RetryPolicy(max_attempts=3, sleep=lambda _: None).call(operation)
+
+        assert excinfo.value.response['Error']['Code'] == 'ProvisionedThroughputExceededException'
+        assert operation.call_count == 3
+
+    def test_exhausted_budget_stops_retries(self):
+        """Test a drained retry budget fails fast"""
+        budget = RetryBudget(capacity=5, retry_cost=5)
+        policy = RetryPolicy(budget=budget, sleep=lambda _: None)
+
+        with pytest.raises(ClientError):
+            policy.call(MagicMock(side_effect=throttle()))
+        operation = MagicMock(side_effect=throttle())
+        with pytest.raises(ClientError):
+            policy.call(operation)
+
+        assert operation.call_count == 1
+
+    def test_successes_refill_budget(self):
+        """Test first-try successes refund retry tokens"""
+        budget = RetryBudget(capacity=10, retry_cost=5, success_refund=1)
+        budget.acquire()
+        policy = RetryPolicy(budget=budget)
+
+        policy.call(lambda: 'ok')
+
+        assert budget.tokens == 6
+
+
+class TestDeadline:
+    """Test invocation deadlines"""
+
+    def test_deadline_from_lambda_context(self):
+        """Test the deadline keeps a safety margin"""
+        retry.start_deadline(FakeContext(3000), margin_ms=500)
+        assert 2.4 < retry.time_remaining() <= 2.5
+
+    def test_no_deadline_without_context(self):
+        """Test plain dict contexts (tests, local runs) have no deadline"""
+        retry.start_deadline({})
+        assert retry.time_remaining() is None
+
+    def test_retry_never_sleeps_past_deadline(self):
+        """Test a backoff longer than the remaining time raises instead"""
+        retry.start_deadline(FakeContext(550), margin_ms=500)
+        sleeps = []
+        policy = RetryPolicy(base_delay=1.0, sleep=sleeps.append)
+
+        with patch('retry.random.uniform', return_value=1.0):
+            with pytest.raises(RetryDeadlineExceeded) as excinfo:
+                policy.call(MagicMock(side_effect=throttle()))
+
+        assert sleeps == []
+        assert isinstance(excinfo.value.__cause__, ClientError)
+
+    def test_expired_deadline_skips_call(self):
+        """Test no DynamoDB call starts once the deadline has passed"""
+        retry.start_deadline(FakeContext(100), margin_ms=500)
+        operation = MagicMock()
+
+        with pytest.raises(RetryDeadlineExceeded):
+            RetryPolicy().call(operation)
+
+        operation.assert_not_called()
+
+    def test_attempt_needs_time_for_its_timeout(self):
+        """Test no attempt starts when its timeout would overrun the deadline"""
+        retry.start_deadline(FakeContext(2500), margin_ms=500)
+        operation = MagicMock()
+
+        with pytest.raises(RetryDeadlineExceeded):
+            RetryPolicy(attempt_timeout=3.0).call(operation)
+
+        operation.assert_not_called()
+
+    def test_retry_needs_time_for_backoff_and_attempt(self):
+        """Test a retry is abandoned when backoff plus attempt timeout overruns"""
+        retry.start_deadline(FakeContext(4000), margin_ms=500)
+        sleeps = []
+        policy = RetryPolicy(base_delay=1.0, sleep=sleeps.append, attempt_timeout=3.0)
+        operation = MagicMock(side_effect=throttle())
+
+        with patch('retry.random.uniform', return_value=0.6):
+            with pytest.raises(RetryDeadlineExceeded):
+                policy.call(operation)
+
+        assert operation.call_count == 1
+        assert sleeps == []
+
+    def test_attempt_timeout_from_client_config(self):
+        """Test the attempt timeout is the client's connect plus read timeout"""
+        with patch.dict(os.environ, {'DYNAMODB_CONNECT_TIMEOUT': '0.5', 'DYNAMODB_READ_TIMEOUT': '1.5'}):
+            assert retry.create_retry_policy().attempt_timeout == 2.0
+
+    def test_handler_returns_before_timeout_under_throttling(self, handler_backends):
+        """Test a throttling storm near the deadline returns 500 without sleeping"""
+        table = MagicMock()
+        table.put_item.side_effect = throttle()
+        event = {
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Test issue'})
+        }
+
+        handler_backends.use(store=DynamoDBTicketStore(table=table))
+        with patch('retry.sleep') as sleep, \
+                patch('retry.random.uniform', return_value=0.2):
+            response = mock_itsm_handler.lambda_handler(event, FakeContext(3600))
+
+        assert response['statusCode'] == 500
+        assert table.put_item.call_count == 1
+        sleep.assert_not_called()
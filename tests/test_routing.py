@@ -0,0 +1,161 @@
+import pytest
+import base64
+import json
+import sys
+import os
+from unittest.mock import patch
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import metrics
+import mock_itsm_handler
+from routing import Router, decode_body, normalize_event
+
+
+@pytest.fixture
+def store(handler_backends):
+    """Memory backends behind the handler"""
+    return handler_backends.store
+
+
+def http_api_event(method, path, body=None, query='', route_key=None, stage='$default', **http):
+    """HTTP API (payload v2) event; route_key None is a Function URL"""
+    return {
+        'version': '2.0',
+        'routeKey': route_key or '$default',
+        'rawPath': path,
+        'rawQueryString': query,
+        'headers': {'content-type': 'application/json'},
+        'requestContext': {
+            'stage': stage,
+            'requestId': 'r-1',
+            'http': dict({'method': method, 'path': path, 'sourceIp': '10.0.0.1', 'userAgent': 'test'}, **http)
+        },
+        'body': body,
+        'isBase64Encoded': False
+    }
+
+
+class TestRouter:
+    """Test route registration and matching"""
+
+    def test_static_resources_win_over_templates(self):
+        """Test /tickets/search is not matched as a ticket id"""
+        router = Router()
+        router.add('GET', '/tickets/{id}', 'ticket')
+        router.add('GET', '/tickets/search', 'search')
+        router.add('POST', '/tickets/{id}/comments', 'comment')
+
+        assert router.match('/tickets/search') == ('/tickets/search', None)
+        assert router.match('/tickets/t%2D1') == ('/tickets/{id}', {'id': 't-1'})
+        assert router.match('/tickets/t-1/comments') == ('/tickets/{id}/comments', {'id': 't-1'})
+        assert router.match('/tickets/') == ('/tickets/{id}', {'id': ''})
+        assert router.match('/tickets/t-1/history') is None
+
+    def test_methods_by_resource(self):
+        """Test each resource keeps its own methods"""
+        router = Router()
+
+        @router.route('PATCH', '/tickets/{id}', rate_limited=False)
+        def update(event, body_data):
+            return 'updated'
+
+        router.add('GET', '/tickets/{id}', 'get')
+
+        assert sorted(router.methods('/tickets/{id}')) == ['GET', 'PATCH']
+        assert router.methods('/tickets/{id}')['PATCH'].handler is update
+        assert router.methods('/tickets/{id}')['PATCH'].rate_limited is False
+        assert router.methods('/unknown') == {}
+
+    def test_duplicate_route(self):
+        """Test registering a method twice for one resource is rejected"""
+        router = Router()
+        router.add('GET', '/tickets', 'list')
+
+        with pytest.raises(ValueError):
+            router.add('GET', '/tickets', 'again')
+
+
+class TestNormalizeEvent:
+    """Test the payload v1 view of HTTP API and Function URL events"""
+
+    def test_http_api_event(self):
+        """Test method, stage-less path, query and identity"""
+        event = normalize_event(http_api_event(
+            'GET', '/prod/tickets/t-1', query='fields=status&fields=compact&consistent=true',
+            route_key='GET /tickets/{id}', stage='prod'
+        ))
+
+        assert event['httpMethod'] == 'GET'
+        assert event['path'] == '/tickets/t-1'
+        assert event['resource'] == '/tickets/{id}'
+        assert event['queryStringParameters'] == {'fields': 'compact', 'consistent': 'true'}
+        assert event['requestContext']['identity']['sourceIp'] == '10.0.0.1'
+
+    def test_function_url_event(self):
+        """Test a Function URL event names no resource and its body decodes"""
+        raw = http_api_event('POST', '/tickets', body=base64.b64encode(b'{"caller_id": "user-001"}').decode())
+        raw['isBase64Encoded'] = True
+
+        event = normalize_event(raw)
+
+        assert event['resource'] is None
+        assert event['queryStringParameters'] is None
+        assert decode_body(event) == '{"caller_id": "user-001"}'
+
+    def test_rest_api_event_unchanged(self):
+        """Test v1 events pass through as they are"""
+        event = {'httpMethod': 'GET', 'path': '/tickets', 'queryStringParameters': {'caller': 'user-001'}}
+
+        assert normalize_event(event) is event
+
+
+class TestHandlerEvents:
+    """Test the handler behind an HTTP API and a Function URL"""
+
+    def test_function_url_round_trip(self, store):
+        """Test create, read and comment through Function URL events"""
+        sink = metrics.MemorySink()
+        with patch('metrics.sink', sink):
+            created = mock_itsm_handler.lambda_handler(http_api_event('POST', '/tickets', body=json.dumps({
+                'caller_id': 'user-001', 'issue_description': 'VPN keeps dropping'
+            })), {})
+            ticket_id = json.loads(created['body'])['ticket_id']
+            commented = mock_itsm_handler.lambda_handler(http_api_event(
+                'POST', f'/tickets/{ticket_id}/comments', body=json.dumps({'comment': 'Still dropping'})
+            ), {})
+            fetched = mock_itsm_handler.lambda_handler(http_api_event(
+                'GET', f'/tickets/{ticket_id}', query='fields=compact'
+            ), {})
+
+        assert created['statusCode'] == 201
+        assert commented['statusCode'] == 200
+        assert fetched['statusCode'] == 200
+        assert set(json.loads(fetched['body'])) == {'ticket_id', 'status', 'updated_at'}
+        assert [d['Route'] for d in sink.documents] == [
+            'POST /tickets', 'POST /tickets/{id}/comments', 'GET /tickets/{id}'
+        ]
+
+    @pytest.mark.parametrize('event', [
+        http_api_event('POST', '/tickets', body='abc'),
+        {'httpMethod': 'POST', 'path': '/tickets', 'body': 'abc'},
+    ])
+    def test_invalid_base64_body(self, store, event):
+        """Test a body flagged base64 that does not decode is a 400 with metrics"""
+        sink = metrics.MemorySink()
+        with patch('metrics.sink', sink):
+            response = mock_itsm_handler.lambda_handler(dict(event, isBase64Encoded=True), {})
+
+        assert response['statusCode'] == 400
+        assert json.loads(response['body'])['error'] == 'Invalid base64 request body'
+        assert [d['Route'] for d in sink.documents] == ['POST /tickets']
+
+    def test_http_api_method_not_allowed(self, store):
+        """Test an unrouted method on a known resource is 405 with Allow"""
+        response = mock_itsm_handler.lambda_handler(
+            http_api_event('PUT', '/tickets/t-1/comments', route_key='$default'), {}
+        )
+
+        assert response['statusCode'] == 405
+        assert response['headers']['Allow'] == 'GET, POST'
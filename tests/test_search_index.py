@@ -0,0 +1,323 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import compression
+import mock_itsm_handler
+import search_index
+import search_indexer
+from search_index import DynamoDBSearchIndex, MemorySearchIndex, tokenize
+from ticket_store import MemoryTicketStore
+
+
+def document(number, text, caller_id='user-001', source='d'):
+    return (f't-{number}', caller_id, f'2026-02-09T12:00:0{number}Z', source, text)
+
+
+@pytest.fixture
+def handler_state(handler_backends):
+    """Memory store and index behind the handler"""
+    return handler_backends.store, handler_backends.search_index
+
+
+def create(caller_id, description):
+    response = mock_itsm_handler.lambda_handler({
+        'httpMethod': 'POST',
+        'path': '/tickets',
+        'body': json.dumps({'caller_id': caller_id, 'issue_description': description})
+    }, {})
+    return json.loads(response['body'])['ticket_id']
+
+
+def search(query, **parameters):
+    response = mock_itsm_handler.lambda_handler({
+        'httpMethod': 'GET',
+        'path': '/tickets/search',
+        'queryStringParameters': dict(parameters, q=query)
+    }, {})
+    return response['statusCode'], json.loads(response['body'])
+
+
+class TestTokenize:
+    """Test term extraction"""
+
+    def test_terms(self):
+        """Test lowercasing, stopwords and plural folding"""
+        assert tokenize('The printers on floor 3 are jammed, PRINTER jammed!') == {
+            'printer': 2, 'floor': 1, '3': 1, 'jammed': 2
+        }
+
+    def test_short_words_kept_intact(self):
+        """Test short words and double-s endings are not folded"""
+        assert set(tokenize('vpn access gas')) == {'vpn', 'access', 'gas'}
+
+
+class TestSearchIndex:
+    """Test indexing and ranking in the memory index"""
+
+    def test_rare_terms_rank_higher(self):
+        """Test a ticket matching the rarer query term ranks first"""
+        index = MemorySearchIndex()
+        index.index_documents([
+            document(1, 'Laptop screen flickers'),
+            document(2, 'Laptop battery drains'),
+            document(3, 'Laptop will not boot'),
+        ])
+
+        results = index.search('laptop battery')
+
+        assert [r['ticket_id'] for r in results] == ['t-2', 't-3', 't-1']
+        assert results[0]['score'] > results[1]['score']
+
+    def test_comments_contribute(self):
+        """Test comment postings match the ticket they belong to"""
+        index = MemorySearchIndex()
+        index.index_documents([
+            document(1, 'Outlook not syncing'),
+            document(1, 'Error 0x800CCC0E after password change', source='c2026-02-09T12:30:00Z'),
+        ])
+
+        assert [r['ticket_id'] for r in index.search('password')] == ['t-1']
+
+    def test_caller_filter_and_limit(self):
+        """Test results are limited to the caller and to limit"""
+        index = MemorySearchIndex()
+        index.index_documents([document(n, 'VPN drops', caller_id=f'user-00{n % 2}') for n in range(6)])
+
+        results = index.search('vpn', caller_id='user-001', limit=2)
+
+        assert [r['ticket_id'] for r in results] == ['t-5', 't-3']
+
+    def test_caller_matches_beyond_newest_postings(self):
+        """Test a caller's older tickets are found behind other callers' newer postings"""
+        index = MemorySearchIndex()
+        index.index_documents([document(1, 'Printer jammed', caller_id='user-001')])
+        index.index_documents([document(n, 'Printer offline', caller_id='user-002') for n in range(2, 10)])
+
+        with patch('search_index.MAX_POSTINGS', 5):
+            results = index.search('printer', caller_id='user-001')
+
+        assert [r['ticket_id'] for r in results] == ['t-1']
+
+    def test_compressed_text_indexed(self):
+        """Test compressed descriptions are decoded before indexing"""
+        stored = compression.TextCompressor('zlib', min_bytes=0).encode('Docking station unresponsive ' * 20)
+        index = MemorySearchIndex()
+        index.index_documents([document(1, stored)])
+
+        assert index.search('docking')[0]['ticket_id'] == 't-1'
+
+    def test_unknown_backend(self):
+        """Test invalid SEARCH_INDEX values are rejected"""
+        with pytest.raises(ValueError):
+            search_index.create_search_index('elasticsearch')
+
+
+class TestDynamoDBSearchIndex:
+    """Test the DynamoDB search table requests"""
+
+    def test_postings_batch_written(self):
+        """Test postings are written in batches of 25"""
+        table = MagicMock()
+        table.batch_write_item.return_value = {'UnprocessedItems': []}
+        index = DynamoDBSearchIndex(table=table)
+
+        text = ' '.join(f'word{n}' for n in range(30))
+        unprocessed = index.index_documents([document(1, text), document(2, 'printer')])
+
+        assert unprocessed == []
+        sizes = [len(call.kwargs['Items']) for call in table.batch_write_item.call_args_list]
+        assert sizes == [25, 6]
+        first = table.batch_write_item.call_args_list[0].kwargs['Items'][0]
+        assert first['posting_key'] == '2026-02-09T12:00:01Z#t-1#d'
+        assert first['caller_id'] == 'user-001'
+        assert first['caller_term'] == f"user-001#{first['term']}"
+
+    def test_query_newest_first(self):
+        """Test each term is one Query of the term's postings, newest first"""
+        table = MagicMock()
+        table.query.return_value = {'Items': []}
+        index = DynamoDBSearchIndex(table=table)
+
+        index.search('printer jam')
+
+        assert [call.kwargs for call in table.query.call_args_list] == [{
+            'KeyConditionExpression': '#term = :term',
+            'ExpressionAttributeNames': {'#term': 'term'},
+            'ExpressionAttributeValues': {':term': term},
+            'ScanIndexForward': False,
+            'Limit': search_index.MAX_POSTINGS
+        } for term in ('printer', 'jam')]
+
+    def test_caller_query_reads_caller_postings(self):
+        """Test a caller search queries the caller's postings, not a filtered term"""
+        table = MagicMock()
+        table.query.return_value = {'Items': [
+            {'term': 'printer', 'posting_key': 'k', 'ticket_id': 't-1', 'caller_id': 'user-001',
+             'created_at': '2026-02-09T12:00:01Z', 'tf': 1}
+        ]}
+        index = DynamoDBSearchIndex(table=table)
+
+        results = index.search('printer', caller_id='user-001')
+
+        assert results[0]['ticket_id'] == 't-1'
+        table.query.assert_called_once_with(
+            IndexName='CallerTermIndex',
+            KeyConditionExpression='caller_term = :caller_term',
+            ExpressionAttributeValues={':caller_term': 'user-001#printer'},
+            ScanIndexForward=False,
+            Limit=search_index.MAX_POSTINGS
+        )
+
+
+class TestSearchRoute:
+    """Test GET /tickets/search"""
+
+    def test_created_and_commented_tickets_found(self, handler_state):
+        """Test inline indexing on create and comment"""
+        printer = create('user-001', 'Printer on floor 3 jammed')
+        laptop = create('user-002', 'Laptop will not charge')
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': f'/tickets/{laptop}/comments',
+            'pathParameters': {'id': laptop},
+            'body': json.dumps({'comment': 'Printer also offline'})
+        }, {})
+
+        status, body = search('printer')
+        _, by_caller = search('printer', caller='user-002')
+
+        assert status == 200
+        assert [r['ticket_id'] for r in body['results']] == [laptop, printer]
+        assert body['results'][0]['status'] == 'open'
+        assert body['results'][0]['caller_id'] == 'user-002'
+        assert [r['ticket_id'] for r in by_caller['results']] == [laptop]
+
+    def test_missing_tickets_skipped(self, handler_state):
+        """Test postings of tickets no longer in the store are dropped"""
+        _, index = handler_state
+        index.index_documents([document(1, 'Orphaned printer ticket')])
+
+        status, body = search('printer')
+
+        assert status == 200
+        assert body['results'] == []
+
+    def test_unread_tickets_retried_then_reported(self, handler_state):
+        """Test throttled ticket reads are retried once and then listed, not dropped"""
+        store, _ = handler_state
+        printer = create('user-001', 'Printer jammed')
+        scanner = create('user-001', 'Printer scanner offline')
+        get_tickets = store.get_tickets
+        reads = []
+
+        def throttled(ticket_ids, consistent=False):
+            reads.append(list(ticket_ids))
+            found, _ = get_tickets([ticket_id for ticket_id in ticket_ids if ticket_id != printer])
+            return found, [ticket_id for ticket_id in ticket_ids if ticket_id == printer]
+
+        with patch.object(store, 'get_tickets', side_effect=throttled):
+            status, body = search('printer')
+
+        assert status == 200
+        assert [r['ticket_id'] for r in body['results']] == [scanner]
+        assert body['unavailable'] == [printer]
+        assert reads[1] == [printer]
+
+    @pytest.mark.parametrize('query,parameters', [
+        ('', {}),
+        ('the and of', {}),
+        ('printer', {'limit': '0'}),
+        ('printer', {'limit': '51'}),
+        ('printer', {'limit': 'many'}),
+    ])
+    def test_invalid_requests(self, handler_state, query, parameters):
+        """Test empty queries and out-of-range limits are rejected"""
+        status, _ = search(query, **parameters)
+        assert status == 400
+
+    def test_stream_mode_skips_inline_indexing(self, handler_state):
+        """Test SEARCH_INDEX_UPDATES=stream leaves indexing to the stream handler"""
+        with patch('mock_itsm_handler.SEARCH_INDEX_UPDATES', 'stream'):
+            create('user-001', 'Printer jammed')
+
+        assert search('printer')[1]['results'] == []
+
+    def test_index_failure_does_not_fail_create(self, handler_state):
+        """Test the ticket is still created when indexing fails"""
+        index = MagicMock()
+        index.index_documents.side_effect = RuntimeError('search table unavailable')
+        with patch('mock_itsm_handler.search_index', index):
+            response = mock_itsm_handler.lambda_handler({
+                'httpMethod': 'POST',
+                'path': '/tickets',
+                'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'Printer jammed'})
+            }, {})
+
+        assert response['statusCode'] == 201
+
+
+class TestSearchIndexer:
+    """Test the DynamoDB Streams indexer"""
+
+    def test_indexes_inserted_tickets_and_comments(self):
+        """Test ticket and comment INSERT records become postings"""
+        store = MemoryTicketStore()
+        store.put_ticket({
+            'ticket_id': 't-1', 'caller_id': 'user-001', 'issue_description': 'Laptop not charging',
+            'status': 'open', 'created_at': '2026-02-09T12:00:01Z', 'updated_at': '2026-02-09T12:00:01Z'
+        })
+        index = MemorySearchIndex()
+        event = {'Records': [
+            {'eventName': 'INSERT', 'dynamodb': {'NewImage': {
+                'ticket_id': {'S': 't-1'}, 'caller_id': {'S': 'user-001'},
+                'issue_description': {'S': 'Laptop not charging'}, 'created_at': {'S': '2026-02-09T12:00:01Z'}
+            }}},
+            {'eventName': 'INSERT', 'dynamodb': {'NewImage': {
+                'ticket_id': {'S': 't-1'}, 'comment_key': {'S': '2026-02-09T12:30:00Z#0001'},
+                'comment_text': {'S': 'Charger light blinking'}, 'added_at': {'S': '2026-02-09T12:30:00Z'}
+            }}},
+            {'eventName': 'MODIFY', 'dynamodb': {'NewImage': {
+                'ticket_id': {'S': 't-1'}, 'issue_description': {'S': 'Modified text'}
+            }}},
+        ]}
+
+        with patch('search_indexer.store', store), patch('search_indexer.search_index', index):
+            result = search_indexer.lambda_handler(event, {})
+
+        assert result == {'indexed': 2}
+        assert [r['ticket_id'] for r in index.search('charger')] == ['t-1']
+        assert index.search('modified') == []
+
+    def test_unprocessed_postings_raise(self):
+        """Test write failures surface so Lambda retries the batch"""
+        index = MagicMock()
+        index.index_documents.return_value = [{'term': 'laptop'}]
+        event = {'Records': [{'eventName': 'INSERT', 'dynamodb': {'NewImage': {
+            'ticket_id': {'S': 't-1'}, 'caller_id': {'S': 'user-001'},
+            'issue_description': {'S': 'Laptop'}, 'created_at': {'S': '2026-02-09T12:00:01Z'}
+        }}}]}
+
+        with patch('search_indexer.search_index', index), pytest.raises(RuntimeError):
+            search_indexer.lambda_handler(event, {})
+
+    def test_unread_comment_tickets_raise(self):
+        """Test a throttled ticket read fails the batch instead of dropping the comment"""
+        store = MagicMock()
+        store.get_tickets.return_value = ({}, ['t-1'])
+        index = MagicMock()
+        event = {'Records': [{'eventName': 'INSERT', 'dynamodb': {'NewImage': {
+            'ticket_id': {'S': 't-1'}, 'comment_key': {'S': '2026-02-09T12:30:00Z#0001'},
+            'comment_text': {'S': 'Charger light blinking'}, 'added_at': {'S': '2026-02-09T12:30:00Z'}
+        }}}]}
+
+        with patch('search_indexer.store', store), patch('search_indexer.search_index', index), \
+                pytest.raises(RuntimeError):
+            search_indexer.lambda_handler(event, {})
+
+        index.index_documents.assert_not_called()
@@ -0,0 +1,83 @@
+import pytest
+import json
+import sys
+import os
+import uuid
+from decimal import Decimal
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import serialization
+
+
+@pytest.fixture(params=['stdlib', 'orjson'])
+def encoder(request):
+    """Each available body encoder"""
+    if request.param == 'orjson' and serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    return serialization.select_encoder(request.param)
+
+
+@pytest.fixture
+def ticket():
+    """Ticket as returned by DynamoDB, with Decimal numbers"""
+    return {
+        'ticket_id': 'test-ticket-123',
+        'caller_id': 'user-001',
+        'issue_description': 'Laptop not turning on',
+        'status': 'open',
+        'created_at': '2026-02-09T12:00:00Z',
+        'updated_at': '2026-02-09T12:00:00Z',
+        'comment_count': Decimal('2'),
+        'comments': [{'comment_text': 'Rebooted', 'added_at': '2026-02-09T12:30:00Z'}]
+    }
+
+
+class TestEncoders:
+    """Test Decimal-aware encoding"""
+
+    def test_decimals_become_numbers(self, encoder, ticket):
+        """Test DynamoDB Decimals are emitted as JSON numbers"""
+        ticket['score'] = Decimal('0.75')
+
+        body = json.loads(encoder(ticket))
+
+        assert body['comment_count'] == 2
+        assert isinstance(body['comment_count'], int)
+        assert body['score'] == 0.75
+
+    def test_encoders_agree(self, encoder, ticket):
+        """Test every encoder produces the same document"""
+        assert json.loads(encoder(ticket)) == json.loads(serialization.select_encoder('stdlib')(ticket))
+
+    def test_unknown_types_fall_back_to_str(self, encoder):
+        """Test non-JSON values still encode"""
+        value = uuid.UUID('33567ee8-f182-4f8a-b03e-2f1515915471')
+        body = json.loads(encoder({'id': value}))
+        assert body['id'] == '33567ee8-f182-4f8a-b03e-2f1515915471'
+
+    def test_unknown_encoder(self):
+        """Test invalid RESPONSE_JSON_ENCODER values are rejected"""
+        with pytest.raises(ValueError):
+            serialization.select_encoder('simplejson')
+
+
+class TestJsonResponse:
+    """Test the response envelope"""
+
+    def test_envelope(self, ticket):
+        """Test status, shared headers and encoded body"""
+        response = serialization.json_response(200, ticket)
+
+        assert response['statusCode'] == 200
+        assert response['headers'] is serialization.JSON_HEADERS
+        assert json.loads(response['body'])['ticket_id'] == 'test-ticket-123'
+
+    def test_custom_headers(self):
+        """Test per-response headers do not touch the shared headers"""
+        headers = dict(serialization.JSON_HEADERS, **{'Retry-After': '1'})
+        response = serialization.json_response(429, {'error': 'Slow down'}, headers=headers)
+
+        assert response['headers']['Retry-After'] == '1'
+        assert 'Retry-After' not in serialization.JSON_HEADERS
@@ -0,0 +1,211 @@
+import pytest
+import json
+import sys
+import os
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+# Add src/lambda and tools to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import table_snapshot
+from ticket_store import DynamoDBTicketStore, MemoryTicketStore
+
+TRANSCRIPT = ' '.join(f'[00:{second:02d}] Caller: the dock will not detect my monitor.' for second in range(40))
+
+
+def ticket(number, **extra):
+    item = {
+        'ticket_id': f't-{number:03d}',
+        'caller_id': f'user-{number % 3:03d}',
+        'issue_description': f'Issue {number}',
+        'status': 'open',
+        'created_at': f'2026-02-09T12:{number // 60:02d}:{number % 60:02d}Z',
+        'updated_at': f'2026-02-09T12:{number // 60:02d}:{number % 60:02d}Z',
+        'comment_count': 0,
+        'version': 1
+    }
+    item.update(extra)
+    return item
+
+
+@pytest.fixture
+def source():
+    store = MemoryTicketStore()
+    for number in range(40):
+        store.put_ticket(ticket(number))
+    store.put_ticket(ticket(40, issue_description=TRANSCRIPT, comments=[
+        {'comment_text': 'Legacy inline comment', 'added_at': '2026-02-09T12:01:00Z'}
+    ], comment_count=Decimal(1)))
+    for number in range(0, 40, 3):
+        for minute in range(number % 4):
+            added_at = f'2026-02-10T09:{minute:02d}:00Z'
+            store.append_comment(ticket(number)['ticket_id'], {
+                'comment_text': f'Follow-up {minute} on issue {number}', 'added_at': added_at
+            }, added_at)
+    store.append_comment('t-040', {'comment_text': TRANSCRIPT, 'added_at': '2026-02-10T09:00:00Z'},
+                         '2026-02-10T09:00:00Z')
+    with patch('table_snapshot.store', store):
+        yield store
+
+
+def export(output_dir, *options):
+    return table_snapshot.main(['export', '--output-dir', str(output_dir), '--segments', '4',
+                                '--workers', '2', '--page-size', '7', *options])
+
+
+def exported_lines(output_dir, table='tickets'):
+    lines = []
+    for path in table_snapshot.input_files(str(output_dir)):
+        if table_snapshot.file_table(path) != table:
+            continue
+        with open(path) as f:
+            lines.extend(json.loads(line) for line in f)
+    return lines
+
+
+class TestExport:
+    """Test the segmented export"""
+
+    def test_every_ticket_once_as_api_json(self, source, tmp_path):
+        """Test segments partition the table and lines are plain JSON tickets"""
+        assert export(tmp_path) == 0
+
+        lines = exported_lines(tmp_path)
+        assert sorted(line['ticket_id'] for line in lines) == sorted(ticket(n)['ticket_id'] for n in range(41))
+        long_ticket = next(line for line in lines if line['ticket_id'] == 't-040')
+        assert long_ticket['issue_description'] == TRANSCRIPT
+        assert long_ticket['comment_count'] == 2
+        checkpoint = json.loads((tmp_path / 'checkpoint.json').read_text())
+        assert all(progress['done'] for table in table_snapshot.TABLES for progress in checkpoint[table].values())
+
+    def test_comment_items_exported(self, source, tmp_path):
+        """Test every comments table item is exported once with its key and plain text"""
+        export(tmp_path)
+
+        lines = exported_lines(tmp_path, 'comments')
+        keys = [(line['ticket_id'], line['comment_key']) for line in lines]
+        assert len(keys) == len(set(keys)) == 22
+        transcript = next(line for line in lines if line['ticket_id'] == 't-040')
+        assert transcript['comment_text'] == TRANSCRIPT
+        assert transcript['added_at'] == '2026-02-10T09:00:00Z'
+
+    def test_resume_after_failure(self, source, tmp_path):
+        """Test a rerun continues from the checkpoints without duplicates"""
+        scan = source.scan_segment
+
+        def flaky(segment, total_segments, limit, start_key=None):
+            if segment == 2 and start_key is not None:
+                raise RuntimeError('connection reset')
+            return scan(segment, total_segments, limit, start_key)
+
+        with patch.object(source, 'scan_segment', side_effect=flaky), patch('retry.sleep'), \
+                patch.object(table_snapshot.retry_policy, 'max_attempts', 1):
+            with pytest.raises(RuntimeError):
+                export(tmp_path)
+        # Simulate lines written after the last checkpoint
+        with open(table_snapshot.part_path(str(tmp_path), 2), 'a') as f:
+            f.write('{"ticket_id": "partial"}\n')
+
+        export(tmp_path)
+
+        ticket_ids = [line['ticket_id'] for line in exported_lines(tmp_path)]
+        assert len(ticket_ids) == len(set(ticket_ids)) == 41
+        assert len(exported_lines(tmp_path, 'comments')) == 22
+
+    def test_segment_count_must_match_checkpoint(self, source, tmp_path):
+        """Test resuming with a different --segments is refused"""
+        export(tmp_path)
+        with pytest.raises(ValueError):
+            table_snapshot.main(['export', '--output-dir', str(tmp_path), '--segments', '2'])
+
+    def test_dynamodb_segment_scan(self):
+        """Test the store issues a segmented Scan"""
+        table = MagicMock()
+        table.scan.return_value = {'Items': [ticket(1)], 'LastEvaluatedKey': {'ticket_id': 't-001'}}
+        store = DynamoDBTicketStore(table=table, comments_table=MagicMock())
+
+        items, last_key = store.scan_segment(3, 8, limit=100, start_key={'ticket_id': 't-000'})
+
+        table.scan.assert_called_once_with(Segment=3, TotalSegments=8, Limit=100,
+                                           ExclusiveStartKey={'ticket_id': 't-000'})
+        assert last_key == {'ticket_id': 't-001'}
+        assert items[0]['ticket_id'] == 't-001'
+
+    def test_dynamodb_comment_segment_scan(self):
+        """Test comment segments scan the comments table"""
+        comments_table = MagicMock()
+        comments_table.scan.return_value = {'Items': [
+            {'ticket_id': 't-001', 'comment_key': '2026-02-10T09:00:00Z#abc', 'comment_text': 'Rebooted',
+             'added_at': '2026-02-10T09:00:00Z'}
+        ]}
+        store = DynamoDBTicketStore(table=MagicMock(), comments_table=comments_table)
+
+        items, last_key = store.scan_comment_segment(1, 8, limit=100)
+
+        comments_table.scan.assert_called_once_with(Segment=1, TotalSegments=8, Limit=100)
+        assert last_key is None
+        assert items[0]['comment_text'] == 'Rebooted'
+
+
+class TestImport:
+    """Test the bulk import"""
+
+    def test_round_trip(self, source, tmp_path):
+        """Test an export imported into an empty table reproduces the tickets"""
+        export(tmp_path)
+        target = MemoryTicketStore()
+
+        with patch('table_snapshot.store', target):
+            assert table_snapshot.main(['import', '--input', str(tmp_path), '--rate', '0']) == 0
+
+        for number in range(41):
+            ticket_id = ticket(number)['ticket_id']
+            assert target.get_ticket(ticket_id) == source.get_ticket(ticket_id)
+            assert target.query_comments(ticket_id, 50) == source.query_comments(ticket_id, 50)
+        assert target.get_ticket('t-039')['comment_count'] == 3
+        assert isinstance(target._items['t-040']['issue_description'], bytes)
+        assert isinstance(target._comments['t-040'][0]['comment_text'], bytes)
+
+    def test_reimport_writes_the_same_comments(self, source, tmp_path):
+        """Test importing twice keeps one item per comment key"""
+        export(tmp_path)
+        target = MemoryTicketStore()
+
+        with patch('table_snapshot.store', target):
+            table_snapshot.main(['import', '--input', str(tmp_path), '--rate', '0'])
+            table_snapshot.main(['import', '--input', str(tmp_path), '--rate', '0'])
+
+        assert sum(len(records) for records in target._comments.values()) == 22
+
+    def test_numbers_parsed_as_decimal(self, tmp_path):
+        """Test fractional numbers reach the serializer as Decimal"""
+        path = tmp_path / 'tickets.ndjson'
+        path.write_text(json.dumps(ticket(1, score=0.5)) + '\n\n' + json.dumps(ticket(2)) + '\n')
+
+        batches = list(table_snapshot.read_batches(str(path), 25))
+
+        assert len(batches) == 1
+        assert batches[0][0]['score'] == Decimal('0.5')
+
+    def test_unprocessed_items_fail_the_run(self, tmp_path):
+        """Test items DynamoDB never accepted are reported with exit code 1"""
+        path = tmp_path / 'tickets.ndjson'
+        path.write_text(json.dumps(ticket(1)) + '\n')
+        store = MagicMock()
+        store.put_tickets.return_value = [ticket(1)]
+
+        with patch('table_snapshot.store', store):
+            assert table_snapshot.main(['import', '--input', str(path), '--rate', '0']) == 1
+
+    def test_rate_limiter_paces_batches(self):
+        """Test acquisitions are spaced by units / rate"""
+        with patch('table_snapshot.time.monotonic', return_value=10.0), \
+                patch('table_snapshot.time.sleep') as sleep:
+            limiter = table_snapshot.RateLimiter(100)
+            limiter.acquire(25)
+            limiter.acquire(25)
+            limiter.acquire(25)
+
+        assert [call.args[0] for call in sleep.call_args_list] == pytest.approx([0.25, 0.5])
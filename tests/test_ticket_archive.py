@@ -0,0 +1,316 @@
+import pytest
+import gzip
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import mock_itsm_handler
+import ticket_archive
+import ticket_archiver
+from object_store import LocalObjectStore, MemoryObjectStore, S3ObjectStore, create_object_store
+from ticket_archive import DynamoDBArchiveIndex, MemoryArchiveIndex, TicketArchive
+from ticket_store import DynamoDBTicketStore, MemoryTicketStore
+
+TTL_DELETE = {'type': 'Service', 'principalId': 'dynamodb.amazonaws.com'}
+
+
+def ticket(number, status='closed', **attributes):
+    return dict({
+        'ticket_id': f't-{number}', 'caller_id': 'user-001', 'issue_description': f'Issue {number}',
+        'status': status, 'created_at': f'2026-02-09T12:00:0{number}Z', 'updated_at': f'2026-02-10T08:00:0{number}Z'
+    }, **attributes)
+
+
+def remove_record(item, identity=TTL_DELETE):
+    record = {'eventName': 'REMOVE', 'dynamodb': {'OldImage': {
+        name: {'N': str(value)} if isinstance(value, int) else {'S': value} for name, value in item.items()
+    }}}
+    if identity:
+        record['userIdentity'] = identity
+    return record
+
+
+@pytest.fixture
+def archive():
+    return TicketArchive(MemoryObjectStore(), MemoryArchiveIndex())
+
+
+@pytest.fixture
+def handler_state(handler_backends, archive):
+    """Memory store and archive behind the handler"""
+    handler_backends.use(ticket_archive=archive)
+    return handler_backends.store, archive
+
+
+def get(ticket_id, **parameters):
+    response = mock_itsm_handler.lambda_handler({
+        'httpMethod': 'GET',
+        'path': f'/tickets/{ticket_id}',
+        'pathParameters': {'id': ticket_id},
+        'queryStringParameters': parameters or None
+    }, {})
+    return response['statusCode'], json.loads(response['body'])
+
+
+class TestObjectStores:
+    """Test the archive object store backends"""
+
+    def test_local_round_trip(self, tmp_path):
+        """Test objects are files under the archive directory"""
+        objects = LocalObjectStore(root=str(tmp_path))
+
+        objects.put('2026/02/10/a.ndjson.gz', b'data')
+
+        assert objects.get('2026/02/10/a.ndjson.gz') == b'data'
+        assert (tmp_path / '2026' / '02' / '10' / 'a.ndjson.gz').read_bytes() == b'data'
+        assert objects.get('2026/02/10/missing.ndjson.gz') is None
+
+    def test_s3_requests(self):
+        """Test keys are prefixed and a missing object reads as None"""
+        client = MagicMock()
+        client.get_object.side_effect = [
+            {'Body': MagicMock(read=MagicMock(return_value=b'data'))},
+            ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'missing'}}, 'GetObject')
+        ]
+        objects = S3ObjectStore(bucket='archive-bucket', prefix='tickets/', client=client)
+
+        objects.put('k.ndjson.gz', b'data')
+
+        client.put_object.assert_called_once_with(Bucket='archive-bucket', Key='tickets/k.ndjson.gz', Body=b'data')
+        assert objects.get('k.ndjson.gz') == b'data'
+        assert objects.get('missing') is None
+
+    def test_s3_errors_raised(self):
+        """Test errors other than a missing object propagate"""
+        client = MagicMock()
+        client.get_object.side_effect = ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'no'}}, 'GetObject')
+
+        with pytest.raises(ClientError):
+            S3ObjectStore(client=client).get('k')
+
+    def test_unknown_backend(self):
+        """Test an unknown ARCHIVE_OBJECT_STORE is rejected"""
+        with pytest.raises(ValueError):
+            create_object_store('ftp')
+
+
+class TestTicketArchive:
+    """Test writing and reading archive batches"""
+
+    def test_batch_object_and_index(self, archive):
+        """Test one gzip NDJSON object per batch, each ticket indexed by line"""
+        comments = [{'comment_text': f'Comment {n}', 'added_at': f'2026-02-09T13:00:{n:02d}Z'} for n in range(12)]
+        key = archive.write_batch([ticket(1, comments=comments), ticket(2, comments=[])],
+                                  archived_at='2026-03-12T04:00:00Z')
+
+        assert key.startswith('2026/03/12/') and key.endswith('.ndjson.gz')
+        lines = gzip.decompress(archive.objects.get(key)).decode('utf-8').splitlines()
+        assert [json.loads(line)['ticket_id'] for line in lines] == ['t-1', 't-2']
+        assert len(json.loads(lines[0])['comments']) == 12
+        assert archive.index.get('t-2') == {
+            'ticket_id': 't-2', 'object_key': key, 'line': 1, 'caller_id': 'user-001',
+            'updated_at': '2026-02-10T08:00:02Z', 'archived_at': '2026-03-12T04:00:00Z'
+        }
+
+        restored = archive.get_ticket('t-1')
+        assert restored['archived_at'] == '2026-03-12T04:00:00Z'
+        assert [c['comment_text'] for c in restored['comments']] == [f'Comment {n}' for n in range(2, 12)]
+        assert archive.get_ticket('t-3') is None
+
+    def test_unindexed_entries_raise(self):
+        """Test index write failures surface so the batch is retried"""
+        index = MagicMock()
+        index.put_entries.return_value = [{'ticket_id': 't-1'}]
+
+        with pytest.raises(RuntimeError):
+            TicketArchive(MemoryObjectStore(), index).write_batch([ticket(1)])
+
+    def test_dynamodb_index_batches(self):
+        """Test index entries are written in batches of 25"""
+        table = MagicMock()
+        table.batch_write_item.return_value = {'UnprocessedItems': []}
+        index = DynamoDBArchiveIndex(table=table)
+
+        assert index.put_entries([{'ticket_id': f't-{n}'} for n in range(30)]) == []
+        assert [len(call.kwargs['Items']) for call in table.batch_write_item.call_args_list] == [25, 5]
+
+    def test_expiry_only_for_final_statuses(self):
+        """Test resolved and closed tickets expire after TICKET_ARCHIVE_AFTER_DAYS"""
+        with patch('ticket_archive.ARCHIVE_AFTER_DAYS', 30):
+            assert ticket_archive.expiry_for('closed', now=1000) == 1000 + 30 * 86400
+            assert ticket_archive.expiry_for('resolved', now=1000) == 1000 + 30 * 86400
+            assert ticket_archive.expiry_for('open', now=1000) is None
+        with patch('ticket_archive.ARCHIVE_AFTER_DAYS', 0):
+            assert ticket_archive.expiry_for('closed') is None
+
+
+class TestTicketStoreTTL:
+    """Test the expires_at TTL and comment cleanup in the ticket stores"""
+
+    def test_dynamodb_update_sets_and_removes_ttl(self):
+        """Test expires_at is set with the status change or removed"""
+        table = MagicMock()
+        table.update_item.return_value = {'Attributes': ticket(1, version=1)}
+        store = DynamoDBTicketStore(table=table)
+
+        store.update_status('t-1', 'closed', ['open'], '2026-02-10T08:00:01Z', expires_at=1775000000)
+        params = table.update_item.call_args.kwargs
+        assert params['UpdateExpression'] == (
+            'SET #status = :status, updated_at = :timestamp, expires_at = :expires_at ADD version :one'
+        )
+        assert params['ExpressionAttributeValues'][':expires_at'] == 1775000000
+
+        store.update_status('t-1', 'open', ['resolved'], '2026-02-10T08:00:01Z')
+        assert table.update_item.call_args.kwargs['UpdateExpression'].endswith('REMOVE expires_at')
+
+    def test_ttl_hidden_from_reads(self):
+        """Test expires_at never reaches API reads, but exports keep it"""
+        store = MemoryTicketStore()
+        store.put_ticket(ticket(1, status='open'))
+
+        updated = store.update_status('t-1', 'closed', ['open'], '2026-02-10T08:00:01Z', expires_at=1775000000)
+
+        assert 'expires_at' not in updated
+        assert 'expires_at' not in store.get_ticket('t-1')
+        assert store.scan_segment(0, 1, 10)[0][0]['expires_at'] == 1775000000
+        store.update_status('t-1', 'open', ['closed'], '2026-02-10T08:00:02Z')
+        assert 'expires_at' not in store.scan_segment(0, 1, 10)[0][0]
+
+    def test_dynamodb_delete_comments(self):
+        """Test comment keys are paged and batch-deleted"""
+        comments = MagicMock()
+        comments.query.side_effect = [
+            {'Items': [{'ticket_id': 't-1', 'comment_key': f'k{n}'} for n in range(30)], 'LastEvaluatedKey': {'k': 1}},
+            {'Items': [{'ticket_id': 't-1', 'comment_key': 'k30'}]}
+        ]
+        comments.batch_delete_item.return_value = {'UnprocessedKeys': []}
+        store = DynamoDBTicketStore(table=MagicMock(), comments_table=comments)
+
+        assert store.delete_comments('t-1') == 0
+        assert [len(call.kwargs['Keys']) for call in comments.batch_delete_item.call_args_list] == [25, 5, 1]
+        assert comments.query.call_args_list[1].kwargs['ExclusiveStartKey'] == {'k': 1}
+
+
+class TestTicketArchiver:
+    """Test the DynamoDB Streams archiver"""
+
+    def test_archives_ttl_deletions_with_comments(self, archive):
+        """Test only TTL REMOVE records are archived, with every comment"""
+        store = MemoryTicketStore()
+        store.put_ticket(ticket(1))
+        for n in range(12):
+            store.append_comment('t-1', {'comment_text': f'Comment {n}', 'added_at': f'2026-02-09T13:00:{n:02d}Z'},
+                                 '2026-02-10T08:00:01Z')
+        event = {'Records': [
+            remove_record(ticket(1, comment_count=12)),
+            remove_record(ticket(2), identity=None),
+            {'eventName': 'MODIFY', 'dynamodb': {'NewImage': {'ticket_id': {'S': 't-3'}}}}
+        ]}
+
+        with patch('ticket_archiver.store', store), patch('ticket_archiver.archive', archive):
+            result = ticket_archiver.lambda_handler(event, {})
+
+        assert result['archived'] == 1
+        lines = gzip.decompress(archive.objects.get(result['object_key'])).splitlines()
+        archived = json.loads(lines[0])
+        assert archived['ticket_id'] == 't-1'
+        assert archived['comment_count'] == 12
+        assert len(archived['comments']) == 12
+        assert archive.index.get('t-2') is None
+        assert store.query_comments('t-1', 100) == ([], None)
+
+    def test_retry_keeps_first_archive(self, archive):
+        """Test a redelivered record does not overwrite the archived copy"""
+        store = MemoryTicketStore()
+        event = {'Records': [remove_record(ticket(1))]}
+
+        with patch('ticket_archiver.store', store), patch('ticket_archiver.archive', archive):
+            first = ticket_archiver.lambda_handler(event, {})
+            second = ticket_archiver.lambda_handler(event, {})
+
+        assert second == {'archived': 0, 'object_key': None}
+        assert archive.index.get('t-1')['object_key'] == first['object_key']
+
+    def test_comment_delete_failure_raises(self, archive):
+        """Test comments left behind fail the batch so Lambda retries it"""
+        store = MagicMock()
+        store.query_comments.return_value = ([], None)
+        store.delete_comments.return_value = 3
+
+        with patch('ticket_archiver.store', store), patch('ticket_archiver.archive', archive), \
+                pytest.raises(RuntimeError):
+            ticket_archiver.lambda_handler({'Records': [remove_record(ticket(1))]}, {})
+
+
+class TestArchivedReads:
+    """Test the handler's archive fallback and TTL on status changes"""
+
+    def test_closing_sets_ttl(self, handler_state):
+        """Test PATCH to closed stores expires_at and reopening clears it"""
+        store, _ = handler_state
+        store.put_ticket(ticket(1, status='open'))
+
+        with patch('ticket_archive.ARCHIVE_AFTER_DAYS', 30):
+            mock_itsm_handler.lambda_handler({
+                'httpMethod': 'PATCH', 'path': '/tickets/t-1', 'pathParameters': {'id': 't-1'},
+                'body': json.dumps({'status': 'resolved'})
+            }, {})
+        assert 'expires_at' in store.scan_segment(0, 1, 10)[0][0]
+
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'PATCH', 'path': '/tickets/t-1', 'pathParameters': {'id': 't-1'},
+            'body': json.dumps({'status': 'open'})
+        }, {})
+        assert 'expires_at' not in store.scan_segment(0, 1, 10)[0][0]
+
+    def test_archived_ticket_served(self, handler_state):
+        """Test a ticket missing from the table is read from the archive"""
+        _, archive = handler_state
+        archive.write_batch([ticket(1, comments=[])], archived_at='2026-03-12T04:00:00Z')
+
+        status, body = get('t-1')
+        assert status == 200
+        assert body['status'] == 'closed'
+        assert body['archived_at'] == '2026-03-12T04:00:00Z'
+
+        status, body = get('t-1', fields='compact')
+        assert body == {'ticket_id': 't-1', 'status': 'closed', 'updated_at': '2026-02-10T08:00:01Z'}
+        assert get('t-2')[0] == 404
+
+    def test_archived_ticket_conditional_get(self, handler_state):
+        """Test If-None-Match revalidates archived tickets too"""
+        _, archive = handler_state
+        archive.write_batch([ticket(1, comments=[])])
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET', 'path': '/tickets/t-1', 'pathParameters': {'id': 't-1'}
+        }, {})
+
+        revalidated = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET', 'path': '/tickets/t-1', 'pathParameters': {'id': 't-1'},
+            'headers': {'If-None-Match': response['headers']['ETag']}
+        }, {})
+        assert revalidated['statusCode'] == 304
+
+    def test_archive_reads_cached(self, handler_state):
+        """Test repeat reads of an archived ticket skip the object store"""
+        _, archive = handler_state
+        archive.write_batch([ticket(1, comments=[])])
+
+        with patch.object(archive.objects, 'get', wraps=archive.objects.get) as read:
+            get('t-1')
+            get('t-1')
+
+        assert read.call_count == 1
+
+    def test_archive_reads_disabled(self, handler_state):
+        """Test TICKET_ARCHIVE_READS=false keeps the plain 404"""
+        _, archive = handler_state
+        archive.write_batch([ticket(1, comments=[])])
+
+        with patch('mock_itsm_handler.TICKET_ARCHIVE_READS', False):
+            assert get('t-1')[0] == 404
@@ -0,0 +1,163 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add src/lambda to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import mock_itsm_handler
+from ticket_cache import TicketCache, create_ticket_cache
+from ticket_store import DynamoDBTicketStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def mock_table(handler_backends):
+    """Mock DynamoDB table with a fresh ticket cache"""
+    mock = MagicMock()
+    mock.comments = MagicMock()
+    mock.comments.query.return_value = {'Items': []}
+    handler_backends.use(store=DynamoDBTicketStore(table=mock, comments_table=mock.comments))
+    mock.cache = handler_backends.ticket_cache
+    return mock
+
+
+@pytest.fixture
+def sample_ticket():
+    """Sample ticket data"""
+    return {
+        'ticket_id': 'test-ticket-123',
+        'caller_id': 'user-001',
+        'issue_description': 'Laptop not turning on',
+        'status': 'open',
+        'created_at': '2026-02-09T12:00:00Z',
+        'updated_at': '2026-02-09T12:00:00Z',
+        'comments': []
+    }
+
+
+def get_event(ticket_id, **query):
+    return {
+        'httpMethod': 'GET',
+        'path': f'/tickets/{ticket_id}',
+        'pathParameters': {'id': ticket_id},
+        'queryStringParameters': query or None
+    }
+
+
+class TestTicketCache:
+    """Test the LRU/TTL cache"""
+
+    def test_hit_and_miss_counters(self, sample_ticket):
+        """Test hits and misses are counted"""
+        cache = TicketCache()
+        assert cache.get('test-ticket-123') is None
+        cache.put(sample_ticket)
+        assert cache.get('test-ticket-123') == sample_ticket
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1}
+
+    def test_entries_expire(self, sample_ticket):
+        """Test entries are dropped after the TTL"""
+        clock = FakeClock()
+        cache = TicketCache(ttl_seconds=5, clock=clock)
+        cache.put(sample_ticket)
+        clock.now = 4.9
+        assert cache.get('test-ticket-123') is not None
+        clock.now = 5.0
+        assert cache.get('test-ticket-123') is None
+        assert cache.stats()['size'] == 0
+
+    def test_least_recently_used_is_evicted(self):
+        """Test memory stays bounded by max_entries"""
+        cache = TicketCache(max_entries=2)
+        cache.put({'ticket_id': 'a'})
+        cache.put({'ticket_id': 'b'})
+        cache.get('a')
+        cache.put({'ticket_id': 'c'})
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.stats()['evictions'] == 1
+
+    def test_disabled_cache_stores_nothing(self, sample_ticket):
+        """Test the cache can be switched off"""
+        cache = TicketCache(enabled=False)
+        cache.put(sample_ticket)
+        assert cache.get('test-ticket-123') is None
+
+    def test_configured_from_environment(self):
+        """Test environment configuration"""
+        with patch.dict(os.environ, {'TICKET_CACHE_ENABLED': 'false', 'TICKET_CACHE_MAX_ENTRIES': '8'}):
+            cache = create_ticket_cache()
+        assert cache.enabled is False
+        assert cache.max_entries == 8
+
+
+class TestReadThroughCache:
+    """Test cache use in get_ticket_status"""
+
+    def test_repeated_status_reads_hit_cache(self, mock_table, sample_ticket):
+        """Test a second status read does not call DynamoDB"""
+        mock_table.get_item.return_value = {'Item': sample_ticket}
+
+        first = mock_itsm_handler.lambda_handler(get_event('test-ticket-123'), {})
+        second = mock_itsm_handler.lambda_handler(get_event('test-ticket-123'), {})
+
+        assert first['body'] == second['body']
+        mock_table.get_item.assert_called_once()
+        assert mock_table.cache.stats()['hits'] == 1
+
+    def test_create_populates_cache(self, mock_table):
+        """Test a newly created ticket is served without a read"""
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'VPN drops'})
+        }, {})
+        ticket_id = json.loads(response['body'])['ticket_id']
+
+        response = mock_itsm_handler.lambda_handler(get_event(ticket_id), {})
+
+        assert response['statusCode'] == 200
+        assert json.loads(response['body'])['issue_description'] == 'VPN drops'
+        mock_table.get_item.assert_not_called()
+
+    def test_comment_invalidates_cache(self, mock_table, sample_ticket):
+        """Test a comment forces the next status read back to DynamoDB"""
+        mock_table.get_item.return_value = {'Item': sample_ticket}
+        mock_itsm_handler.lambda_handler(get_event('test-ticket-123'), {})
+
+        mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets/test-ticket-123/comments',
+            'pathParameters': {'id': 'test-ticket-123'},
+            'body': json.dumps({'comment': 'Still broken'})
+        }, {})
+        mock_itsm_handler.lambda_handler(get_event('test-ticket-123'), {})
+
+        assert mock_table.get_item.call_count == 2
+
+    def test_consistent_read_bypasses_cache(self, mock_table, sample_ticket):
+        """Test consistent=true always reads DynamoDB with ConsistentRead"""
+        mock_table.get_item.return_value = {'Item': sample_ticket}
+        mock_itsm_handler.lambda_handler(get_event('test-ticket-123'), {})
+
+        mock_itsm_handler.lambda_handler(get_event('test-ticket-123', consistent='true'), {})
+
+        assert mock_table.get_item.call_count == 2
+        assert mock_table.get_item.call_args.kwargs['ConsistentRead'] is True
+
+    def test_not_found_is_not_cached(self, mock_table):
+        """Test misses in DynamoDB are not cached"""
+        mock_table.get_item.return_value = {}
+        mock_itsm_handler.lambda_handler(get_event('nonexistent'), {})
+        mock_itsm_handler.lambda_handler(get_event('nonexistent'), {})
+        assert mock_table.get_item.call_count == 2
@@ -0,0 +1,590 @@
+import pytest
+import json
+import sys
+import os
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from botocore.exceptions import ClientError, ReadTimeoutError
+
+# Add src/lambda and benchmarks to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import load_test
+import mock_itsm_handler
+import ticket_store
+from ticket_store import MemoryTicketStore, DynamoDBTicketStore
+
+
+@pytest.fixture
+def memory_store(handler_backends):
+    """Embedded ticket store wired into the handler"""
+    return handler_backends.store
+
+
+def make_ticket(ticket_id, caller_id, created_at):
+    return {
+        'ticket_id': ticket_id,
+        'caller_id': caller_id,
+        'issue_description': 'Laptop not turning on',
+        'status': 'open',
+        'created_at': created_at,
+        'updated_at': created_at,
+        'comments': []
+    }
+
+
+class TestCreateStore:
+    """Test backend selection"""
+
+    def test_memory_backend_from_environment(self):
+        """Test TICKET_STORE selects the embedded store"""
+        with patch.dict(os.environ, {'TICKET_STORE': 'memory'}):
+            assert isinstance(ticket_store.create_store(), MemoryTicketStore)
+
+    def test_dynamodb_backend_is_default(self):
+        """Test DynamoDB is used when TICKET_STORE is unset"""
+        with patch.dict(os.environ, {}, clear=True):
+            store = ticket_store.create_store()
+        assert isinstance(store, DynamoDBTicketStore)
+        assert store.table_name == 'poc-itsm-tickets'
+
+    def test_unknown_backend(self):
+        """Test unknown backend names are rejected"""
+        with pytest.raises(ValueError):
+            ticket_store.create_store('cassandra')
+
+
+class TestMemoryTicketStore:
+    """Test the embedded ticket store"""
+
+    def test_get_missing_ticket(self):
+        """Test missing tickets return None"""
+        assert MemoryTicketStore().get_ticket('nonexistent') is None
+
+    def test_put_and_get_are_isolated_copies(self):
+        """Test stored items are not shared with callers"""
+        store = MemoryTicketStore()
+        ticket = make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z')
+        store.put_ticket(ticket)
+        ticket['status'] = 'closed'
+
+        fetched = store.get_ticket('t-1')
+        fetched['comments'].append({'comment_text': 'x', 'added_at': 'y'})
+
+        assert store.get_ticket('t-1')['status'] == 'open'
+        assert store.get_ticket('t-1')['comments'] == []
+
+    def test_query_by_caller_newest_first_with_limit(self):
+        """Test caller index ordering matches CallerIdIndex with ScanIndexForward=False"""
+        store = MemoryTicketStore()
+        for i, created_at in enumerate(['2026-02-09T12:00:02Z', '2026-02-09T12:00:00Z',
+                                        '2026-02-09T12:00:03Z', '2026-02-09T12:00:01Z']):
+            store.put_ticket(make_ticket(f't-{i}', 'user-001', created_at))
+        store.put_ticket(make_ticket('other', 'user-002', '2026-02-09T13:00:00Z'))
+
+        tickets, _ = store.query_by_caller('user-001', limit=3)
+
+        assert [t['ticket_id'] for t in tickets] == ['t-2', 't-0', 't-3']
+        assert store.query_by_caller('user-999', limit=10) == ([], None)
+
+    def test_query_by_caller_pages_with_start_key(self):
+        """Test last_key/start_key paging walks every ticket exactly once"""
+        store = MemoryTicketStore()
+        for i in range(5):
+            store.put_ticket(make_ticket(f't-{i}', 'user-001', f'2026-02-09T12:00:0{i}Z'))
+
+        first, last_key = store.query_by_caller('user-001', limit=2)
+        second, last_key = store.query_by_caller('user-001', limit=2, start_key=last_key)
+        third, last_key = store.query_by_caller('user-001', limit=2, start_key=last_key)
+
+        assert [t['ticket_id'] for t in first + second + third] == ['t-4', 't-3', 't-2', 't-1', 't-0']
+        assert last_key is None
+
+    def test_get_ticket_projects_attributes(self):
+        """Test get_ticket returns only the named attributes"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+
+        assert store.get_ticket('t-1', attributes=('ticket_id', 'status')) == {'ticket_id': 't-1', 'status': 'open'}
+
+    def test_query_by_caller_projects_attributes(self):
+        """Test attribute projection on the embedded store"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+
+        tickets, _ = store.query_by_caller('user-001', limit=10, attributes=('ticket_id', 'status'))
+
+        assert tickets == [{'ticket_id': 't-1', 'status': 'open'}]
+
+    def test_put_existing_ticket_reindexes(self):
+        """Test overwriting a ticket does not leave stale index entries"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+        store.put_ticket(make_ticket('t-1', 'user-002', '2026-02-09T12:00:00Z'))
+
+        assert store.query_by_caller('user-001', limit=10) == ([], None)
+        assert len(store.query_by_caller('user-002', limit=10)[0]) == 1
+
+    def test_batch_put_and_get(self):
+        """Test batch operations on the embedded store"""
+        store = MemoryTicketStore()
+        unprocessed = store.put_tickets([
+            make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'),
+            make_ticket('t-2', 'user-001', '2026-02-09T12:00:01Z')
+        ])
+        found, unread = store.get_tickets(['t-1', 'missing', 't-2'])
+
+        assert unprocessed == [] and unread == []
+        assert sorted(found) == ['t-1', 't-2']
+
+    def test_comments_are_separate_items(self):
+        """Test the ticket read embeds only the newest comments, oldest first"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+        for i in range(ticket_store.RECENT_COMMENTS + 2):
+            store.append_comment('t-1', {'comment_text': f'c{i}', 'added_at': f'2026-02-09T12:{i:02d}:00Z'},
+                                 f'2026-02-09T12:{i:02d}:00Z')
+
+        ticket = store.get_ticket('t-1')
+
+        assert ticket['comment_count'] == ticket_store.RECENT_COMMENTS + 2
+        assert [c['comment_text'] for c in ticket['comments']] == [
+            f'c{i}' for i in range(2, ticket_store.RECENT_COMMENTS + 2)
+        ]
+
+    def test_query_comments_pages_full_history(self):
+        """Test comment history paging in chronological order"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+        for i in range(5):
+            store.append_comment('t-1', {'comment_text': f'c{i}', 'added_at': f'2026-02-09T12:0{i}:00Z'}, 'x')
+
+        first, last_key = store.query_comments('t-1', limit=3)
+        second, last_key = store.query_comments('t-1', limit=3, start_key=last_key)
+
+        assert [c['comment_text'] for c in first + second] == ['c0', 'c1', 'c2', 'c3', 'c4']
+        assert last_key is None
+        assert set(first[0]) == {'comment_text', 'added_at'}
+
+    def test_legacy_inline_comments_are_merged(self):
+        """Test tickets written with the list_append layout still read correctly"""
+        store = MemoryTicketStore()
+        legacy = make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z')
+        legacy['comments'] = [{'comment_text': 'old', 'added_at': '2026-02-09T12:01:00Z'}]
+        store.put_ticket(legacy)
+        store.append_comment('t-1', {'comment_text': 'new', 'added_at': '2026-02-09T12:02:00Z'}, 'x')
+
+        ticket = store.get_ticket('t-1')
+
+        assert [c['comment_text'] for c in ticket['comments']] == ['old', 'new']
+        assert ticket['comment_count'] == 2
+
+    def test_append_comment_missing_ticket(self):
+        """Test appending to a missing ticket fails like a conditional update"""
+        with pytest.raises(ClientError) as excinfo:
+            MemoryTicketStore().append_comment('nonexistent', {'comment_text': 'x', 'added_at': 'y'}, 'y')
+        assert excinfo.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+    def test_update_status_checks_status_and_version(self):
+        """Test status updates are conditional and return the current item on failure"""
+        store = MemoryTicketStore()
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+
+        updated = store.update_status('t-1', 'in_progress', ['open'], '2026-02-09T13:00:00Z', expected_version=0)
+        with pytest.raises(ClientError) as stale:
+            store.update_status('t-1', 'resolved', ['in_progress'], '2026-02-09T14:00:00Z', expected_version=0)
+        with pytest.raises(ClientError) as missing:
+            store.update_status('nonexistent', 'resolved', ['open'], '2026-02-09T14:00:00Z')
+
+        assert (updated['status'], updated['version']) == ('in_progress', 1)
+        assert stale.value.response['Item']['version'] == 1
+        assert 'Item' not in missing.value.response
+
+
+class TestHandlerWithMemoryStore:
+    """Run the full API against the embedded store"""
+
+    def test_ticket_lifecycle(self, memory_store):
+        """Test create, comment, get and list through lambda_handler"""
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets',
+            'body': json.dumps({'caller_id': 'user-001', 'issue_description': 'VPN drops'})
+        }, {})
+        assert response['statusCode'] == 201
+        ticket_id = json.loads(response['body'])['ticket_id']
+
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': f'/tickets/{ticket_id}/comments',
+            'pathParameters': {'id': ticket_id},
+            'body': json.dumps({'comment': 'Reinstalled client'})
+        }, {})
+        assert response['statusCode'] == 200
+
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': f'/tickets/{ticket_id}',
+            'pathParameters': {'id': ticket_id}
+        }, {})
+        body = json.loads(response['body'])
+        assert body['comments'][0]['comment_text'] == 'Reinstalled client'
+
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'GET',
+            'path': '/tickets',
+            'queryStringParameters': {'caller': 'user-001'}
+        }, {})
+        assert [t['ticket_id'] for t in json.loads(response['body'])['tickets']] == [ticket_id]
+
+    def test_comment_on_missing_ticket(self, memory_store):
+        """Test 404 when commenting on a ticket the store does not have"""
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets/nonexistent/comments',
+            'pathParameters': {'id': 'nonexistent'},
+            'body': json.dumps({'comment': 'Hello'})
+        }, {})
+        assert response['statusCode'] == 404
+
+
+class TestClientTable:
+    """Test the low-level client adapter"""
+
+    def test_serializes_requests_and_deserializes_responses(self):
+        """Test plain values are converted to and from DynamoDB JSON"""
+        client = MagicMock()
+        client.get_item.return_value = {
+            'Item': {'ticket_id': {'S': 't-1'}, 'comments': {'L': []}}
+        }
+        client.query.return_value = {
+            'Items': [{'ticket_id': {'S': 't-1'}}],
+            'LastEvaluatedKey': {'ticket_id': {'S': 't-1'}}
+        }
+        table = ticket_store.ClientTable(client, 'poc-itsm-tickets')
+
+        item = table.get_item(Key={'ticket_id': 't-1'})['Item']
+        response = table.query(
+            IndexName='CallerIdIndex',
+            KeyConditionExpression='caller_id = :caller_id',
+            ExpressionAttributeValues={':caller_id': 'user-001'}
+        )
+
+        client.get_item.assert_called_once_with(
+            TableName='poc-itsm-tickets', Key={'ticket_id': {'S': 't-1'}}, ReturnConsumedCapacity='TOTAL'
+        )
+        assert client.query.call_args.kwargs['ExpressionAttributeValues'] == {':caller_id': {'S': 'user-001'}}
+        assert item == {'ticket_id': 't-1', 'comments': []}
+        assert response['Items'] == [{'ticket_id': 't-1'}]
+        assert response['LastEvaluatedKey'] == {'ticket_id': 't-1'}
+
+    def test_client_is_created_once_per_region(self):
+        """Test the DynamoDB client is cached across stores"""
+        with patch.dict(ticket_store._clients, clear=True), patch('boto3.client') as factory:
+            first = ticket_store.get_dynamodb_client('us-east-1')
+            second = ticket_store.get_dynamodb_client('us-east-1')
+        assert first is second
+        factory.assert_called_once()
+        assert factory.call_args.args == ('dynamodb',)
+        config = factory.call_args.kwargs['config']
+        assert config.retries['total_max_attempts'] == 1
+        assert config.max_pool_connections == 25
+
+    def test_batch_requests_are_table_scoped(self):
+        """Test batch helpers build RequestItems for this table only"""
+        client = MagicMock()
+        client.batch_write_item.return_value = {'UnprocessedItems': {
+            'poc-itsm-tickets': [{'PutRequest': {'Item': {'ticket_id': {'S': 't-2'}}}}]
+        }}
+        client.batch_get_item.return_value = {
+            'Responses': {'poc-itsm-tickets': [{'ticket_id': {'S': 't-1'}}]},
+            'UnprocessedKeys': {'poc-itsm-tickets': {'Keys': [{'ticket_id': {'S': 't-2'}}]}}
+        }
+        table = ticket_store.ClientTable(client, 'poc-itsm-tickets')
+
+        written = table.batch_write_item(Items=[{'ticket_id': 't-1'}, {'ticket_id': 't-2'}])
+        read = table.batch_get_item(Keys=[{'ticket_id': 't-1'}, {'ticket_id': 't-2'}])
+
+        request = client.batch_write_item.call_args.kwargs['RequestItems']
+        assert request == {'poc-itsm-tickets': [
+            {'PutRequest': {'Item': {'ticket_id': {'S': 't-1'}}}},
+            {'PutRequest': {'Item': {'ticket_id': {'S': 't-2'}}}}
+        ]}
+        assert written == {'UnprocessedItems': [{'ticket_id': 't-2'}]}
+        assert read == {'Items': [{'ticket_id': 't-1'}], 'UnprocessedKeys': [{'ticket_id': 't-2'}]}
+
+    def test_comment_write_is_constant_size(self):
+        """Test adding a comment updates the ticket and puts the comment in one transaction"""
+        table, comments_table = MagicMock(), MagicMock()
+        store = DynamoDBTicketStore(table=table, comments_table=comments_table,
+                                    comments_table_name='poc-itsm-ticket-comments')
+
+        store.append_comment('t-1', {'comment_text': 'Hello', 'added_at': '2026-02-09T12:00:00Z'},
+                             '2026-02-09T12:00:00Z', request_token='f' * 32)
+
+        request = table.transact_write_items.call_args.kwargs
+        update, put = request['TransactItems'][0]['Update'], request['TransactItems'][1]['Put']
+        assert request['ClientRequestToken'] == 'f' * 32
+        assert 'comments' not in update['UpdateExpression']
+        assert update['ConditionExpression'] == 'attribute_exists(ticket_id)'
+        assert put['TableName'] == 'poc-itsm-ticket-comments'
+        assert put['Item']['ticket_id'] == 't-1'
+        assert put['Item']['comment_key'] == '2026-02-09T12:00:00Z#' + 'f' * 32
+        table.update_item.assert_not_called()
+        comments_table.put_item.assert_not_called()
+
+    def test_ticket_read_queries_newest_comments(self):
+        """Test the ticket read fetches the newest comments in one query"""
+        table, comments_table = MagicMock(), MagicMock()
+        table.get_item.return_value = {'Item': {'ticket_id': 't-1', 'comment_count': 2}}
+        comments_table.query.return_value = {'Items': [
+            {'ticket_id': 't-1', 'comment_key': 'b#1', 'comment_text': 'second', 'added_at': 'b'},
+            {'ticket_id': 't-1', 'comment_key': 'a#1', 'comment_text': 'first', 'added_at': 'a'}
+        ]}
+        store = DynamoDBTicketStore(table=table, comments_table=comments_table)
+
+        ticket = store.get_ticket('t-1')
+
+        query = comments_table.query.call_args.kwargs
+        assert query['ScanIndexForward'] is False
+        assert query['Limit'] == ticket_store.RECENT_COMMENTS
+        assert [c['comment_text'] for c in ticket['comments']] == ['first', 'second']
+
+    def test_projected_ticket_read(self):
+        """Test attributes become a ProjectionExpression and comment_count still counts legacy comments"""
+        table, comments_table = MagicMock(), MagicMock()
+        table.get_item.return_value = {'Item': {
+            'ticket_id': 't-1', 'status': 'open', 'comment_count': 2,
+            'comments': [{'comment_text': 'legacy', 'added_at': 'a'}]
+        }}
+        store = DynamoDBTicketStore(table=table, comments_table=comments_table)
+
+        ticket = store.get_ticket('t-1', attributes=('status', 'comment_count'))
+
+        names = table.get_item.call_args.kwargs['ExpressionAttributeNames']
+        assert sorted(names.values()) == ['comment_count', 'comments', 'status', 'ticket_id']
+        assert ticket == {'status': 'open', 'comment_count': 3}
+        comments_table.query.assert_not_called()
+
+    def test_update_status_is_one_conditional_write(self):
+        """Test PATCH maps to a single UpdateItem guarded by status and version"""
+        table = MagicMock()
+        table.update_item.return_value = {'Attributes': {'ticket_id': 't-1', 'status': 'resolved', 'version': 4}}
+        store = DynamoDBTicketStore(table=table, comments_table=MagicMock())
+
+        store.update_status('t-1', 'resolved', ['open', 'in_progress'], '2026-02-09T12:00:00Z', expected_version=3)
+
+        update = table.update_item.call_args.kwargs
+        assert update['ConditionExpression'] == '#status IN (:from0, :from1) AND version = :version'
+        assert update['ExpressionAttributeValues'][':version'] == 3
+        assert update['ReturnValuesOnConditionCheckFailure'] == 'ALL_OLD'
+        assert 'ADD version :one' in update['UpdateExpression']
+
+    def test_condition_failure_item_is_deserialized(self):
+        """Test the ALL_OLD item on a failed condition comes back as plain values"""
+        client = MagicMock()
+        client.update_item.side_effect = ClientError({
+            'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'},
+            'Item': {'ticket_id': {'S': 't-1'}, 'version': {'N': '2'}}
+        }, 'UpdateItem')
+        table = ticket_store.ClientTable(client, 'poc-itsm-tickets')
+
+        with pytest.raises(ClientError) as excinfo:
+            table.update_item(Key={'ticket_id': 't-1'}, UpdateExpression='SET a = :a',
+                              ExpressionAttributeValues={':a': 1})
+
+        assert excinfo.value.response['Item'] == {'ticket_id': 't-1', 'version': 2}
+
+    def test_store_defers_client_creation(self):
+        """Test constructing the DynamoDB store does not create a client"""
+        with patch.object(ticket_store, 'get_dynamodb_client') as factory:
+            DynamoDBTicketStore()
+        factory.assert_not_called()
+
+
+class TestCommentTransaction:
+    """Test comment appends retried through the handler over stub tables"""
+
+    @pytest.fixture
+    def tables(self, handler_backends):
+        store, tables = load_test.build_store(0, 0, seed=1)
+        store.put_ticket({'ticket_id': 't-1', 'caller_id': 'user-001', 'issue_description': 'VPN drops',
+                          'status': 'open', 'created_at': '2026-02-09T12:00:00Z', 'comment_count': 0})
+        handler_backends.use(store=store)
+        return tables
+
+    def comment(self):
+        return mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets/t-1/comments',
+            'pathParameters': {'id': 't-1'},
+            'body': json.dumps({'comment': 'Still dropping'})
+        }, {})
+
+    def stored(self, tables):
+        ticket = tables[load_test.TABLE_NAME].get_item(Key={'ticket_id': 't-1'})['Item']
+        comments = tables[load_test.COMMENTS_TABLE_NAME].query(
+            KeyConditionExpression='ticket_id = :t', ExpressionAttributeValues={':t': 't-1'})['Items']
+        return ticket['comment_count'], len(comments)
+
+    def test_throttled_comment_write_counts_once(self, tables):
+        """Test a throttled comment write is retried without counting the comment twice"""
+        comments = tables[load_test.COMMENTS_TABLE_NAME]
+        comments.throttle_rate = 1.0
+        with patch('retry.sleep', side_effect=lambda delay: setattr(comments, 'throttle_rate', 0)) as sleep:
+            response = self.comment()
+
+        assert response['statusCode'] == 200
+        assert sleep.call_count == 1
+        assert self.stored(tables) == (1, 1)
+
+    def test_retry_after_lost_response_counts_once(self, tables):
+        """Test a retry of a committed write whose response was lost is a no-op"""
+        client = mock_itsm_handler.store.table.client
+        commit = client.transact_write_items
+
+        def commit_then_time_out(**request):
+            commit(**request)
+            client.transact_write_items = commit
+            raise ReadTimeoutError(endpoint_url='https://dynamodb.us-east-1.amazonaws.com')
+
+        client.transact_write_items = commit_then_time_out
+        with patch('retry.sleep') as sleep:
+            response = self.comment()
+
+        assert response['statusCode'] == 200
+        assert sleep.call_count == 1
+        assert self.stored(tables) == (1, 1)
+
+    def test_missing_ticket_writes_nothing(self, tables):
+        """Test a comment on a missing ticket is a 404 that leaves no comment behind"""
+        response = mock_itsm_handler.lambda_handler({
+            'httpMethod': 'POST',
+            'path': '/tickets/t-2/comments',
+            'pathParameters': {'id': 't-2'},
+            'body': json.dumps({'comment': 'Anyone?'})
+        }, {})
+
+        assert response['statusCode'] == 404
+        assert tables[load_test.COMMENTS_TABLE_NAME].query(
+            KeyConditionExpression='ticket_id = :t', ExpressionAttributeValues={':t': 't-2'})['Items'] == []
+
+
+class TestCallerShards:
+    """Test the write-sharded caller index"""
+
+    class ShardedTable:
+        """Fake table answering CallerShardIndex queries from put items"""
+
+        def __init__(self):
+            self.items = []
+            self.queries = []
+
+        def put_item(self, Item, **kwargs):
+            self.items.append(Item)
+
+        def query(self, **params):
+            self.queries.append(params)
+            values = params['ExpressionAttributeValues']
+            matches = sorted(
+                (item for item in self.items if item['caller_shard'] == values[':shard']
+                 and item['created_at'] <= values.get(':created_at', item['created_at'])),
+                key=lambda item: (item['created_at'], item['ticket_id']), reverse=True
+            )
+            response = {'Items': [dict(item) for item in matches[:params['Limit']]]}
+            if len(matches) > params['Limit']:
+                response['LastEvaluatedKey'] = {'ticket_id': matches[params['Limit'] - 1]['ticket_id']}
+            return response
+
+    @pytest.fixture
+    def store(self):
+        table = self.ShardedTable()
+        store = DynamoDBTicketStore(table=table, comments_table=MagicMock(), caller_shards=4)
+        for number in range(10):
+            store.put_ticket(make_ticket(f't-{number}', 'front-desk', f'2026-02-09T12:00:{number:02d}Z'))
+        store.put_ticket(make_ticket('t-other', 'user-002', '2026-02-09T12:00:30Z'))
+        return store
+
+    def test_shard_key_derived_from_ticket_id(self, store):
+        """Test writes carry a deterministic caller_id#N key"""
+        shards = {item['ticket_id']: item['caller_shard'] for item in store.table.items}
+
+        assert shards['t-1'] == ticket_store.caller_shard_key('front-desk', 't-1', 4)
+        assert len({shards[f't-{n}'] for n in range(10)}) > 1
+        assert all(shard.startswith('front-desk#') for ticket_id, shard in shards.items() if ticket_id != 't-other')
+
+    def test_scatter_gather_pages_merge_newest_first(self, store):
+        """Test every shard is queried and pages merge by created_at"""
+        first, cursor = store.query_by_caller('front-desk', limit=4)
+        second, cursor = store.query_by_caller('front-desk', limit=4, start_key=cursor)
+        third, end = store.query_by_caller('front-desk', limit=4, start_key=cursor)
+
+        ticket_ids = [t['ticket_id'] for t in first + second + third]
+        assert ticket_ids == [f't-{n}' for n in range(9, -1, -1)]
+        assert end is None
+        assert {q['ExpressionAttributeValues'][':shard'] for q in store.table.queries} == {
+            f'front-desk#{shard}' for shard in range(4)
+        }
+        assert all(q['IndexName'] == 'CallerShardIndex' for q in store.table.queries)
+        assert 'caller_shard' not in first[0]
+
+    def test_projection_keeps_merge_keys(self, store):
+        """Test summary view still projects the attributes the merge needs"""
+        page, _ = store.query_by_caller('front-desk', limit=2, attributes=('ticket_id', 'status'))
+
+        assert page == [{'ticket_id': 't-9', 'status': 'open'}, {'ticket_id': 't-8', 'status': 'open'}]
+        names = store.table.queries[0]['ExpressionAttributeNames'].values()
+        assert set(names) == {'ticket_id', 'status', 'created_at'}
+
+    def test_metrics_recorded_from_shard_threads(self):
+        """Test shard queries run in the request's context"""
+        import metrics
+        store = DynamoDBTicketStore(table=ticket_store.ClientTable(MagicMock(), 'poc-itsm-tickets'),
+                                    comments_table=MagicMock(), caller_shards=3)
+        store.table.client.query.return_value = {'Items': []}
+
+        with patch.object(metrics, 'sink', metrics.MemorySink()):
+            metrics.start_invocation('GET /tickets', None)
+            store.query_by_caller('front-desk', limit=5)
+            document = metrics.finish_invocation(200)
+
+        assert document['DynamoDBCalls'] == 3
+
+    def test_one_pool_for_concurrent_first_queries(self, store):
+        """Test concurrent first caller queries share one shard pool"""
+        created = []
+        pool = ticket_store.ThreadPoolExecutor
+
+        def slow_pool(*args, **kwargs):
+            created.append(args)
+            time.sleep(0.05)
+            return pool(*args, **kwargs)
+
+        barrier = threading.Barrier(4, timeout=2)
+
+        def first_query():
+            barrier.wait()
+            store.query_by_caller('front-desk', limit=2)
+
+        with patch('ticket_store.ThreadPoolExecutor', side_effect=slow_pool):
+            threads = [threading.Thread(target=first_query) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert len(created) == 1
+
+    def test_unsharded_by_default(self):
+        """Test CALLER_INDEX_SHARDS defaults to the plain CallerIdIndex"""
+        table = MagicMock()
+        table.query.return_value = {'Items': []}
+        store = DynamoDBTicketStore(table=table, comments_table=MagicMock())
+
+        store.put_ticket(make_ticket('t-1', 'user-001', '2026-02-09T12:00:00Z'))
+        store.query_by_caller('user-001', limit=5)
+
+        assert 'caller_shard' not in table.put_item.call_args.kwargs['Item']
+        assert table.query.call_args.kwargs['IndexName'] == 'CallerIdIndex'
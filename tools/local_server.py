@@ -0,0 +1,280 @@
+"""
+Serve lambda_handler over HTTP for local runs and concurrency measurements.
+
+Each HTTP request is translated into an API Gateway REST proxy event
+(resource, pathParameters for /tickets/{id} and /tickets/{id}/comments,
+query string and headers), passed to mock_itsm_handler.lambda_handler with
+a Lambda-like context, and the proxy response is written back.
+
+Connections are HTTP/1.1 keep-alive and are served by a pool of --threads
+worker threads (one connection per worker while it stays open). With
+--processes N the listening socket is shared by N forked processes, each
+with its own thread pool, to compare thread and process scaling.
+
+--store selects the backends:
+  memory  in-process ticket store, search index, caller summaries and archive
+  stub    DynamoDB backends over benchmarks/stub_table.py, with injected
+          latency and throttling as in the load test
+  env     the handler's own backends (TICKET_STORE, TABLE_NAME, ...)
+In-process stores are copied into each forked process; a keep-alive
+connection stays on one process, so a client reusing its connection sees
+its own writes.
+
+Usage: python tools/local_server.py [--port 8080] [--store memory] [--threads 8] [--processes 1]
+           [--latency-ms 5] [--throttle-rate 0] [--timeout-ms 10000] [--quiet] [--access-log]
+"""
+import argparse
+import os
+import signal
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+import mock_itsm_handler
+
+FUNCTION_NAME = 'poc-itsm-api-handler'
+
+BAD_GATEWAY = b'{"message": "Internal server error"}'
+
+
+class LocalContext:
+    """
+    The parts of the Lambda context object the handler uses.
+    """
+
+    function_name = FUNCTION_NAME
+
+    def __init__(self, timeout_ms):
+        self.aws_request_id = str(uuid.uuid4())
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def proxy_event(method, target, headers, body, request_id=None):
+    """
+    REST API proxy integration event for one HTTP request. headers is a
+    list of (name, value) pairs; repeated query parameters and headers keep
+    their last value in the single-value maps, as API Gateway does.
+    """
+    url = urlsplit(target)
+    path = url.path
+    resource, path_parameters = mock_itsm_handler.match_resource(path)
+
+    query = {}
+    for name, value in parse_qsl(url.query, keep_blank_values=True):
+        query.setdefault(name, []).append(value)
+    multi_headers = {}
+    for name, value in headers:
+        multi_headers.setdefault(name, []).append(value)
+
+    return {
+        'resource': resource,
+        'path': path,
+        'httpMethod': method,
+        'headers': {name: values[-1] for name, values in multi_headers.items()} or None,
+        'multiValueHeaders': multi_headers or None,
+        'queryStringParameters': {name: values[-1] for name, values in query.items()} or None,
+        'multiValueQueryStringParameters': query or None,
+        'pathParameters': path_parameters,
+        'requestContext': {
+            'resourcePath': resource,
+            'httpMethod': method,
+            'path': path,
+            'stage': 'local',
+            'requestId': request_id or str(uuid.uuid4()),
+            'requestTimeEpoch': int(time.time() * 1000)
+        },
+        'body': body.decode('utf-8', 'replace') if body else None,
+        'isBase64Encoded': False
+    }
+
+
+class ProxyRequestHandler(BaseHTTPRequestHandler):
+    """
+    Translates every request into a proxy event for lambda_handler.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'itsm-local'
+
+    def do_GET(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        context = LocalContext(self.server.timeout_ms)
+        event = proxy_event(self.command, self.path, self.headers.items(), body, context.aws_request_id)
+        try:
+            response = mock_itsm_handler.lambda_handler(event, context)
+        except Exception as e:
+            # API Gateway answers 502 when the integration itself fails
+            print(f"Handler error: {str(e)}", file=sys.stderr)
+            self.send_response(502)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(BAD_GATEWAY)))
+            self.end_headers()
+            self.wfile.write(BAD_GATEWAY)
+            return
+        self.write_response(response)
+
+    do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = do_GET
+
+    def write_response(self, response):
+        status = response['statusCode']
+        data = (response.get('body') or '').encode('utf-8')
+        self.send_response(status)
+        for name, value in (response.get('headers') or {}).items():
+            self.send_header(name, str(value))
+        for name, values in (response.get('multiValueHeaders') or {}).items():
+            for value in values:
+                self.send_header(name, str(value))
+        # 204 and 304 never carry a body; everything else is framed by
+        # Content-Length so the connection can be reused
+        if status in (204, 304):
+            self.end_headers()
+            return
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.access_log:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer that hands each accepted connection to a fixed pool of
+    worker threads instead of a new thread per connection.
+    """
+
+    def __init__(self, address, threads=8, timeout_ms=10000, keep_alive_s=5, access_log=False):
+        handler = type('Handler', (ProxyRequestHandler,), {'timeout': keep_alive_s})
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http-worker')
+        self.timeout_ms = timeout_ms
+        self.access_log = access_log
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._serve_connection, request, client_address)
+
+    def _serve_connection(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def configure_backends(args):
+    """
+    Point the handler module at the backends selected by --store.
+    """
+    if args.store == 'env':
+        return
+    from object_store import MemoryObjectStore
+    from ticket_archive import MemoryArchiveIndex, TicketArchive
+    mock_itsm_handler.ticket_archive = TicketArchive(MemoryObjectStore(), MemoryArchiveIndex())
+    if args.store == 'memory':
+        from caller_summary import MemoryCallerSummaries
+        from search_index import MemorySearchIndex
+        from ticket_store import MemoryTicketStore
+        mock_itsm_handler.store = MemoryTicketStore()
+        mock_itsm_handler.search_index = MemorySearchIndex()
+        mock_itsm_handler.caller_summaries = MemoryCallerSummaries()
+        return
+    import load_test
+    store, tables = load_test.build_store(args.latency_ms / 1000, args.throttle_rate, args.seed)
+    mock_itsm_handler.store = store
+    mock_itsm_handler.search_index = load_test.build_search_index(tables)
+    mock_itsm_handler.caller_summaries = load_test.build_caller_summaries(tables)
+
+
+def serve_processes(server, processes):
+    """
+    Fork processes workers that all accept from server's socket, and wait
+    for them. The socket is non-blocking so a worker that loses the accept
+    race goes back to waiting instead of blocking in accept(). The workers
+    are stopped when this process gets SIGINT or SIGTERM.
+    """
+    server.socket.setblocking(False)
+    children = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+    # Stop the workers on SIGTERM as well as Ctrl-C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                # Already stopped by the same signal
+                pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--store', choices=('memory', 'stub', 'env'), default='memory')
+    parser.add_argument('--threads', type=int, default=8, help='Worker threads per process')
+    parser.add_argument('--processes', type=int, default=1, help='Forked processes sharing the socket')
+    parser.add_argument('--timeout-ms', type=int, default=10000, help='Simulated Lambda timeout per request')
+    parser.add_argument('--keep-alive-s', type=float, default=5, help='Idle keep-alive connection timeout')
+    parser.add_argument('--latency-ms', type=float, default=5, help='Stub DynamoDB latency per call')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Stub DynamoDB throttle probability')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--quiet', action='store_true', help='Discard handler logs and metrics output')
+    parser.add_argument('--access-log', action='store_true', help='Log every request to stderr')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_backends(args)
+    if args.quiet:
+        sys.stdout = open(os.devnull, 'w')
+    server = PooledHTTPServer(
+        (args.host, args.port), threads=args.threads, timeout_ms=args.timeout_ms,
+        keep_alive_s=args.keep_alive_s, access_log=args.access_log
+    )
+    host, port = server.server_address[:2]
+    print(f"Serving lambda_handler on http://{host}:{port} "
+          f"({args.processes} process(es) x {args.threads} threads, {args.store} store)", file=sys.stderr)
+    try:
+        if args.processes > 1:
+            serve_processes(server, args.processes)
+        else:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
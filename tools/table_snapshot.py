@@ -0,0 +1,249 @@
+"""
+Export poc-itsm-tickets and poc-itsm-ticket-comments to NDJSON files and
+import them back.
+
+export runs a parallel segmented Scan of each table: each of --segments
+segments is read by a worker page by page and appended to its own part
+file (part-NNNN.ndjson for tickets, comments-NNNN.ndjson for comment
+items), so memory stays at one page per worker. checkpoint.json records
+every segment's LastEvaluatedKey and file offset after each page; rerunning
+the same command resumes where it stopped.
+
+import reads part files (or a single .ndjson file; comments-*.ndjson holds
+comments) and writes the tickets and comments with BatchWriteItem, at most
+--rate items per second across all workers.
+
+Both go through the handler's ticket store and retry policy modules, so exported
+lines look like API tickets and comments (plain text, JSON numbers) and
+imported items are stored exactly like newly created ones (text compressed
+again). Comments keep their comment_key, so importing twice writes the
+same items again. The tables are chosen by TABLE_NAME / COMMENTS_TABLE_NAME
+/ TICKET_STORE as for the handler.
+
+Usage: python tools/table_snapshot.py export --output-dir snapshot [--segments 8] [--workers 8] [--page-size 500]
+       python tools/table_snapshot.py import --input snapshot [--rate 200] [--workers 4] [--batch-size 25]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'lambda'))
+
+import retry
+import serialization
+from ticket_store import create_store
+
+CHECKPOINT_FILE = 'checkpoint.json'
+
+store = create_store()
+retry_policy = retry.create_retry_policy()
+
+# Exported tables: part file prefix and the store method scanning a segment
+TABLES = {
+    'tickets': ('part', 'scan_segment'),
+    'comments': ('comments', 'scan_comment_segment')
+}
+
+
+def part_path(directory, segment, table='tickets'):
+    prefix, _ = TABLES[table]
+    return os.path.join(directory, f'{prefix}-{segment:04d}.ndjson')
+
+
+class Checkpoint:
+    """
+    Per-table, per-segment export progress, rewritten atomically after every page:
+    {'segments': N, table: {segment: {'last_key', 'offset', 'items', 'done'}}}
+    """
+
+    def __init__(self, path, segments):
+        self.path = path
+        self._lock = threading.Lock()
+        saved = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            if saved['segments'] != segments:
+                raise ValueError(f"{path} was written for {saved['segments']} segments, not {segments}")
+        self.state = {}
+        for table in TABLES:
+            self.state[table] = {int(segment): progress for segment, progress in saved.get(table, {}).items()}
+            for segment in range(segments):
+                self.state[table].setdefault(segment, {'last_key': None, 'offset': 0, 'items': 0, 'done': False})
+        self.segments = segments
+
+    def update(self, table, segment, **progress):
+        with self._lock:
+            self.state[table][segment].update(progress)
+            temporary = f'{self.path}.tmp'
+            with open(temporary, 'w') as f:
+                saved = {name: {str(number): progress for number, progress in state.items()}
+                         for name, state in self.state.items()}
+                f.write(serialization.encode(dict(saved, segments=self.segments)))
+            os.replace(temporary, self.path)
+
+
+def export_segment(table, segment, args, checkpoint):
+    """
+    Append one segment of table's items to its part file, resuming from the
+    checkpointed key. Lines written after the last checkpoint (a crash
+    between write and checkpoint) are truncated away first.
+    """
+    progress = dict(checkpoint.state[table][segment])
+    if progress['done']:
+        return progress['items']
+    scan = getattr(store, TABLES[table][1])
+    path = part_path(args.output_dir, segment, table)
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+    with open(path, mode) as f:
+        f.truncate(progress['offset'])
+        f.seek(progress['offset'])
+        start_key = progress['last_key']
+        count = progress['items']
+        while True:
+            items, start_key = retry_policy.call(
+                lambda key=start_key: scan(segment, args.segments, limit=args.page_size, start_key=key)
+            )
+            f.write(''.join(serialization.encode(item) + '\n' for item in items).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            count += len(items)
+            checkpoint.update(table, segment, last_key=start_key, offset=f.tell(), items=count,
+                              done=start_key is None)
+            if start_key is None:
+                return count
+
+
+def export_table(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    checkpoint = Checkpoint(os.path.join(args.output_dir, CHECKPOINT_FILE), args.segments)
+    started = time.perf_counter()
+    parts = [(table, segment) for table in TABLES for segment in range(args.segments)]
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        counts = list(pool.map(lambda part: export_segment(*part, args, checkpoint), parts))
+    exported = dict.fromkeys(TABLES, 0)
+    for (table, _), count in zip(parts, counts):
+        exported[table] += count
+    return {
+        'exported': exported['tickets'],
+        'comments': exported['comments'],
+        'segments': args.segments,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+class RateLimiter:
+    """
+    Paces acquisitions to rate units per second across threads
+    (unlimited when rate is falsy).
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, units):
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + units / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+def input_files(path):
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.ndjson'))
+    return [path]
+
+
+def read_batches(path, batch_size):
+    """
+    Yield lists of up to batch_size tickets from an NDJSON file. Numbers
+    parse as Decimal so the DynamoDB serializer accepts them.
+    """
+    batch = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                batch.append(json.loads(line, parse_float=Decimal))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def file_table(path):
+    prefix, _ = TABLES['comments']
+    return 'comments' if os.path.basename(path).startswith(f'{prefix}-') else 'tickets'
+
+
+def import_file(path, args, limiter):
+    table = file_table(path)
+    put = store.put_comments if table == 'comments' else store.put_tickets
+    imported = failed = 0
+    for batch in read_batches(path, args.batch_size):
+        limiter.acquire(len(batch))
+        unprocessed = retry_policy.call(lambda: put(batch))
+        failed += len(unprocessed)
+        imported += len(batch) - len(unprocessed)
+        for item in unprocessed:
+            if table == 'comments':
+                print(f"Failed to import comment {item['comment_key']} of ticket {item['ticket_id']}", file=sys.stderr)
+            else:
+                print(f"Failed to import ticket {item['ticket_id']}", file=sys.stderr)
+    return table, imported, failed
+
+
+def import_table(args):
+    limiter = RateLimiter(args.rate)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(lambda path: import_file(path, args, limiter), input_files(args.input)))
+    return {
+        'imported': sum(imported for table, imported, _ in results if table == 'tickets'),
+        'comments': sum(imported for table, imported, _ in results if table == 'comments'),
+        'failed': sum(failed for _, _, failed in results),
+        'seconds': round(time.perf_counter() - started, 3)
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export = commands.add_parser('export', help='Scan the tickets and comments tables to NDJSON part files')
+    export.add_argument('--output-dir', required=True)
+    export.add_argument('--segments', type=int, default=8, help='Scan TotalSegments per table (one part file each)')
+    export.add_argument('--workers', type=int, default=8)
+    export.add_argument('--page-size', type=int, default=500, help='Scan Limit per page')
+
+    load = commands.add_parser('import', help='Write NDJSON tickets and comments back with BatchWriteItem')
+    load.add_argument('--input', required=True, help='Export directory or a single .ndjson file')
+    load.add_argument('--rate', type=float, default=200, help='Items per second across workers; 0 for unlimited')
+    load.add_argument('--workers', type=int, default=4, help='Files imported in parallel')
+    load.add_argument('--batch-size', type=int, default=25)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == 'export':
+        report = export_table(args)
+    else:
+        report = import_table(args)
+    print(json.dumps(report))
+    return 1 if report.get('failed') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())